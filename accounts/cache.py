@@ -0,0 +1,51 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Profile
+
+ProfileInfo = namedtuple('ProfileInfo', ['id', 'ready', 'name', 'location'])
+
+# Profili yo'q foydalanuvchi ham keshlanadi, aks holda har so'rovda bazaga boriladi
+_MISSING = ()
+
+
+def _key(user_id):
+    return f"profile-info:{user_id}"
+
+
+def profile_info(user_id):
+    """Foydalanuvchi profilining (id, ready, name, location) qiymatlari yoki None.
+
+    Middleware har so'rovda tekshiradi, shuning uchun keshda turadi; Profile
+    saqlanganda yoki o'chirilganda signal keshni tozalaydi. Kesh barcha
+    workerlar uchun umumiy (settings.CACHES): tozalash hammasiga ta'sir qiladi.
+    """
+    key = _key(user_id)
+    info = cache.get(key)
+    if info is None:
+        row = Profile.objects.filter(user_id=user_id).values_list('id', 'ready', 'name', 'location').first()
+        info = row or _MISSING
+        cache.set(key, info, getattr(settings, 'PROFILE_CACHE_TIMEOUT', 300))
+    return ProfileInfo(*info) if info else None
+
+
+async def aprofile_info(user_id):
+    """profile_info ning async varianti (ASGI viewlar va middleware uchun)"""
+    key = _key(user_id)
+    info = await cache.aget(key)
+    if info is None:
+        row = await Profile.objects.filter(user_id=user_id).values_list('id', 'ready', 'name', 'location').afirst()
+        info = row or _MISSING
+        await cache.aset(key, info, getattr(settings, 'PROFILE_CACHE_TIMEOUT', 300))
+    return ProfileInfo(*info) if info else None
+
+
+def invalidate_profile(user_id):
+    """Darhol va commitdan keyin yana tozalaydi: tranzaksiya davomida boshqa
+    so'rov o'qigan eski qiymat keshda qolib ketmaydi."""
+    key = _key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
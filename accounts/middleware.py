@@ -1,20 +1,42 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.shortcuts import redirect
-from django.contrib.auth import logout
+from django.contrib.auth import alogout, logout
+from django.utils.decorators import sync_and_async_middleware
 
+from .cache import aprofile_info, profile_info
 
+
+@sync_and_async_middleware
 class ReadyCheckMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        # ASGI ostida async zanjirda qoladi: async viewlar oqimga o'tmaydi
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
         user = request.user
         if user.is_authenticated:
-            try:
-                if not user.profile.ready:
-                    logout(request)
-                    return redirect('login')
-            except AttributeError:
-                pass  # Profil yo‘q bo‘lsa, hech narsa qilmaymiz
+            # Profil keshdan olinadi: har so'rovda qo'shimcha so'rov yo'q
+            info = profile_info(user.id)
+            if info is not None and not info.ready:  # Profil yo‘q bo‘lsa, hech narsa qilmaymiz
+                logout(request)
+                return redirect('login')
 
         response = self.get_response(request)
         return response
+
+    async def __acall__(self, request):
+        user = await request.auser()
+        # request.user alohida keshlanadi: oqimdagi sinxron view foydalanuvchini qayta o'qimasin
+        request.user = user
+        if user.is_authenticated:
+            info = await aprofile_info(user.id)
+            if info is not None and not info.ready:
+                await alogout(request)
+                return redirect('login')
+
+        return await self.get_response(request)
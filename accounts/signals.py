@@ -1,12 +1,54 @@
 # accounts/signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from .cache import invalidate_profile
 from .models import Profile
 
+PROFILE_FIELDS = ('phone', 'payment', 'added_time', 'description', 'ready', 'name', 'location')
+
+
+def _values(instance):
+    # __dict__ orqali: .only() bilan kechiktirilgan maydonlar bazadan yuklanmaydi
+    return {field: instance.__dict__.get(field) for field in PROFILE_FIELDS}
+
+
+def changed_fields(profile):
+    """Yuklangandan (yoki oxirgi saqlashdan) beri o'zgargan profil maydonlari"""
+    saved = getattr(profile, '_saved_values', {})
+    return [field for field, value in _values(profile).items() if saved.get(field) != value]
+
+
+@receiver(post_init, sender=Profile)
+def remember_profile(sender, instance, **kwargs):
+    instance._saved_values = _values(instance)
+
+
 @receiver(post_save, sender=User)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
-    else:
-        instance.profile.save()
+        return
+    # Profil faqat shu User orqali yuklangan va o'zgartirilgan bo'lsa saqlanadi:
+    # login (last_login) yoki admin tahriri profilga so'rov ham, UPDATE ham yubormaydi
+    if not User.profile.is_cached(instance):
+        return
+    try:
+        profile = instance.profile
+    except Profile.DoesNotExist:
+        return
+    changed = changed_fields(profile)
+    if changed:
+        profile.save(update_fields=changed)
+
+
+@receiver(post_save, sender=Profile)
+def profile_saved(sender, instance, **kwargs):
+    instance._saved_values = _values(instance)
+    # ready o'chirilsa, middleware keyingi so'rovdayoq chiqarib yuboradi
+    invalidate_profile(instance.user_id)
+
+
+@receiver(post_delete, sender=Profile)
+def profile_deleted(sender, instance, **kwargs):
+    invalidate_profile(instance.user_id)
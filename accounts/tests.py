@@ -1,3 +1,125 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .cache import profile_info
+
+
+class ProfileCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.client.force_login(self.user)
+
+    def profile_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        return response, [q['sql'] for q in ctx.captured_queries if 'accounts_profile' in q['sql']]
+
+    def test_middleware_reads_profile_from_cache(self):
+        self.profile_queries(reverse('receipt_list'))
+        response, queries = self.profile_queries(reverse('receipt_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_deactivated_shop_is_logged_out_on_next_request(self):
+        self.profile_queries(reverse('receipt_list'))
+        profile = self.user.profile
+        profile.ready = False
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+
+        response = self.client.get(reverse('receipt_list'))
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_deactivation_on_another_worker_is_seen_here(self):
+        self.assertNotIn('LocMemCache', settings.CACHES['default']['BACKEND'])
+        self.profile_queries(reverse('receipt_list'))
+        profile = self.user.profile
+        profile.ready = False
+        # Profil boshqa workerda saqlandi: u o'z kesh nusxasini tozalaydi
+        with mock.patch('accounts.cache.cache', caches.create_connection('default')):
+            with self.captureOnCommitCallbacks(execute=True):
+                profile.save()
+
+        response = self.client.get(reverse('receipt_list'))
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+
+    def test_name_and_location_follow_profile_changes(self):
+        self.assertIsNone(profile_info(self.user.id).name)
+        profile = self.user.profile
+        profile.name = 'Baraka'
+        profile.location = 'Chilonzor'
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        info = profile_info(self.user.id)
+        self.assertEqual((info.id, info.ready, info.name, info.location), (profile.id, True, 'Baraka', 'Chilonzor'))
+
+    def test_user_without_profile_is_cached_too(self):
+        self.user.profile.delete()
+        self.assertIsNone(profile_info(self.user.id))
+        with self.assertNumQueries(0):
+            self.assertIsNone(profile_info(self.user.id))
+
+
+class UserProfileSignalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('kassir', password='parol')
+
+    def profile_writes(self, ctx):
+        return [
+            q['sql'] for q in ctx.captured_queries
+            if 'accounts_profile' in q['sql'] and not q['sql'].startswith('SELECT')
+        ]
+
+    def test_login_does_not_touch_profile(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('login'), {'username': 'kassir', 'password': 'parol'})
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.assertEqual(self.profile_writes(ctx), [])
+        profile_reads = [q['sql'] for q in ctx.captured_queries if 'accounts_profile' in q['sql']]
+        # Faqat ready tekshiruvi uchun bitta o'qish
+        self.assertEqual(len(profile_reads), 1)
+
+    def test_plain_user_save_runs_no_profile_queries(self):
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            user.save()
+        self.assertEqual(user.profile.phone, 'Not set')
+        with self.assertNumQueries(1):
+            user.save()  # profil yuklangan, lekin o'zgarmagan - faqat auth_user UPDATE
+
+    def test_admin_user_edit_writes_profile_only_when_changed(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'parol')
+        self.client.force_login(admin)
+        url = reverse('admin:auth_user_change', args=[self.user.pk])
+        data = {
+            'username': 'kassir', 'first_name': 'Ali', 'last_name': '', 'email': '',
+            'is_active': 'on', 'date_joined_0': '2025-01-01', 'date_joined_1': '10:00:00',
+            'last_login_0': '', 'last_login_1': '',
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.profile_writes(ctx), [])
+        self.assertEqual(User.objects.get(pk=self.user.pk).first_name, 'Ali')
 
-# Create your tests here.
+    def test_profile_changed_through_user_is_saved(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.profile.phone = '+998901234567'
+        with CaptureQueriesContext(connection) as ctx:
+            user.save()
+        writes = self.profile_writes(ctx)
+        self.assertEqual(len(writes), 1)
+        self.assertIn('"phone"', writes[0])
+        self.assertNotIn('"description"', writes[0])
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.phone, '+998901234567')
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'stats.middleware.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -86,6 +88,56 @@ DATABASES = {
     }
 }
 
+# DB_PROFILE=production: bir nechta kassa bir vaqtda chek yozganda
+# "database is locked" bo'lmasligi uchun SQLite sozlamalari
+DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        # Ulanish har so'rovda qayta ochilmaydi; uzilgan ulanish tekshirib almashtiriladi
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # WAL: o'qiydiganlar yozuvchini kutmaydi; NORMAL WAL rejimida xavfsiz va tezroq
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            # Qulf band bo'lsa darhol xato emas, busy_timeout (soniya) kutiladi
+            'timeout': int(os.environ.get('DB_BUSY_TIMEOUT', 20)),
+            # Tranzaksiya boshidayoq yozish qulfi olinadi: o'qishdan yozishga
+            # o'tishdagi kutib bo'lmaydigan SQLITE_BUSY bo'lmaydi (checkout va boshqalar).
+            # Bu ulanishdagi HAR BIR atomic() ga tegishli, faqat yozadiganlariga emas:
+            # atomic() ichidagi o'qish ham yozuvchilar bilan navbatga turadi. Shuning
+            # uchun atomic() faqat yozish yo'llarida (checkout, qaytarish, import,
+            # qoldiq, rollup, snapshot) ishlatiladi; ro'yxat va hisobotlar uni
+            # ishlatmaydi - autocommit o'qishlar WAL'da qulf kutmaydi.
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # WAL va parallel yozuvchilar xotiradagi bazada ishlamaydi
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    })
+
+# Kesh barcha workerlar uchun umumiy bo'lishi kerak: unda versiyalar (dashboard,
+# qidiruv indeksi), profil holati va kam qoldiq soni turadi. Standart LocMemCache
+# har jarayonda alohida - bitta workerdagi invalidatsiyani boshqalari ko'rmaydi.
+# REDIS_URL berilsa Redis, aks holda shu serverdagi workerlar uchun fayl kesh.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / 'cache'),
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
+
+# Testlar vaqtinchalik kesh papkasi bilan ishlaydi (conf.test_runner)
+TEST_RUNNER = 'conf.test_runner.TestRunner'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -138,6 +190,24 @@ USE_L10N = False   # settings.py da
 DATETIME_FORMAT = "Y-m-d H:i"
 TIME_FORMAT = "H:i"
 
-import os
-
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+
+# So'rovlar metrikasi (/stats/metrics/): halqa bufer hajmi va view'lar uchun
+# so'rovlar byudjeti - oshsa 'stats.metrics' loggeriga ogohlantirish yoziladi
+QUERY_METRICS_SIZE = 2000
+QUERY_BUDGETS = {
+    'product_search_api': 5,
+    'scan_to_cart': 8,
+    'add_to_cart': 10,
+    'remove_from_cart': 10,
+    'async_product_search_api': 5,
+    'async_scan_to_cart': 8,
+    'async_add_to_cart': 10,
+    'async_remove_from_cart': 10,
+    'close_cart': 20,
+    'receipt_list': 6,
+    'dashboard': 5,
+    'returned_list': 5,
+    'return_api': 18,
+    'low-stock-api': 4,
+}
@@ -1,6 +1,8 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from products.stock import low_stock_count
 
 @login_required
 def home(request):
-    return render(request, 'home/home.html')
+    # Belgi keshdan: bosh sahifa har ochilganda katalog sanalmaydi
+    return render(request, 'home/home.html', {'low_stock_count': low_stock_count(request.user.pk)})
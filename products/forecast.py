@@ -0,0 +1,100 @@
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from stats.models import DailySales
+from .models import Product, ProductForecast
+
+try:
+    import numpy as np
+except ImportError:
+    # requirements.txt da bor, lekin faqat forecast_sales jobi uchun kerak:
+    # viewlar tayyor jadvalni o'qiydi, buyruq esa aniq xato bilan to'xtaydi
+    np = None
+
+WINDOW_DAYS = 28
+RECENT_DAYS = 7
+MAX_COVER = 99999999  # days_of_cover ustuniga sig'adigan chegara
+
+
+def load_sales(profile, first_day, last_day):
+    """Chek qatorlari tarixi ustunlar ko'rinishida: (product_id, kun raqami, miqdor).
+
+    ReceiptItem o'rniga uning kunlik rollupi (DailySales) o'qiladi: u chek
+    yozilganda yangilanadi, qaytarishlar (minus qatorlar) ayirilgan bo'ladi va
+    million qatorni har safar qayta guruhlash shart emas. Kun raqami first_day dan.
+    """
+    rows = list(
+        DailySales.objects
+        .filter(user_id=profile.user_id, day__gte=first_day, day__lte=last_day, product__isnull=False)
+        .values_list('product_id', 'day', 'quantity')
+    )
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    product_ids, days, quantities = zip(*rows)
+    day_numbers = (np.array(days, dtype='datetime64[D]') - np.datetime64(first_day, 'D')).astype(np.int64)
+    return np.array(product_ids, dtype=np.int64), day_numbers, np.array(quantities, dtype=np.float64)
+
+
+def forecast_arrays(product_ids, stocks, sold_ids, sold_days, sold_quantities, window, recent=RECENT_DAYS):
+    """Hamma mahsulot uchun bitta vektor hisob.
+
+    product_ids tartiblangan bo'lishi kerak. Kunlik matritsa (mahsulot x kun)
+    to'ldiriladi, kumulyativ yig'indidan oxirgi window va recent kunlik
+    o'rtacha (sirpanuvchi tezlik) olinadi. days_of_cover = qoldiq / tezlik,
+    tezlik 0 bo'lsa NaN. Natija: (velocity, recent_velocity, days_of_cover).
+    """
+    daily = np.zeros((len(product_ids), window))
+    if len(sold_ids):
+        rows = np.minimum(np.searchsorted(product_ids, sold_ids), len(product_ids) - 1)
+        # Katalogda yo'q (boshqa do'kon yoki o'chirilgan) mahsulotlar tashlanadi
+        known = product_ids[rows] == sold_ids
+        np.add.at(daily, (rows[known], sold_days[known]), sold_quantities[known])
+    cumulative = np.concatenate([np.zeros((len(product_ids), 1)), np.cumsum(daily, axis=1)], axis=1)
+    recent = min(recent, window)
+    velocity = np.clip(cumulative[:, -1] / window, 0, None)
+    recent_velocity = np.clip((cumulative[:, -1] - cumulative[:, -1 - recent]) / recent, 0, None)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cover = np.where(velocity > 0, np.clip(stocks / velocity, 0, MAX_COVER), np.nan)
+    return velocity, recent_velocity, cover
+
+
+def build_forecasts(profile, window=WINDOW_DAYS, today=None, batch_size=2000):
+    """Do'kon mahsulotlari prognozini qayta hisoblab ProductForecast ga yozadi.
+
+    Oxirgi window kun (bugun bilan) hisobga olinadi. Natija: yozilgan qatorlar soni.
+    """
+    today = today or timezone.localdate()
+    first_day = today - timedelta(days=window - 1)
+
+    catalog = list(Product.objects.filter(profile=profile).order_by('id').values_list('id', 'stock'))
+    if not catalog:
+        return 0
+    ids, stocks = zip(*catalog)
+    product_ids = np.array(ids, dtype=np.int64)
+    velocity, recent_velocity, cover = forecast_arrays(
+        product_ids, np.array(stocks, dtype=np.float64), *load_sales(profile, first_day, today), window=window,
+    )
+
+    now = timezone.now()
+    velocity = np.round(velocity, 3).tolist()
+    recent_velocity = np.round(recent_velocity, 3).tolist()
+    cover = np.round(cover, 1).tolist()
+    forecasts = [
+        ProductForecast(
+            product_id=pid,
+            velocity=Decimal(str(velocity[i])),
+            recent_velocity=Decimal(str(recent_velocity[i])),
+            days_of_cover=None if math.isnan(cover[i]) else Decimal(str(cover[i])),
+            window_days=window,
+            computed_at=now,
+        )
+        for i, pid in enumerate(ids)
+    ]
+    with transaction.atomic():
+        ProductForecast.objects.filter(product__profile=profile).delete()
+        ProductForecast.objects.bulk_create(forecasts, batch_size=batch_size)
+    return len(forecasts)
@@ -0,0 +1,181 @@
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from stats.cache import bump_sales_version
+from .models import Product, StockMovement
+from .search import invalidate
+from .stock import invalidate_low_stock, movement_rows
+
+PRICE_FIELDS = ['name', 'price', 'selling_price']
+
+
+def _decimal(value, field, required=True):
+    value = (value or '').strip().replace(' ', '').replace(',', '.')
+    if not value:
+        if required:
+            raise ValueError(f"{field} bo‘sh")
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"{field} noto‘g‘ri: {value}")
+    if not number.is_finite() or number < 0:
+        raise ValueError(f"{field} noto‘g‘ri: {value}")
+    # Ustunga sig'maydigan son bulk yozuvda butun partiyani yiqitmasin
+    try:
+        Product._meta.get_field(field).run_validators(number)
+    except ValidationError:
+        raise ValueError(f"{field} juda katta yoki kasr qismi uzun: {value}")
+    return number
+
+
+class ProductImporter:
+    """CSV dan mahsulotlarni (profile, qrcode) bo'yicha upsert qiladi.
+
+    Fayl oqim bilan o'qiladi, qatorlar partiyalab bulk_create/bulk_update bilan
+    yoziladi. Takrorlar bazaga so'rovsiz, oldindan yuklangan to'plamlar bilan
+    tekshiriladi. Qrcode bo'lmagan qator nom bo'yicha yangilanadi.
+    """
+
+    def __init__(self, profile, batch_size=1000):
+        self.profile = profile
+        self.batch_size = batch_size
+        self.created = 0
+        self.updated = 0
+        self.errors = []  # [(qator raqami, xabar)]
+
+        self.by_qrcode = {}
+        self.by_name = {}
+        self.names = {}
+        rows = Product.objects.filter(profile=profile).values_list('id', 'name', 'qrcode')
+        for pid, name, qrcode in rows:
+            if qrcode:
+                self.by_qrcode[qrcode] = pid
+            self.by_name[name.lower()] = pid
+            self.names[pid] = name.lower()
+
+        self._creates = []
+        self._updates = []
+        self._seen_qrcodes = set()
+        self._seen_names = set()
+
+    def run(self, lines, delimiter=','):
+        reader = csv.DictReader(lines, delimiter=delimiter)
+        try:
+            header = {(h or '').strip().lower() for h in (reader.fieldnames or [])}
+            missing = [c for c in ('name', 'price', 'selling_price') if c not in header]
+            if missing:
+                self.errors.append((1, f"Ustunlar yetishmaydi: {', '.join(missing)}"))
+                return self.report()
+
+            for row_number, row in enumerate(reader, start=2):
+                row = {(k or '').strip().lower(): (v or '').strip() for k, v in row.items() if isinstance(v, str)}
+                try:
+                    self._add(row)
+                except ValueError as e:
+                    self.errors.append((row_number, str(e)))
+                if len(self._creates) + len(self._updates) >= self.batch_size:
+                    self._flush()
+        except UnicodeDecodeError:
+            # Fayl o'qilgan joyigacha import qilinadi, qolgani xato sifatida
+            self.errors.append((reader.line_num + 1, "Fayl UTF-8 emas: Excel'da \"CSV UTF-8\" sifatida saqlang"))
+        except csv.Error as e:
+            self.errors.append((reader.line_num, f"CSV fayl buzilgan: {e}"))
+        self._flush()
+        # bulk_* signal bermaydi: qidiruv indeksi va statistika keshini o'zimiz eskirtiramiz
+        if self.created or self.updated:
+            invalidate(self.profile.id)
+        if self.updated:
+            bump_sales_version(self.profile.user_id)
+        if self.created or self.updated:
+            invalidate_low_stock(self.profile.user_id)
+        return self.report()
+
+    def _add(self, row):
+        name = row.get('name', '')
+        if not name:
+            raise ValueError("name bo‘sh")
+        if len(name) > 150:
+            raise ValueError("name juda uzun (150 belgidan ko‘p)")
+        qrcode = row.get('qrcode') or None
+        if qrcode and len(qrcode) > 100:
+            raise ValueError("qrcode juda uzun (100 belgidan ko‘p)")
+        price = _decimal(row.get('price'), 'price')
+        selling_price = _decimal(row.get('selling_price'), 'selling_price')
+        stock = _decimal(row.get('stock'), 'stock', required=False)
+
+        lower = name.lower()
+        if lower in self._seen_names:
+            raise ValueError(f"Faylda takroriy nom: {name}")
+        if qrcode and qrcode in self._seen_qrcodes:
+            raise ValueError(f"Faylda takroriy QR kod: {qrcode}")
+
+        pid = self.by_qrcode.get(qrcode) if qrcode else self.by_name.get(lower)
+        owner = self.by_name.get(lower)
+        if owner is not None and owner != pid:
+            raise ValueError(f"Bu nomdagi mahsulot allaqachon mavjud: {name}")
+
+        self._seen_names.add(lower)
+        if qrcode:
+            self._seen_qrcodes.add(qrcode)
+
+        if pid is None:
+            stock = stock or Decimal('0')
+            self._creates.append(Product(
+                profile=self.profile, name=name, price=price, selling_price=selling_price,
+                stock=stock, qrcode=qrcode, is_low=Product.stock_is_low(stock, 0),
+            ))
+        else:
+            self._updates.append(Product(
+                id=pid, profile=self.profile, name=name, price=price, selling_price=selling_price,
+                stock=stock, qrcode=qrcode,
+            ))
+            # Nomi o'zgargan bo'lsa, eski nom endi bo'sh
+            old = self.names.get(pid)
+            if old != lower:
+                self.by_name.pop(old, None)
+                self.by_name[lower] = pid
+                self.names[pid] = lower
+
+    def _flush(self):
+        if not (self._creates or self._updates):
+            return
+        with transaction.atomic():
+            if self._creates:
+                Product.objects.bulk_create(self._creates)
+                for product in self._creates:
+                    self.by_name[product.name.lower()] = product.id
+                    self.names[product.id] = product.name.lower()
+                    if product.qrcode:
+                        self.by_qrcode[product.qrcode] = product.id
+            if self._updates:
+                # Avval narxlar: tranzaksiya yozish qulfini (PostgreSQL'da qatorlar
+                # qulfini) oladi, shuning uchun pastda o'qilgan qoldiqni parallel
+                # sotuv yozuvgacha o'zgartira olmaydi
+                Product.objects.bulk_update(self._updates, PRICE_FIELDS)
+
+            deltas = {p.id: p.stock for p in self._creates}
+            with_stock = [p for p in self._updates if p.stock is not None]
+            if with_stock:
+                current = {
+                    pid: (stock, threshold)
+                    for pid, stock, threshold in Product.objects
+                    .filter(pk__in=[p.id for p in with_stock])
+                    .values_list('id', 'stock', 'low_stock_threshold')
+                }
+                for product in with_stock:
+                    stock, threshold = current[product.id]
+                    product.is_low = Product.stock_is_low(product.stock, threshold)
+                    deltas[product.id] = product.stock - stock
+                Product.objects.bulk_update(with_stock, ['stock', 'is_low'])
+            StockMovement.objects.bulk_create(movement_rows(deltas, StockMovement.IMPORT))
+        self.created += len(self._creates)
+        self.updated += len(self._updates)
+        self._creates = []
+        self._updates = []
+
+    def report(self):
+        return {'created': self.created, 'updated': self.updated, 'errors': self.errors}
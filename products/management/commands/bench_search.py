@@ -0,0 +1,75 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from products.models import Product
+from products.search import get_index
+from sale.bench import benchmark_database, measure
+from sale.datagen import BRANDS, SIZES, WORDS
+
+
+class Command(BaseCommand):
+    help = "Xotiradagi qidiruv indeksini product_search_api dagi ORM so'rovi bilan solishtiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--keepdb', action='store_true')
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        count = options['products']
+        with benchmark_database(keepdb=options['keepdb']):
+            user = User.objects.create_user('bench_search', password='bench')
+            profile = user.profile
+            batch = []
+            for i in range(count):
+                batch.append(Product(
+                    profile=profile,
+                    name=f"{rnd.choice(BRANDS)} {rnd.choice(WORDS)} {rnd.choice(WORDS)} {rnd.choice(SIZES)} #{i}",
+                    price=Decimal('1000'),
+                    selling_price=Decimal('1200'),
+                    stock=Decimal('50'),
+                    qrcode=f"478{i:010d}",
+                ))
+                if len(batch) == 5000:
+                    Product.objects.bulk_create(batch)
+                    batch = []
+            Product.objects.bulk_create(batch)
+
+            start = time.perf_counter()
+            index = get_index(profile.id)
+            build_ms = (time.perf_counter() - start) * 1000
+            self.stdout.write(f"Indeks: {len(index)} mahsulot, qurish {build_ms:.0f} ms")
+
+            queries = {
+                'qrcode': [f"478{rnd.randrange(count):010d}" for _ in range(options['repeat'])],
+                'prefix': [rnd.choice(BRANDS)[:3] for _ in range(options['repeat'])],
+                'word': [rnd.choice(WORDS) for _ in range(options['repeat'])],
+                'substring': [rnd.choice(WORDS)[1:4] for _ in range(options['repeat'])],
+                'miss': ['yoqmahsulot'] * options['repeat'],
+            }
+
+            self.stdout.write(f"{'so‘rov':<10} {'ORM p50':>9} {'ORM p95':>9} {'indeks p50':>11} {'indeks p95':>11}")
+            for kind, terms in queries.items():
+                orm_terms = iter(terms)
+                index_terms = iter(terms)
+
+                def orm():
+                    q = next(orm_terms)
+                    list(Product.objects.filter(profile=profile).filter(Q(name__icontains=q) | Q(qrcode=q))[:10])
+
+                def indexed():
+                    get_index(profile.id).search(next(index_terms), limit=10)
+
+                orm_result = measure(orm, len(terms))
+                index_result = measure(indexed, len(terms))
+                self.stdout.write(
+                    f"{kind:<10} {orm_result['p50_ms']:>9} {orm_result['p95_ms']:>9} "
+                    f"{index_result['p50_ms']:>11} {index_result['p95_ms']:>11}"
+                )
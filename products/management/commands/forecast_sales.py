@@ -0,0 +1,40 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Profile
+from products import forecast
+
+
+class Command(BaseCommand):
+    help = (
+        "Sotuv tezligi va qoldiq necha kunga yetishi (har kuni cron bilan). Har do'kon "
+        "uchun chek qatorlari tarixi ustunlar ko'rinishida yuklanadi va barcha mahsulotlar "
+        "bitta vektor hisob bilan (numpy) ProductForecast jadvaliga yoziladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, default=forecast.WINDOW_DAYS, help="Necha kunlik tarix")
+        parser.add_argument('--user', help="Faqat shu foydalanuvchi (username) uchun")
+
+    def handle(self, *args, **options):
+        if forecast.np is None:
+            raise CommandError("forecast_sales uchun numpy kerak, u o‘rnatilmagan: pip install -r requirements.txt")
+        if options['window'] < 1:
+            raise CommandError("--window: musbat son")
+
+        profiles = Profile.objects.order_by('id')
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"Foydalanuvchi topilmadi: {options['user']}")
+            profiles = profiles.filter(user=user)
+
+        started = time.perf_counter()
+        total = 0
+        for profile in profiles:
+            total += forecast.build_forecasts(profile, window=options['window'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Prognoz: {total} ta mahsulot ({time.perf_counter() - started:.1f} s)"
+        ))
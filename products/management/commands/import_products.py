@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import ProductImporter
+
+
+class Command(BaseCommand):
+    help = "CSV fayldan mahsulotlarni import qiladi (ustunlar: name, price, selling_price, stock, qrcode)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument('--delimiter', default=',')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).select_related('profile').first()
+        if user is None or not hasattr(user, 'profile'):
+            raise CommandError(f"Foydalanuvchi yoki profil topilmadi: {options['username']}")
+
+        importer = ProductImporter(user.profile, batch_size=options['batch_size'])
+        with open(options['path'], encoding='utf-8-sig', newline='') as f:
+            report = importer.run(f, delimiter=options['delimiter'])
+
+        for row_number, message in report['errors']:
+            self.stderr.write(f"{row_number}-qator: {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Yaratildi: {report['created']}, yangilandi: {report['updated']}, xato: {len(report['errors'])}"
+        ))
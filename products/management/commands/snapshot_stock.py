@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.stock import take_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Qoldiq snapshotlari (har kuni cron bilan): oxirgi snapshotdan keyin harakati "
+        "bo'lgan mahsulotlar qoldig'i yoziladi. Sanadagi qoldiq va tarix so'rovlari "
+        "shu snapshotdan keyingi harakatlarnigina ko'rib chiqadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = take_snapshots(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot: {created} ta mahsulot ({time.perf_counter() - started:.1f} s)"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_profile_location_profile_name'),
+        ('products', '0008_alter_product_qrcode_alter_product_unique_together'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['profile', 'name'], name='product_profile_name_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_profile_name_idx'),
+        ('sale', '0010_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('reason', models.CharField(choices=[('sale', 'Sotuv'), ('return', 'Qaytarish'), ('restock', 'Kirim'), ('adjust', 'Tuzatish'), ('import', 'Import'), ('initial', 'Boshlang‘ich qoldiq')], max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='products.product')),
+                ('receipt', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='sale.receipt')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'created_at'], name='stockmove_product_created_idx'), models.Index(fields=['created_at'], name='stockmove_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('taken_at', models.DateTimeField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='products.product')),
+            ],
+            options={
+                'unique_together': {('product', 'taken_at')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:24
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_low(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Product.objects.filter(stock__lte=F('low_stock_threshold')).update(is_low=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_profile_location_profile_name'),
+        ('products', '0010_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='is_low',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='low_stock_threshold',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Minimal qoldiq'),
+        ),
+        migrations.RunPython(mark_low, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_low', True)), fields=['profile', 'name'], name='product_low_stock_idx'),
+        ),
+    ]
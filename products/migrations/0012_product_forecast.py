@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_low_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('velocity', models.DecimalField(decimal_places=3, default=0, max_digits=15, verbose_name='Kunlik sotuv')),
+                ('recent_velocity', models.DecimalField(decimal_places=3, default=0, max_digits=15, verbose_name='Kunlik sotuv (oxirgi hafta)')),
+                ('days_of_cover', models.DecimalField(blank=True, decimal_places=1, max_digits=10, null=True, verbose_name='Necha kunga yetadi')),
+                ('window_days', models.PositiveSmallIntegerField()),
+                ('computed_at', models.DateTimeField()),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='products.product')),
+            ],
+        ),
+    ]
@@ -1,4 +1,7 @@
+from decimal import Decimal
+
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
 class Product(models.Model):
@@ -8,9 +11,94 @@ class Product(models.Model):
     selling_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Sotuv narxi')
     stock = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='Miqdori')
     qrcode = models.CharField(max_length=100, unique=False, blank=True, null=True, verbose_name='QR Kod')  # Yangi maydon
+    low_stock_threshold = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Minimal qoldiq')
+    # stock <= low_stock_threshold; har qoldiq yozuvida yangilanadi (products.stock.stock_change)
+    is_low = models.BooleanField(default=False, editable=False)
 
     class Meta:
         unique_together = (('profile', 'qrcode'),)
+        indexes = [
+            # Mahsulotlar ro'yxati: profile bo'yicha filter, nom bo'yicha tartib
+            models.Index(fields=['profile', 'name'], name='product_profile_name_idx'),
+            # Kam qolganlar: indeksda faqat is_low qatorlar, katalog skan qilinmaydi
+            models.Index(fields=['profile', 'name'], condition=models.Q(is_low=True), name='product_low_stock_idx'),
+        ]
+
+    def __str__(self):
+        return self.name[:50]
+
+    @staticmethod
+    def stock_is_low(stock, threshold):
+        return Decimal(str(stock)) <= Decimal(str(threshold))
+
+    def save(self, *args, **kwargs):
+        if not hasattr(self.stock, 'resolve_expression'):
+            self.is_low = self.stock_is_low(self.stock, self.low_stock_threshold)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and {'stock', 'low_stock_threshold'} & set(update_fields):
+                kwargs['update_fields'] = set(update_fields) | {'is_low'}
+        super().save(*args, **kwargs)
+
+class StockMovement(models.Model):
+    """Qoldiq o'zgarishlari jurnali (faqat qo'shiladi). Product.stock = oxirgi
+    snapshot + undan keyingi harakatlar yig'indisi."""
+    SALE = 'sale'
+    RETURN = 'return'
+    RESTOCK = 'restock'
+    ADJUST = 'adjust'
+    IMPORT = 'import'
+    INITIAL = 'initial'
+    REASONS = [
+        (SALE, 'Sotuv'),
+        (RETURN, 'Qaytarish'),
+        (RESTOCK, 'Kirim'),
+        (ADJUST, 'Tuzatish'),
+        (IMPORT, 'Import'),
+        (INITIAL, 'Boshlang‘ich qoldiq'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='movements')
+    delta = models.DecimalField(max_digits=15, decimal_places=2)
+    reason = models.CharField(max_length=10, choices=REASONS)
+    # Sotuv va qaytarishda: qaysi chek sababli
+    receipt = models.ForeignKey('sale.Receipt', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Mahsulot tarixi va snapshotdan keyingi harakatlar
+            models.Index(fields=['product', 'created_at'], name='stockmove_product_created_idx'),
+            # Snapshot: oxirgi snapshotdan keyin o'zgargan mahsulotlar
+            models.Index(fields=['created_at'], name='stockmove_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.delta:+} ({self.reason})"
+
+
+class StockSnapshot(models.Model):
+    """Ma'lum vaqtdagi qoldiq (snapshot_stock buyrug'i yozadi). Faqat oxirgi
+    snapshotdan keyin harakati bo'lgan mahsulotlar uchun yoziladi."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='snapshots')
+    stock = models.DecimalField(max_digits=15, decimal_places=2)
+    taken_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = (('product', 'taken_at'),)
+
+    def __str__(self):
+        return f"{self.product_id}: {self.stock} ({self.taken_at:%Y-%m-%d %H:%M})"
+
+
+class ProductForecast(models.Model):
+    """Sotuv tezligi va qoldiq necha kunga yetishi (forecast_sales buyrug'i yozadi)."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='forecast')
+    velocity = models.DecimalField('Kunlik sotuv', max_digits=15, decimal_places=3, default=0)
+    recent_velocity = models.DecimalField('Kunlik sotuv (oxirgi hafta)', max_digits=15, decimal_places=3, default=0)
+    # Sotuv bo'lmasa None: qoldiq cheksiz yetadi
+    days_of_cover = models.DecimalField('Necha kunga yetadi', max_digits=10, decimal_places=1, null=True, blank=True)
+    window_days = models.PositiveSmallIntegerField()
+    computed_at = models.DateTimeField()
 
     def __str__(self):
-        return self.name[:50]
\ No newline at end of file
+        return f"{self.product_id}: {self.velocity}/kun, {self.days_of_cover} kun"
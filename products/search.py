@@ -0,0 +1,173 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Product
+
+
+def _grams(text, size):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class ProductSearchIndex:
+    """Bitta do'kon katalogi uchun xotiradagi qidiruv indeksi.
+
+    - qrcode -> mahsulot (aniq moslik, hash map)
+    - nom va so'z prefikslari (saralangan ro'yxat + bisect)
+    - 2 va 3 harfli gramlar -> nom tartibidagi o'rinlar ro'yxati (nom ichidagi qism-satr)
+
+    Stock indeksda saqlanmaydi: u F() bilan yangilanadi va signal bermaydi.
+    """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.entries = {}
+        self.by_qrcode = {}
+        for pid, name, qrcode, selling_price in rows:
+            self.entries[pid] = (pid, name, qrcode, selling_price)
+            if qrcode:
+                self.by_qrcode[qrcode] = self.entries[pid]
+
+        # rank - nom bo'yicha tartibdagi o'rin; gram ro'yxatlari shu tartibda
+        self.names = sorted((entry[1].lower(), pid) for pid, entry in self.entries.items())
+        words = []
+        grams = defaultdict(list)
+        for rank, (lower, pid) in enumerate(self.names):
+            words.extend((word, pid) for word in set(lower.split()[1:]))
+            for gram in _grams(lower, 2) | _grams(lower, 3):
+                grams[gram].append(rank)
+        words.sort()
+        self.words = words
+        self.grams = dict(grams)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup_qrcode(self, code):
+        """(id, name, qrcode, selling_price) yoki None"""
+        return self.by_qrcode.get(code)
+
+    def _prefix(self, sorted_pairs, prefix, seen, result, limit):
+        i = bisect_left(sorted_pairs, (prefix,))
+        while i < len(sorted_pairs) and len(result) < limit:
+            key, pid = sorted_pairs[i]
+            if not key.startswith(prefix):
+                break
+            if pid not in seen:
+                seen.add(pid)
+                result.append(pid)
+            i += 1
+
+    def _substring(self, needle, seen, result, limit):
+        if len(needle) >= 2:
+            size = min(len(needle), 3)
+            postings = [self.grams.get(g, ()) for g in _grams(needle, size)]
+            ranks = min(postings, key=len)
+        else:
+            ranks = range(len(self.names))
+        # Ro'yxat nom tartibida, shuning uchun birinchi topilganlar eng yuqori o'rinda
+        for rank in ranks:
+            lower, pid = self.names[rank]
+            if pid not in seen and needle in lower:
+                seen.add(pid)
+                result.append(pid)
+                if len(result) >= limit:
+                    break
+
+    def search(self, q, limit=10):
+        """Saralangan id'lar: qrcode, nom prefiksi, so'z prefiksi, keyin nom ichida."""
+        q = q.strip()
+        if not q:
+            return []
+        needle = q.lower()
+        result = []
+        seen = set()
+
+        entry = self.by_qrcode.get(q)
+        if entry:
+            result.append(entry[0])
+            seen.add(entry[0])
+
+        self._prefix(self.names, needle, seen, result, limit)
+        self._prefix(self.words, needle, seen, result, limit)
+        if len(result) < limit:
+            self._substring(needle, seen, result, limit)
+        return result[:limit]
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def _version_key(profile_id):
+    return f"product-search-version:{profile_id}"
+
+
+def catalog_version(profile_id):
+    """Katalog versiyasi umumiy keshda (settings.CACHES) turadi, shuning uchun
+    boshqa workerlar ham o'z indeksi eskirganini biladi."""
+    key = _version_key(profile_id)
+    version = cache.get(key)
+    if version is None:
+        # Kesh tozalanib ketsa ham eski versiya bilan to'qnashmasligi uchun vaqt
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(profile_id):
+    # incr o'rniga yangi vaqt: fayl keshida incr atomar emas
+    cache.set(_version_key(profile_id), time.time_ns(), None)
+    with _lock:
+        _indexes.pop(profile_id, None)
+
+
+def invalidate(profile_id):
+    """Darhol va commitdan keyin yana versiyani yangilaydi: tranzaksiya davomida
+    boshqa worker hali commit bo'lmagan katalogdan qurgan indeks qolib ketmaydi."""
+    _bump(profile_id)
+    transaction.on_commit(lambda: _bump(profile_id))
+
+
+def get_index(profile_id):
+    """Do'kon indeksini qaytaradi, kerak bo'lsa (birinchi marta yoki o'zgarishdan keyin) quradi."""
+    version = catalog_version(profile_id)
+    with _lock:
+        index = _indexes.get(profile_id)
+        if index is not None and index.version == version:
+            _indexes.move_to_end(profile_id)
+            return index
+
+    rows = (
+        Product.objects
+        .filter(profile_id=profile_id)
+        .values_list('id', 'name', 'qrcode', 'selling_price')
+        .iterator(chunk_size=5000)
+    )
+    index = ProductSearchIndex(rows, version)
+
+    with _lock:
+        _indexes[profile_id] = index
+        _indexes.move_to_end(profile_id)
+        while len(_indexes) > getattr(settings, 'PRODUCT_SEARCH_MAX_SHOPS', 64):
+            _indexes.popitem(last=False)
+    return index
+
+
+async def aget_index(profile_id):
+    """get_index ning async varianti: indeks tayyor bo'lsa oqimga o'tmasdan qaytaradi."""
+    version = await cache.aget(_version_key(profile_id))
+    if version is not None:
+        with _lock:
+            index = _indexes.get(profile_id)
+            if index is not None and index.version == version:
+                _indexes.move_to_end(profile_id)
+                return index
+    # Indeksni qurish (yoki versiyani yaratish) - sinxron, bazadan o'qiydi
+    return await sync_to_async(get_index)(profile_id)
@@ -0,0 +1,11 @@
+# products/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Product
+from .search import invalidate
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_search_index(sender, instance, **kwargs):
+    invalidate(instance.profile_id)
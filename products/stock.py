@@ -0,0 +1,114 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, F, Max, Q, Sum
+from django.utils import timezone
+
+from .models import Product, StockMovement, StockSnapshot
+
+
+def stock_change(delta):
+    """update() uchun: qoldiqni F() bilan o'zgartiradi va is_low ni shu UPDATE ichida yangilaydi.
+
+    delta - son yoki ifoda (Case). SET ichida stock eski qiymatni bildiradi.
+    """
+    return {
+        'stock': F('stock') + delta,
+        'is_low': ExpressionWrapper(Q(stock__lte=F('low_stock_threshold') - delta), output_field=BooleanField()),
+    }
+
+
+def _low_stock_key(user_id):
+    return f"low-stock-count:{user_id}"
+
+
+def low_stock_count(user_id):
+    """Kam qolgan mahsulotlar soni (bosh sahifa belgisi uchun keshda).
+
+    Kesh workerlar orasida umumiy (settings.CACHES): bir workerdagi sotuv yoki
+    qaytarish tozalagan sonni boshqalari ham qayta hisoblaydi.
+    """
+    key = _low_stock_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Product.objects.filter(profile__user_id=user_id, is_low=True).count()
+        cache.set(key, count, getattr(settings, 'LOW_STOCK_CACHE_TIMEOUT', 300))
+    return count
+
+
+def invalidate_low_stock(user_id):
+    """Qoldiq yozilgan joyda chaqiriladi: darhol va commitdan keyin yana tozalaydi."""
+    key = _low_stock_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def movement_rows(deltas, reason, receipt=None):
+    """{product_id: delta} -> saqlanmagan StockMovement lar (nol o'zgarishlarsiz).
+
+    Chaqiruvchi ularni qoldiq UPDATE bilan bir tranzaksiyada bulk_create qiladi.
+    """
+    return [
+        StockMovement(product_id=pid, delta=delta, reason=reason, receipt=receipt)
+        for pid, delta in deltas.items() if delta
+    ]
+
+
+def record_movements(deltas, reason, receipt=None):
+    return StockMovement.objects.bulk_create(movement_rows(deltas, reason, receipt))
+
+
+def stock_at(product, moment):
+    """moment paytidagi qoldiq: eng yaqin snapshot + oraliqdagi harakatlar.
+
+    Oldingi snapshot bo'lsa undan oldinga, bo'lmasa keyingi snapshotdan (yoki
+    hozirgi qoldiqdan) orqaga hisoblanadi. Ko'rib chiqiladigan harakatlar
+    faqat ikki snapshot orasidagilar - butun tarix qayta o'ynalmaydi.
+    """
+    movements = StockMovement.objects.filter(product=product)
+    before = (
+        StockSnapshot.objects.filter(product=product, taken_at__lte=moment)
+        .order_by('-taken_at').values_list('taken_at', 'stock').first()
+    )
+    if before is not None:
+        taken_at, stock = before
+        delta = movements.filter(created_at__gt=taken_at, created_at__lte=moment).aggregate(total=Sum('delta'))['total']
+        return stock + (delta or Decimal('0'))
+
+    after = (
+        StockSnapshot.objects.filter(product=product, taken_at__gt=moment)
+        .order_by('taken_at').values_list('taken_at', 'stock').first()
+    )
+    if after is not None:
+        taken_at, stock = after
+        movements = movements.filter(created_at__lte=taken_at)
+    else:
+        stock = Product.objects.filter(pk=product.pk).values_list('stock', flat=True).get()
+    delta = movements.filter(created_at__gt=moment).aggregate(total=Sum('delta'))['total']
+    return stock - (delta or Decimal('0'))
+
+
+def take_snapshots(batch_size=5000, now=None):
+    """Oxirgi snapshotdan keyin harakati bo'lgan mahsulotlar qoldig'ini yozadi.
+
+    Birinchi marta hamma mahsulot yoziladi. Tranzaksiya ichida: production
+    profilida (IMMEDIATE) snapshot paytida yangi harakat yozilmaydi.
+    Natija: yozilgan snapshotlar soni.
+    """
+    with transaction.atomic():
+        last = StockSnapshot.objects.aggregate(last=Max('taken_at'))['last']
+        # Vaqt birinchi so'rovdan (qulf olingandan) keyin olinadi
+        now = now or timezone.now()
+        products = Product.objects.all()
+        if last is not None:
+            products = products.filter(
+                pk__in=StockMovement.objects.filter(created_at__gt=last).values('product_id')
+            )
+        snapshots = [
+            StockSnapshot(product_id=pid, stock=stock, taken_at=now)
+            for pid, stock in products.values_list('id', 'stock').order_by()
+        ]
+        StockSnapshot.objects.bulk_create(snapshots, batch_size=batch_size)
+    return len(snapshots)
@@ -1,3 +1,489 @@
-from django.test import TestCase
+import io
+import unittest
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Sum
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from returns.refund import return_lines
+from sale.bench import plan_problems
+from sale.checkout import checkout
+from stats.rollup import rebuild
+from . import forecast
+from . import search
+from .importer import ProductImporter
+from .models import Product, ProductForecast, StockMovement, StockSnapshot
+from .stock import low_stock_count, stock_at, take_snapshots
+
+
+class ProductSearchIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = search.ProductSearchIndex([
+            (1, 'Sut Musaffo', '4780001', Decimal('9000')),
+            (2, 'Qatiq', None, Decimal('7000')),
+            (3, 'Suzma', '4780003', Decimal('15000')),
+            (4, 'Non yumshoq sut bilan', None, Decimal('4000')),
+            (5, 'Tvorog sutli', None, Decimal('12000')),
+        ])
+
+    def test_ranking(self):
+        # Nom prefiksi, keyin so'z prefiksi, keyin nom ichida
+        self.assertEqual(self.index.search('su'), [1, 3, 4, 5])
+        self.assertEqual(self.index.search('sut'), [1, 4, 5])
+        self.assertEqual(self.index.search('atiq'), [2])
+        self.assertEqual(self.index.search('SUZ'), [3])
+
+    def test_qrcode_first_and_limit(self):
+        self.assertEqual(self.index.search('4780003'), [3])
+        self.assertEqual(self.index.lookup_qrcode('4780001')[1], 'Sut Musaffo')
+        self.assertEqual(self.index.search('s', limit=2), [1, 3])
+        self.assertEqual(self.index.search('  '), [])
+        self.assertEqual(self.index.search('yo‘q'), [])
+
+
+class ProductSearchCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        search._indexes.clear()
+        self.users = [User.objects.create_user(f'kassir{i}', password='parol') for i in range(3)]
+        for user in self.users:
+            Product.objects.create(profile=user.profile, name='Non', price=Decimal('1'), selling_price=Decimal('2'), stock=Decimal('5'))
+
+    def tearDown(self):
+        search._indexes.clear()
+
+    @override_settings(PRODUCT_SEARCH_MAX_SHOPS=2)
+    def test_least_recently_used_shop_is_evicted(self):
+        first, second, third = (user.profile.id for user in self.users)
+        search.get_index(first)
+        search.get_index(second)
+        search.get_index(first)
+        search.get_index(third)
+        self.assertEqual(list(search._indexes), [first, third])
+
+    def test_change_on_another_worker_rebuilds_index(self):
+        profile = self.users[0].profile
+        index = search.get_index(profile.id)
+        with self.assertNumQueries(0):
+            self.assertIs(search.get_index(profile.id), index)
+
+        # Boshqa worker mahsulot qo'shdi: versiya umumiy keshda yangilanadi,
+        # bu jarayondagi indeks esa o'z holicha qoladi
+        Product.objects.bulk_create([
+            Product(profile=profile, name='Non qora', price=Decimal('1'), selling_price=Decimal('2'), stock=Decimal('5')),
+        ])
+        with mock.patch('products.search.cache', caches.create_connection('default')):
+            search.invalidate(profile.id)
+        search._indexes[profile.id] = index  # invalidate faqat o'z jarayonidagini o'chiradi
+
+        rebuilt = search.get_index(profile.id)
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(len(rebuilt.search('non')), 2)
+
+    def test_index_built_before_commit_is_rebuilt_after_it(self):
+        profile = self.users[0].profile
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(profile=profile, name='Non qora', price=Decimal('1'), selling_price=Decimal('2'), stock=Decimal('5'))
+            # Boshqa worker commitdan oldin indeks qurdi (u yerda yangi qator hali ko'rinmaydi)
+            early = search.ProductSearchIndex([], version=search.catalog_version(profile.id))
+            search._indexes[profile.id] = early
+        self.assertIsNot(search.get_index(profile.id), early)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN faqat SQLite uchun')
+class ProductListQueryPlanTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('kassir', password='parol')
+        other = User.objects.create_user('boshqa', password='parol')
+        for profile in (self.user.profile, other.profile):
+            Product.objects.bulk_create([
+                Product(profile=profile, name=f'Mahsulot {i}', price=Decimal('1'),
+                        selling_price=Decimal('2'), stock=Decimal(i), qrcode=f'QR{i}')
+                for i in range(40)
+            ])
+        self.client.force_login(self.user)
+
+    def test_product_list_uses_indexes(self):
+        for params in ({}, {'page': 2}, {'q': 'mahsulot 1'}, {'q': 'QR5'}):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse('products'), params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(plan_problems(ctx.captured_queries, sorts=True), [], params)
+
+
+class ProductImporterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.client.force_login(self.user)
+        Product.objects.create(
+            profile=self.user.profile, name='Sut', price=Decimal('1'), selling_price=Decimal('2'),
+            stock=Decimal('4'), qrcode='111',
+        )
+
+    def run_import(self, text, batch_size=1000):
+        return ProductImporter(self.user.profile, batch_size=batch_size).run(io.StringIO(text))
+
+    def test_upsert_by_qrcode_and_name(self):
+        report = self.run_import(
+            "name,price,selling_price,stock,qrcode\n"
+            "Sut yangi,8000,10000,,111\n"
+            "Non,3000,\"4000,5\",20,\n"
+            "Tuz,1 000,1200,5,222\n",
+            batch_size=2,
+        )
+        self.assertEqual(report, {'created': 2, 'updated': 1, 'errors': []})
+        milk = Product.objects.get(qrcode='111')
+        self.assertEqual((milk.name, milk.price, milk.stock), ('Sut yangi', Decimal('8000'), Decimal('4')))
+        self.assertEqual(Product.objects.get(name='Non').selling_price, Decimal('4000.5'))
+
+        report = self.run_import("name,price,selling_price\nnon,3100,4100\n")
+        self.assertEqual(report['updated'], 1)
+        self.assertEqual(Product.objects.get(name='non').price, Decimal('3100'))
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        report = self.run_import(
+            "name,price,selling_price,stock,qrcode\n"
+            "A,1,2,,\n"
+            "A,1,2,,\n"                   # faylda takror
+            "B,abc,2,,\n"                 # son emas
+            "C,1,-2,,\n"                  # manfiy
+            "D,123456789,2,,\n"           # max_digits=10, decimal_places=2
+            "E,1,2.001,,\n"               # kasr qismi uzun
+            "F,1,2,1234567890123456,\n"   # stock: max_digits=15
+            ",1,2,,\n"                    # nom bo'sh
+            "G,1,2,,111\n"                # QR boshqa nomdagi mahsulotniki, lekin upsert
+        )
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['updated'], 1)
+        self.assertEqual([row for row, _ in report['errors']], [3, 4, 5, 6, 7, 8, 9])
+        self.assertIn('juda katta', dict(report['errors'])[6])
+
+    def test_missing_columns(self):
+        report = self.run_import("name,price\nA,1\n")
+        self.assertEqual(report['errors'], [(1, 'Ustunlar yetishmaydi: selling_price')])
+
+    def upload(self, content, delimiter=','):
+        upload = io.BytesIO(content)
+        upload.name = 'katalog.csv'
+        return self.client.post(reverse('product-import'), {'file': upload, 'delimiter': delimiter})
+
+    def test_non_utf8_file_is_reported(self):
+        response = self.upload("name;price;selling_price\nНон;1;2\n".encode('cp1251'), delimiter=';')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('UTF-8 emas', response.context['errors'][0][1])
+
+    def test_broken_csv_is_reported(self):
+        response = self.upload(("name,price,selling_price\nA,1,2\n\"" + 'x' * 200000 + "\",1,2\n").encode())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report']['created'], 1)
+        self.assertIn('CSV fayl buzilgan', response.context['errors'][0][1])
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.client.force_login(self.user)
+
+    def create(self, name='Non', stock='10'):
+        self.client.post(reverse('product-add'), {
+            'name': name, 'price': '3000', 'selling_price': '4000', 'stock': stock, 'low_stock_threshold': '0', 'qrcode': '',
+        })
+        return Product.objects.get(profile=self.user.profile, name=name)
+
+    def ledger(self, product):
+        return list(product.movements.order_by('id').values_list('reason', 'delta', 'receipt_id'))
+
+    def assertBalanced(self, product):
+        product.refresh_from_db()
+        total = product.movements.aggregate(total=Sum('delta'))['total'] or Decimal('0')
+        self.assertEqual(total, product.stock)
+
+    def test_every_write_path_is_recorded(self):
+        product = self.create()
+        self.client.post(reverse('add-stock', args=[product.pk]), {'amount': '5'})
+        self.client.post(reverse('product-edit', args=[product.pk]), {
+            'name': 'Non', 'price': '3000', 'selling_price': '4000', 'stock': '12', 'low_stock_threshold': '0', 'qrcode': '',
+        })
+        receipt, _ = checkout(self.user, {product.pk: {'name': 'Non', 'price': '4000', 'quantity': 2}})
+        refund, _ = return_lines(self.user, [{'product_id': product.pk, 'quantity': Decimal('1')}])
+
+        self.assertEqual(self.ledger(product), [
+            (StockMovement.INITIAL, Decimal('10'), None),
+            (StockMovement.RESTOCK, Decimal('5'), None),
+            (StockMovement.ADJUST, Decimal('-3'), None),
+            (StockMovement.SALE, Decimal('-2'), receipt.pk),
+            (StockMovement.RETURN, Decimal('1'), refund.pk),
+        ])
+        self.assertBalanced(product)
+        self.assertEqual(product.stock, Decimal('11'))
+
+    def test_edit_does_not_undo_sale_made_while_form_was_open(self):
+        product = self.create()
+        form = self.client.get(reverse('product-edit', args=[product.pk])).context['form']
+        shown = form['stock_shown'].value()
+        self.assertEqual(shown, Decimal('10'))
+        checkout(self.user, {product.pk: {'name': 'Non', 'price': '4000', 'quantity': 2}})
+
+        fields = {'price': '3000', 'selling_price': '4000', 'low_stock_threshold': '0', 'qrcode': '', 'stock_shown': shown}
+        # Faqat nom o'zgardi: sotilgan 2 ta qaytib kelmaydi, ADJUST yozilmaydi
+        self.client.post(reverse('product-edit', args=[product.pk]), dict(fields, name='Non oq', stock='10'))
+        product.refresh_from_db()
+        self.assertEqual((product.name, product.stock), ('Non oq', Decimal('8')))
+        self.assertNotIn(StockMovement.ADJUST, [reason for reason, _, _ in self.ledger(product)])
+
+        # Qo'lda +5: ko'rsatilgan 10 dan 15 ga, sotuv ustiga qo'shiladi
+        self.client.post(reverse('product-edit', args=[product.pk]), dict(fields, name='Non oq', stock='15'))
+        self.assertEqual(self.ledger(product)[-1], (StockMovement.ADJUST, Decimal('5'), None))
+        self.assertBalanced(product)
+        self.assertEqual(product.stock, Decimal('13'))
+
+    def test_import_records_differences(self):
+        product = self.create('Sut', '4')
+        importer = ProductImporter(self.user.profile)
+        importer.run(io.StringIO("name,price,selling_price,stock\nSut,1,2,9\nTuz,1,2,3\nGuruch,1,2,\n"))
+        self.assertEqual(self.ledger(product)[-1], (StockMovement.IMPORT, Decimal('5'), None))
+        for name in ('Sut', 'Tuz', 'Guruch'):
+            self.assertBalanced(Product.objects.get(name=name))
+
+    def test_import_after_sale_keeps_ledger_balanced(self):
+        product = self.create('Sut', '10')
+        importer = ProductImporter(self.user.profile, batch_size=1)
+        # Importer ochilgandan keyin, fayl yozilishidan oldin sotuv
+        checkout(self.user, {product.pk: {'name': 'Sut', 'price': '4000', 'quantity': 3}})
+        importer.run(io.StringIO("name,price,selling_price,stock\nSut,1,2,20\n"))
+
+        self.assertEqual(self.ledger(product)[-1], (StockMovement.IMPORT, Decimal('13'), None))
+        self.assertBalanced(product)
+        self.assertEqual(product.stock, Decimal('20'))
+
+    def test_stock_at_uses_nearest_snapshot(self):
+        product = self.create(stock='0')
+        start = timezone.now() - timedelta(days=3)
+        product.movements.update(created_at=start)
+        for day, delta in ((1, '10'), (2, '-4')):
+            StockMovement.objects.create(
+                product=product, delta=Decimal(delta), reason=StockMovement.ADJUST,
+                created_at=start + timedelta(days=day),
+            )
+        Product.objects.filter(pk=product.pk).update(stock=Decimal('6'))
+
+        expected = [
+            (start - timedelta(hours=1), Decimal('0')),
+            (start + timedelta(hours=12), Decimal('0')),
+            (start + timedelta(days=1, hours=12), Decimal('10')),
+            (start + timedelta(days=2, hours=12), Decimal('6')),
+        ]
+        # Snapshotsiz: hozirgi qoldiqdan orqaga
+        for moment, stock in expected:
+            self.assertEqual(stock_at(product, moment), stock, moment)
+
+        StockSnapshot.objects.create(product=product, stock=Decimal('10'), taken_at=start + timedelta(days=1, hours=1))
+        for moment, stock in expected:
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(stock_at(product, moment), stock, moment)
+            # Snapshot (oldingi yoki keyingi) + oraliqdagi harakatlar, indeks bo'yicha
+            self.assertLessEqual(len(ctx.captured_queries), 3)
+            if connection.vendor == 'sqlite':
+                self.assertEqual(plan_problems(ctx.captured_queries), [])
+
+    def test_snapshot_only_changed_products(self):
+        bread = self.create('Non')
+        self.create('Sut')
+        self.assertEqual(take_snapshots(), 2)
+        self.assertEqual(take_snapshots(), 0)
+        self.client.post(reverse('add-stock', args=[bread.pk]), {'amount': '1'})
+        self.assertEqual(take_snapshots(), 1)
+        self.assertEqual(bread.snapshots.order_by('-taken_at').first().stock, Decimal('11'))
+
+    def test_detail_page_shows_history(self):
+        product = self.create()
+        day = timezone.localdate()
+        response = self.client.get(reverse('product-detail', args=[product.pk]), {'date': day.isoformat()})
+        self.assertEqual(response.context['stock_on_date'], Decimal('10'))
+        self.assertContains(response, 'Boshlang‘ich qoldiq')
+
+
+class LowStockTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.client.force_login(self.user)
+
+    def create(self, name, stock, threshold):
+        return Product.objects.create(
+            profile=self.user.profile, name=name, price=Decimal('1'), selling_price=Decimal('2'),
+            stock=Decimal(stock), low_stock_threshold=Decimal(threshold),
+        )
+
+    def low_names(self):
+        return sorted(Product.objects.filter(is_low=True).values_list('name', flat=True))
+
+    def test_flag_follows_every_write_path(self):
+        bread = self.create('Non', '10', '5')
+        milk = self.create('Sut', '3', '5')
+        self.assertEqual(self.low_names(), ['Sut'])
+
+        checkout(self.user, {bread.pk: {'name': 'Non', 'price': '2', 'quantity': 5}})
+        self.assertEqual(self.low_names(), ['Non', 'Sut'])
+
+        self.client.post(reverse('add-stock', args=[milk.pk]), {'amount': '10'})
+        self.assertEqual(self.low_names(), ['Non'])
+
+        return_lines(self.user, [{'product_id': bread.pk, 'quantity': Decimal('1')}])
+        self.assertEqual(self.low_names(), [])
+
+        self.client.post(reverse('product-edit', args=[milk.pk]), {
+            'name': 'Sut', 'price': '1', 'selling_price': '2', 'stock': '13', 'low_stock_threshold': '20', 'qrcode': '',
+        })
+        self.assertEqual(self.low_names(), ['Sut'])
+
+        ProductImporter(self.user.profile).run(io.StringIO("name,price,selling_price,stock\nSut,1,2,25\nTuz,1,2,0\n"))
+        self.assertEqual(self.low_names(), ['Tuz'])
+
+    def test_count_is_cached_and_invalidated(self):
+        bread = self.create('Non', '10', '5')
+        self.create('Sut', '3', '5')
+        self.assertEqual(low_stock_count(self.user.pk), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(low_stock_count(self.user.pk), 1)
+
+        checkout(self.user, {bread.pk: {'name': 'Non', 'price': '2', 'quantity': 6}})
+        self.assertEqual(low_stock_count(self.user.pk), 2)
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['low_stock_count'], 2)
+
+    def test_count_cached_on_another_worker_follows_checkout_and_return(self):
+        bread = self.create('Non', '10', '5')
+        self.create('Sut', '3', '5')
+        other = caches.create_connection('default')  # boshqa jarayondagi kesh ulanishi
+        with mock.patch('products.stock.cache', other):
+            self.assertEqual(low_stock_count(self.user.pk), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            checkout(self.user, {bread.pk: {'name': 'Non', 'price': '2', 'quantity': 6}})
+        with mock.patch('products.stock.cache', other):
+            self.assertEqual(low_stock_count(self.user.pk), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return_lines(self.user, [{'product_id': bread.pk, 'quantity': Decimal('2')}])
+        with mock.patch('products.stock.cache', other):
+            self.assertEqual(low_stock_count(self.user.pk), 1)
+
+    def test_api(self):
+        self.create('Non', '10', '5')
+        self.create('Sut', '3', '5')
+        self.create('Tuz', '0', '1')
+        self.client.get(reverse('home'))  # profil va son keshi
+        # sessiya, foydalanuvchi va ro'yxat - son keshdan
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('low-stock-api'), {'limit': 1})
+        data = response.json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['results'], [{'id': data['results'][0]['id'], 'name': 'Sut', 'stock': '3.00', 'threshold': '5.00', 'days_of_cover': None}])
+
+    def test_report_page(self):
+        self.create('Sut', '3', '5')
+        response = self.client.get(reverse('low-stock'))
+        self.assertEqual([p.shortfall for p in response.context['products']], [Decimal('2')])
+        self.assertContains(response, 'Sut')
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN faqat SQLite uchun')
+    def test_report_uses_partial_index(self):
+        Product.objects.bulk_create([
+            Product(profile=self.user.profile, name=f'Mahsulot {i}', price=Decimal('1'), selling_price=Decimal('2'),
+                    stock=Decimal(i), low_stock_threshold=Decimal('3'), is_low=i <= 3)
+            for i in range(60)
+        ])
+        for name, params in (('low-stock', {}), ('low-stock-api', {})):
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse(name), params)
+            self.assertEqual(plan_problems(ctx.captured_queries, sorts=True), [], name)
+            plans = [
+                ' '.join(str(row[-1]) for row in connection.cursor().execute('EXPLAIN QUERY PLAN ' + q['sql']).fetchall())
+                for q in ctx.captured_queries if 'is_low' in q['sql']
+            ]
+            self.assertTrue(any('product_low_stock_idx' in plan for plan in plans), plans)
+
+
+class ForecastTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.client.force_login(self.user)
+        self.bread = Product.objects.create(
+            profile=self.user.profile, name='Non', price=Decimal('1'), selling_price=Decimal('2'),
+            stock=Decimal('200'), low_stock_threshold=Decimal('300'),
+        )
+        self.salt = Product.objects.create(
+            profile=self.user.profile, name='Tuz', price=Decimal('1'), selling_price=Decimal('2'), stock=Decimal('5'),
+        )
+
+    def sell(self, product, quantity, days_ago):
+        receipt, _ = checkout(self.user, {product.pk: {'name': product.name, 'price': '2', 'quantity': quantity}})
+        receipt.__class__.objects.filter(pk=receipt.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+
+    @unittest.skipUnless(forecast.np, 'numpy o‘rnatilmagan: pip install -r requirements.txt')
+    def test_velocity_and_cover(self):
+        self.sell(self.bread, 14, 1)
+        self.sell(self.bread, 14, 20)
+        self.sell(self.bread, 99, 40)  # oynadan tashqarida
+        return_lines(self.user, [{'product_id': self.bread.pk, 'quantity': Decimal('7')}])
+        rebuild(users=[self.user])  # cheklar sanasi o'zgartirildi
+        self.assertEqual(forecast.build_forecasts(self.user.profile, window=28), 2)
+
+        bread = ProductForecast.objects.get(product=self.bread)
+        self.assertEqual(bread.velocity, Decimal('0.750'))        # (14 + 14 - 7) / 28
+        self.assertEqual(bread.recent_velocity, Decimal('1.000'))  # (14 - 7) / 7
+        self.bread.refresh_from_db()
+        self.assertEqual(bread.days_of_cover, (self.bread.stock / Decimal('0.75')).quantize(Decimal('0.1')))
+        self.assertIsNone(ProductForecast.objects.get(product=self.salt).days_of_cover)
+
+        # Qayta hisoblash eski qatorlarni almashtiradi
+        forecast.build_forecasts(self.user.profile, window=28)
+        self.assertEqual(ProductForecast.objects.count(), 2)
+
+    @unittest.skipUnless(forecast.np, 'numpy o‘rnatilmagan: pip install -r requirements.txt')
+    def test_arrays_match_naive_sum(self):
+        np = forecast.np
+        rnd = np.random.default_rng(1)
+        product_ids = np.arange(1, 201)
+        sold_ids = rnd.choice(product_ids, 5000)
+        sold_days = rnd.integers(0, 28, 5000)
+        quantities = rnd.integers(1, 5, 5000).astype(float)
+        velocity, recent, cover = forecast.forecast_arrays(
+            product_ids, np.full(200, 10.0), sold_ids, sold_days, quantities, window=28,
+        )
+        for pid in (1, 50, 200):
+            mask = sold_ids == pid
+            self.assertAlmostEqual(velocity[pid - 1], quantities[mask].sum() / 28)
+            self.assertAlmostEqual(recent[pid - 1], quantities[mask & (sold_days >= 21)].sum() / 7)
+
+    def test_command_requires_numpy(self):
+        with mock.patch.object(forecast, 'np', None):
+            with self.assertRaisesMessage(CommandError, 'numpy kerak'):
+                call_command('forecast_sales')
+        self.assertFalse(ProductForecast.objects.exists())
+
+    def test_pages_show_forecast(self):
+        ProductForecast.objects.create(
+            product=self.bread, velocity=Decimal('2.5'), recent_velocity=Decimal('3'),
+            days_of_cover=Decimal('12'), window_days=28, computed_at=timezone.now(),
+        )
+        response = self.client.get(reverse('product-detail', args=[self.bread.pk]))
+        self.assertContains(response, '12.0 kun')
+        response = self.client.get(reverse('product-detail', args=[self.salt.pk]))
+        self.assertNotContains(response, 'Qoldiq yetadi')
+        response = self.client.get(reverse('low-stock'))
+        self.assertContains(response, '2.500')
+        data = self.client.get(reverse('low-stock-api')).json()
+        self.assertEqual(data['results'][0]['days_of_cover'], '12.0')
@@ -1,12 +1,15 @@
 from django.urls import path
 from .views import (
     ProductListView, ProductDetailView, ProductUpdateView, ProductDeleteView,
-ProductCreateView, AddStockView
+ProductCreateView, AddStockView, ProductImportView, LowStockView, low_stock_api
 )
 
 urlpatterns = [
     path('', ProductListView.as_view(), name='products'),
     path('add/', ProductCreateView.as_view(), name='product-add'),
+    path('low-stock/', LowStockView.as_view(), name='low-stock'),
+    path('api/low-stock/', low_stock_api, name='low-stock-api'),
+    path('import/', ProductImportView.as_view(), name='product-import'),
     path('<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
     path('<int:pk>/edit/', ProductUpdateView.as_view(), name='product-edit'),
     path('<int:pk>/delete/', ProductDeleteView.as_view(), name='product-delete'),
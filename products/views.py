@@ -1,7 +1,15 @@
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
-from .models import Product
+from .models import Product, StockMovement
+from .stock import invalidate_low_stock, low_stock_count, record_movements, stock_at, stock_change
+from django.contrib.auth.decorators import login_required
+from django import forms
+from django.http import HttpResponseRedirect, JsonResponse
+from accounts.cache import profile_info
+from datetime import timedelta
+from django.db import transaction
+from stats.dates import parse_day, day_start
 from django.db.models import Sum, F
 
 from django.core.paginator import Paginator
@@ -63,18 +71,76 @@ class ProductListView(LoginRequiredMixin, ListView):
         )
 
         return context
+class LowStockView(LoginRequiredMixin, ListView):
+    """Kam qolgan mahsulotlar (stock <= minimal qoldiq) - buyurtma uchun ro'yxat"""
+    template_name = 'products/low_stock.html'
+    context_object_name = 'products'
+    paginate_by = 50
+
+    def get_queryset(self):
+        # Qisman indeks (is_low) bo'yicha: katalog skan qilinmaydi
+        return (
+            Product.objects
+            .filter(profile=self.request.user.profile, is_low=True)
+            .select_related('forecast')
+            .annotate(shortfall=F('low_stock_threshold') - F('stock'))
+            .order_by('name')
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['low_count'] = low_stock_count(self.request.user.pk)
+        return context
+
+
+@login_required
+def low_stock_api(request):
+    """Kassa uchun: kam qolganlar soni va ro'yxati (?limit=, 200 tagacha)"""
+    try:
+        limit = min(max(int(request.GET.get('limit', 50)), 1), 200)
+    except ValueError:
+        limit = 50
+    count = low_stock_count(request.user.pk)
+    items = []
+    if count:
+        rows = (
+            Product.objects
+            .filter(profile_id=profile_info(request.user.pk).id, is_low=True)
+            .order_by('name')
+            .values_list('id', 'name', 'stock', 'low_stock_threshold', 'forecast__days_of_cover')[:limit]
+        )
+        items = [
+            {
+                'id': pid, 'name': name, 'stock': str(stock), 'threshold': str(threshold),
+                'days_of_cover': None if cover is None else str(cover),
+            }
+            for pid, name, stock, threshold, cover in rows
+        ]
+    return JsonResponse({'count': count, 'results': items})
+
+
 class ProductDetailView(LoginRequiredMixin, DetailView):
     model = Product
     template_name = 'products/product_detail.html'
     context_object_name = 'product'
 
     def get_queryset(self):
-        return Product.objects.filter(profile=self.request.user.profile)
+        return Product.objects.filter(profile=self.request.user.profile).select_related('forecast')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Qoldiq tarixi: oxirgi harakatlar va (so'ralsa) kun oxiridagi qoldiq
+        context['movements'] = self.object.movements.order_by('-created_at', '-id')[:20]
+        day = parse_day(self.request.GET.get('date'))
+        context['stock_date'] = day
+        if day:
+            context['stock_on_date'] = stock_at(self.object, day_start(day + timedelta(days=1)))
+        return context
 
 
 class ProductUpdateView(LoginRequiredMixin, UpdateView):
     model = Product
-    fields = ['name', 'price', 'selling_price', 'stock', 'qrcode']  # qrcode qo'shildi
+    fields = ['name', 'price', 'selling_price', 'stock', 'low_stock_threshold', 'qrcode']  # qrcode qo'shildi
     template_name = 'products/product_form.html'
 
     def get_queryset(self):
@@ -83,6 +149,14 @@ class ProductUpdateView(LoginRequiredMixin, UpdateView):
     def get_success_url(self):
         return reverse_lazy('product-detail', kwargs={'pk': self.object.pk})
 
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        # Forma ochilgandagi qoldiq: kiritilgan qiymat shunga nisbatan farq sifatida qo'llanadi
+        form.fields['stock_shown'] = forms.DecimalField(
+            widget=forms.HiddenInput, required=False, max_digits=15, decimal_places=2, initial=self.object.stock,
+        )
+        return form
+
     def form_valid(self, form):
         user_profile = self.request.user.profile
         name = form.cleaned_data['name']
@@ -98,7 +172,22 @@ class ProductUpdateView(LoginRequiredMixin, UpdateView):
             form.add_error('qrcode', 'Bu QR kod allaqachon ishlatilgan!')
             return self.form_invalid(form)
 
-        return super().form_valid(form)
+        # Qoldiq forma ko'rsatgan qiymatdan farq sifatida F() bilan qo'llanadi va
+        # jurnalga yoziladi: forma ochiq turganda bo'lgan sotuv qaytarib yozilmaydi.
+        # Qolgan maydonlar stock'siz saqlanadi.
+        shown = form.cleaned_data.get('stock_shown')
+        if shown is None:
+            shown = form.initial['stock']
+        delta = form.cleaned_data['stock'] - shown
+        with transaction.atomic():
+            self.object = form.save(commit=False)
+            self.object.save(update_fields=['name', 'price', 'selling_price', 'low_stock_threshold', 'qrcode'])
+            # delta=0 bo'lsa ham: is_low yangi chegara va bazadagi qoldiq bilan hisoblanadi
+            Product.objects.filter(pk=self.object.pk).update(**stock_change(delta))
+            if delta:
+                record_movements({self.object.pk: delta}, StockMovement.ADJUST)
+            invalidate_low_stock(self.request.user.pk)
+        return HttpResponseRedirect(self.get_success_url())
 
 
 class ProductDeleteView(LoginRequiredMixin, DeleteView):
@@ -109,10 +198,14 @@ class ProductDeleteView(LoginRequiredMixin, DeleteView):
     def get_queryset(self):
         return Product.objects.filter(profile=self.request.user.profile)
 
+    def form_valid(self, form):
+        invalidate_low_stock(self.request.user.pk)
+        return super().form_valid(form)
+
 
 class ProductCreateView(LoginRequiredMixin, CreateView):
     model = Product
-    fields = ['name', 'price', 'selling_price', 'stock', 'qrcode']  # qrcode qo'shildi
+    fields = ['name', 'price', 'selling_price', 'stock', 'low_stock_threshold', 'qrcode']  # qrcode qo'shildi
     template_name = 'products/product_form.html'
     success_url = reverse_lazy('products')
 
@@ -133,7 +226,11 @@ class ProductCreateView(LoginRequiredMixin, CreateView):
 
         # Profilni bog‘lash
         form.instance.profile = user_profile
-        return super().form_valid(form)
+        with transaction.atomic():
+            response = super().form_valid(form)
+            record_movements({self.object.pk: self.object.stock}, StockMovement.INITIAL)
+            invalidate_low_stock(self.request.user.pk)
+        return response
 
 from decimal import Decimal
 from django.shortcuts import render, redirect, get_object_or_404
@@ -157,10 +254,38 @@ class AddStockView(LoginRequiredMixin, View):
             if add_amount <= 0:
                 messages.error(request, "Miqdor musbat bo‘lishi kerak.")
             else:
-                product.stock += add_amount
-                product.save()
+                # F(): parallel sotuv bilan qoldiq yo'qolmaydi
+                with transaction.atomic():
+                    Product.objects.filter(pk=product.pk).update(**stock_change(add_amount))
+                    record_movements({product.pk: add_amount}, StockMovement.RESTOCK)
+                    invalidate_low_stock(request.user.pk)
                 messages.success(request, f"{product.name} mahsulotiga {add_amount} birlik qo‘shildi.")
                 return redirect('products')
         except Exception:
             messages.error(request, "Noto‘g‘ri qiymat kiritildi.")
         return render(request, self.template_name, {'product': product})
+
+
+import io
+from .importer import ProductImporter
+
+
+class ProductImportView(LoginRequiredMixin, View):
+    template_name = 'products/product_import.html'
+
+    def get(self, request):
+        return render(request, self.template_name)
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if not upload:
+            messages.error(request, "CSV fayl tanlanmagan.")
+            return render(request, self.template_name)
+
+        delimiter = ';' if request.POST.get('delimiter') == ';' else ','
+        importer = ProductImporter(request.user.profile)
+        report = importer.run(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''), delimiter=delimiter)
+        return render(request, self.template_name, {
+            'report': report,
+            'errors': report['errors'][:200],
+        })
@@ -18,3 +18,9 @@ class ReturnedProductForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         # faqat user profiliga tegishli productlar
         self.fields['product'].queryset = Product.objects.filter(profile__user=user)
+
+    def clean_quantity(self):
+        quantity = self.cleaned_data['quantity']
+        if quantity <= 0:
+            raise forms.ValidationError("Miqdor musbat bo‘lishi kerak")
+        return quantity
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_profile_name_idx'),
+        ('returns', '0002_returnedproduct_delete_returnproduct'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='returnedproduct',
+            index=models.Index(fields=['user', 'date'], name='returned_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('returns', '0003_returnedproduct_user_date_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='returnedproduct',
+            name='date',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
+from django.utils import timezone
 from products.models import Product
+from sale.models import ReceiptItem
 from django.contrib.auth.models import User
 
 class ReturnedProduct(models.Model):
@@ -7,7 +9,16 @@ class ReturnedProduct(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.DecimalField(max_digits=10, decimal_places=2)
     reason = models.CharField(max_length=255, blank=True, null=True)
-    date = models.DateTimeField(auto_now_add=True)
+    date = models.DateTimeField(default=timezone.now, editable=False)
+    # Asl chek qatori (mijoz chek bilan qaytarganda): bir qatordan sotilganidan ko'p qaytmaydi
+    receipt_item = models.ForeignKey(
+        ReceiptItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='returns',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='returned_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.quantity} qaytarildi"
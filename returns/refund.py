@@ -0,0 +1,192 @@
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Sum
+
+from products.models import Product, StockMovement
+from products.stock import invalidate_low_stock, record_movements
+from sale.checkout import apply_stock_deltas
+from sale.models import MAX_ID, Receipt, ReceiptItem
+from stats.rollup import record_sales, sale_lines
+from .models import ReturnedProduct
+
+MAX_LINES = 500
+
+
+class ReturnError(Exception):
+    pass
+
+
+def parse_return_lines(lines):
+    """API'dan kelgan qatorlar: [{'product_id' | 'receipt_item_id', 'quantity', 'reason'?}]"""
+    if not isinstance(lines, list) or not lines:
+        raise ReturnError('Qaytarish qatorlari yo‘q')
+    if len(lines) > MAX_LINES:
+        raise ReturnError(f"Bir so‘rovda {MAX_LINES} tadan ko‘p qator yuborib bo‘lmaydi")
+
+    parsed = []
+    for line in lines:
+        try:
+            item_id = int(line['receipt_item_id']) if line.get('receipt_item_id') is not None else None
+            pid = int(line['product_id']) if line.get('product_id') is not None else None
+            qty = Decimal(str(line.get('quantity', '1')).replace(',', '.'))
+        except (AttributeError, TypeError, ValueError, InvalidOperation):
+            raise ReturnError('Qator noto‘g‘ri')
+        if pid is None and item_id is None:
+            raise ReturnError('Qator noto‘g‘ri')
+        # Bazadagi id oralig'idan tashqarisi ORM'da OverflowError (500) beradi
+        if item_id is not None and not 0 < item_id <= MAX_ID:
+            raise ReturnError(f"Chek qatori topilmadi: {item_id}")
+        if pid is not None and not 0 < pid <= MAX_ID:
+            raise ReturnError(f"Mahsulot topilmadi: {pid}")
+        if not qty.is_finite() or qty <= 0:
+            raise ReturnError(f"Miqdor noto‘g‘ri: {line.get('quantity')}")
+        try:
+            ReceiptItem._meta.get_field('quantity').run_validators(qty)
+        except ValidationError:
+            raise ReturnError(f"Miqdor juda katta yoki kasr qismi uzun: {line.get('quantity')}")
+        parsed.append({
+            'product_id': pid,
+            'receipt_item_id': item_id,
+            'quantity': qty,
+            'reason': str(line.get('reason') or '').strip()[:255],
+        })
+    return parsed
+
+
+def _returned_totals(item_ids):
+    """{receipt_item_id: shu qatordan jami qaytarilgan miqdor}"""
+    return dict(
+        ReturnedProduct.objects
+        .filter(receipt_item__in=item_ids)
+        .values('receipt_item')
+        .annotate(total=Sum('quantity'))
+        .values_list('receipt_item', 'total')
+    )
+
+
+def _over_returned(sold, returned, touched):
+    return [sold[pk].product_name for pk in touched if returned.get(pk, Decimal('0')) > sold[pk].quantity]
+
+
+def return_lines(user, lines, receipt_id=None, reason=''):
+    """Bir nechta qatorni bitta tranzaksiyada qaytaradi.
+
+    lines: [{'product_id'?, 'receipt_item_id'?, 'quantity', 'reason'?}]. receipt_id
+    berilsa, qatorlar shu chekning qatorlariga bog'lanadi (product_id bo'yicha
+    ham topiladi), narx chekdagi narx bo'ladi va qatordan sotilganidan ko'p
+    qaytarib bo'lmaydi. Qoldiq bitta F() UPDATE bilan, qaytarishlar va minus chek
+    bulk_create bilan yoziladi; so'rovlar soni qatorlar soniga bog'liq emas.
+    Natija: (minus chek, [ReturnedProduct]).
+    """
+    if not lines:
+        raise ReturnError('Qaytarish qatorlari yo‘q')
+
+    with transaction.atomic():
+        receipt = None
+        sold = {}
+        if receipt_id is not None:
+            receipt = Receipt.objects.filter(pk=receipt_id, user=user).first()
+            if receipt is None:
+                raise ReturnError('Chek topilmadi')
+        item_ids = {line['receipt_item_id'] for line in lines if line.get('receipt_item_id')}
+        if receipt is not None or item_ids:
+            # PostgreSQL'da qatorlar qulflanadi; SQLite'da select_for_update hech narsa
+            # qilmaydi, shuning uchun qoldiq yozuvdan keyin yana tekshiriladi (pastda)
+            items = ReceiptItem.objects.select_for_update().filter(receipt__user=user)
+            items = items.filter(receipt=receipt) if receipt is not None else items.filter(pk__in=item_ids)
+            sold = {item.pk: item for item in items.only('id', 'receipt_id', 'product_id', 'product_name', 'price', 'quantity', 'cost')}
+
+        by_product = {}
+        for item in sold.values():
+            by_product.setdefault(item.product_id, item)
+        resolved = []
+        for line in lines:
+            item = None
+            if line.get('receipt_item_id'):
+                item = sold.get(line['receipt_item_id'])
+                if item is None:
+                    raise ReturnError(f"Chek qatori topilmadi: {line['receipt_item_id']}")
+            elif receipt is not None:
+                item = by_product.get(line['product_id'])
+                if item is None:
+                    raise ReturnError(f"Bu chekda mahsulot yo‘q: {line['product_id']}")
+            pid = item.product_id if item is not None else line['product_id']
+            if pid is None or (line.get('product_id') and line['product_id'] != pid):
+                raise ReturnError(f"Mahsulot chek qatoriga mos emas: {line.get('product_id')}")
+            resolved.append((pid, item, line))
+
+        products = (
+            Product.objects
+            .filter(profile__user=user)
+            .only('id', 'name', 'price', 'selling_price')
+            .in_bulk({pid for pid, _, _ in resolved})
+        )
+        missing = sorted({str(pid) for pid, _, _ in resolved if pid not in products})
+        if missing:
+            raise ReturnError(f"Mahsulot topilmadi: {', '.join(missing)}")
+
+        touched = {item.pk for _, item, _ in resolved if item is not None}
+        if touched:
+            # Avval qaytarilganlari bilan birga sotilganidan oshmasin
+            returned = _returned_totals(list(touched))
+            for _, item, line in resolved:
+                if item is not None:
+                    returned[item.pk] = returned.get(item.pk, Decimal('0')) + line['quantity']
+            over = _over_returned(sold, returned, touched)
+            if over:
+                raise ReturnError(f"Sotilganidan ko‘p qaytarib bo‘lmaydi: {', '.join(over)}")
+
+        deltas = {}
+        receipt_items = []
+        returns = []
+        for pid, item, line in resolved:
+            product = products[pid]
+            qty = line['quantity']
+            deltas[pid] = deltas.get(pid, Decimal('0')) + qty
+            receipt_items.append(ReceiptItem(
+                product_id=pid,
+                product_name=item.product_name if item is not None else product.name,
+                price=item.price if item is not None else product.selling_price,
+                quantity=-qty,   # MINUS yozuv!
+                # Foyda sotuvdagi kelgan narx bilan ayiriladi
+                cost=item.cost if item is not None and item.cost is not None else product.price,
+            ))
+            returns.append(ReturnedProduct(
+                user=user,
+                product_id=pid,
+                quantity=qty,
+                reason=line.get('reason') or reason,
+                receipt_item=item,
+            ))
+
+        if receipt is not None:
+            description = f"Qaytarish: chek #{receipt.pk}"
+        else:
+            description = f"Qaytarish: {', '.join(dict.fromkeys(i.product_name for i in receipt_items))}"
+        refund = Receipt.objects.create(
+            user=user,
+            description=description,
+            ready=True,
+            total=Receipt.round_total(sum(i.price * i.quantity for i in receipt_items)),
+            item_count=len(receipt_items),
+        )
+        for receipt_item in receipt_items:
+            receipt_item.receipt = refund
+
+        apply_stock_deltas(deltas)
+        record_movements(deltas, StockMovement.RETURN, refund)
+        invalidate_low_stock(user.pk)
+        ReceiptItem.objects.bulk_create(receipt_items)
+        ReturnedProduct.objects.bulk_create(returns)
+        if touched:
+            # Yozuvdan keyin bu tranzaksiya yozish qulfini ushlab turadi: parallel
+            # qaytarish ham yuqoridagi tekshiruvdan o'tgan bo'lsa, bu yerda ko'rinadi
+            # va hammasi bekor qilinadi (SQLite DEFERRED tranzaksiyasida ham)
+            over = _over_returned(sold, _returned_totals(list(touched)), touched)
+            if over:
+                raise ReturnError(f"Sotilganidan ko‘p qaytarib bo‘lmaydi: {', '.join(over)}")
+        record_sales(user, sale_lines(refund, receipt_items))
+
+    return refund, returns
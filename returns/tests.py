@@ -1,3 +1,228 @@
-from django.test import TestCase
+import json
+import threading
+import unittest
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from unittest import mock
+
+from django.db import OperationalError, connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Product
+from sale.bench import plan_problems
+from sale.checkout import apply_stock_deltas, checkout
+from sale.models import Receipt
+from .models import ReturnedProduct
+from .refund import ReturnError, return_lines
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN faqat SQLite uchun')
+class ReturnedListQueryPlanTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('kassir', password='parol')
+        product = Product.objects.create(
+            profile=self.user.profile, name='Non', price=Decimal('3000'),
+            selling_price=Decimal('4000'), stock=Decimal('10'),
+        )
+        ReturnedProduct.objects.create(user=self.user, product=product, quantity=Decimal('1'))
+        self.client.force_login(self.user)
+
+    def test_returned_list_uses_indexes(self):
+        today = timezone.localdate()
+        for params in ({}, {'start_date': (today - timedelta(days=3)).isoformat(), 'end_date': today.isoformat()}):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse('returned_list'), params)
+                # returns QuerySet shablonda baholanadi
+                list(response.context['returns'])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['returns']), 1)
+            self.assertEqual(plan_problems(ctx.captured_queries, sorts=True), [], params)
+
+
+class ReturnApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.bread = Product.objects.create(
+            profile=self.user.profile, name='Non', price=Decimal('3000'),
+            selling_price=Decimal('4000'), stock=Decimal('10'),
+        )
+        self.milk = Product.objects.create(
+            profile=self.user.profile, name='Sut', price=Decimal('9000'),
+            selling_price=Decimal('12000'), stock=Decimal('5'),
+        )
+        self.receipt, items = checkout(self.user, {
+            self.bread.id: {'name': 'Non', 'price': '3500', 'quantity': 3},
+            self.milk.id: {'name': 'Sut', 'price': '12000', 'quantity': 1},
+        })
+        self.items = {item.product_id: item for item in items}
+        self.client.force_login(self.user)
+
+    def post(self, payload):
+        return self.client.post(reverse('return_api'), json.dumps(payload), content_type='application/json')
+
+    def test_basket_return_against_receipt(self):
+        self.client.get(reverse('return_page'))  # profil keshi isitiladi
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post({'receipt_id': self.receipt.id, 'reason': 'Mijoz fikrini o‘zgartirdi', 'lines': [
+                {'product_id': self.bread.id, 'quantity': '2'},
+                {'receipt_item_id': self.items[self.milk.id].id, 'quantity': '1'},
+            ]})
+        queries = len(ctx.captured_queries)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        # Chekdagi narx bilan: 2 * 3500 + 12000
+        self.assertEqual(data['total'], '-19000.00')
+
+        self.bread.refresh_from_db()
+        self.milk.refresh_from_db()
+        self.assertEqual(self.bread.stock, Decimal('9'))
+        self.assertEqual(self.milk.stock, Decimal('5'))
+        returns = ReturnedProduct.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(
+            [(r.receipt_item_id, r.quantity) for r in returns],
+            [(self.items[self.bread.id].id, Decimal('2')), (self.items[self.milk.id].id, Decimal('1'))],
+        )
+        refund = Receipt.objects.get(pk=data['receipt_id'])
+        self.assertEqual(refund.item_count, 2)
+        self.assertEqual(sorted(refund.items.values_list('quantity', flat=True)), [Decimal('-2'), Decimal('-1')])
+
+        # So'rovlar soni qatorlar soniga bog'liq emas
+        receipt, _ = checkout(self.user, {
+            self.bread.id: {'name': 'Non', 'price': '3500', 'quantity': 5},
+            self.milk.id: {'name': 'Sut', 'price': '12000', 'quantity': 2},
+        })
+        with CaptureQueriesContext(connection) as ctx:
+            self.post({'receipt_id': receipt.id, 'lines': [
+                {'product_id': self.bread.id, 'quantity': '1'},
+                {'product_id': self.bread.id, 'quantity': '1'},
+                {'product_id': self.milk.id, 'quantity': '1'},
+                {'product_id': self.milk.id, 'quantity': '1'},
+            ]})
+        self.assertEqual(len(ctx.captured_queries), queries)
+
+    def test_cannot_return_more_than_sold(self):
+        line = {'receipt_item_id': self.items[self.bread.id].id, 'quantity': '2'}
+        self.assertEqual(self.post({'lines': [line]}).status_code, 200)
+        response = self.post({'lines': [line]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Sotilganidan ko‘p', response.json()['error'])
+        self.assertEqual(ReturnedProduct.objects.count(), 1)
+
+    def test_invalid_line_writes_nothing(self):
+        self.bread.refresh_from_db()
+        stock = self.bread.stock
+        response = self.post({'receipt_id': self.receipt.id, 'lines': [
+            {'product_id': self.bread.id, 'quantity': '1'},
+            {'product_id': self.bread.id + 100, 'quantity': '1'},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.bread.refresh_from_db()
+        self.assertEqual(self.bread.stock, stock)
+        self.assertFalse(ReturnedProduct.objects.exists())
+        self.assertEqual(Receipt.objects.count(), 1)
+
+        for payload in ({'lines': []}, {'lines': [{'quantity': '1'}]}, {'receipt_id': 'x', 'lines': [{'product_id': 1}]}):
+            self.assertEqual(self.post(payload).status_code, 400, payload)
+
+    def test_error_messages_name_the_bad_field(self):
+        bread = self.items[self.bread.id].id
+        cases = [
+            ({'receipt_id': 'x', 'lines': [{'receipt_item_id': bread}]}, 'receipt_id noto‘g‘ri'),
+            ({'lines': [{'receipt_item_id': 'x'}]}, 'Qator noto‘g‘ri'),
+            ({'lines': [{'receipt_item_id': bread, 'quantity': '-1'}]}, 'Miqdor noto‘g‘ri: -1'),
+            ({'lines': [{'receipt_item_id': bread, 'quantity': '1.005'}]}, 'Miqdor juda katta yoki kasr qismi uzun: 1.005'),
+            ({'lines': [{'receipt_item_id': bread, 'quantity': '1e12'}]}, 'Miqdor juda katta yoki kasr qismi uzun: 1e12'),
+            ({'lines': [{'receipt_item_id': 10 ** 30}]}, f'Chek qatori topilmadi: {10 ** 30}'),
+            ({'lines': [{'product_id': 10 ** 30}]}, f'Mahsulot topilmadi: {10 ** 30}'),
+            ({'receipt_id': 10 ** 30, 'lines': [{'product_id': self.bread.id}]}, 'receipt_id noto‘g‘ri'),
+        ]
+        for payload, error in cases:
+            response = self.post(payload)
+            self.assertEqual(response.status_code, 400, payload)
+            self.assertEqual(response.json()['error'], error)
+
+    def test_return_committed_meanwhile_is_caught_after_write(self):
+        item = self.items[self.bread.id]
+
+        def competing_return(deltas):
+            # Boshqa kassa tekshiruvdan keyin, yozuvdan oldin 2 tasini qaytardi
+            ReturnedProduct.objects.create(user=self.user, product=self.bread, quantity=Decimal('2'), receipt_item=item)
+            apply_stock_deltas(deltas)
+
+        self.bread.refresh_from_db()
+        stock = self.bread.stock
+        with mock.patch('returns.refund.apply_stock_deltas', side_effect=competing_return):
+            with self.assertRaisesMessage(ReturnError, 'Sotilganidan ko‘p'):
+                return_lines(self.user, [{'receipt_item_id': item.id, 'quantity': Decimal('2')}])
+        self.bread.refresh_from_db()
+        self.assertEqual(self.bread.stock, stock)
+        self.assertEqual(ReturnedProduct.objects.count(), 0)
+        self.assertEqual(Receipt.objects.count(), 1)
+
+    def test_other_users_receipt_is_hidden(self):
+        other = User.objects.create_user('boshqa', password='parol')
+        self.client.force_login(other)
+        response = self.post({'receipt_id': self.receipt.id, 'lines': [{'product_id': self.bread.id}]})
+        self.assertEqual(response.json()['error'], 'Chek topilmadi')
+
+    def test_return_page_uses_same_path(self):
+        response = self.client.post(reverse('return_page'), {'product': self.milk.id, 'quantity': '1', 'reason': ''})
+        self.assertRedirects(response, reverse('returned_list'))
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.stock, Decimal('5'))
+        refund = Receipt.objects.exclude(pk=self.receipt.pk).get()
+        self.assertEqual(refund.total, Decimal('-12000.00'))
+
+    def test_return_page_rejects_non_positive_quantity(self):
+        for quantity in ('-3', '0'):
+            response = self.client.post(reverse('return_page'), {'product': self.milk.id, 'quantity': quantity, 'reason': ''})
+            self.assertEqual(response.status_code, 200, quantity)
+            self.assertEqual(response.context['form'].errors['quantity'], ['Miqdor musbat bo‘lishi kerak'])
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.stock, Decimal('4'))
+        self.assertFalse(ReturnedProduct.objects.exists())
+
+
+class ConcurrentReturnTests(TransactionTestCase):
+    """Ikki kassa bir chek qatorini bir vaqtda qaytaradi. Faqat faylli bazada."""
+
+    def setUp(self):
+        if connection.is_in_memory_db():
+            self.skipTest('Parallel yozuvchilar uchun faylli SQLite kerak (DB_PROFILE=production)')
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.bread = Product.objects.create(
+            profile=self.user.profile, name='Non', price=Decimal('3000'),
+            selling_price=Decimal('4000'), stock=Decimal('10'),
+        )
+        _, items = checkout(self.user, {self.bread.id: {'name': 'Non', 'price': '3500', 'quantity': 3}})
+        self.item = items[0]
+
+    def test_parallel_returns_never_exceed_sold(self):
+        barrier = threading.Barrier(4)
+        outcomes = []
+
+        def cashier():
+            try:
+                barrier.wait()
+                return_lines(self.user, [{'receipt_item_id': self.item.id, 'quantity': Decimal('2')}])
+                outcomes.append('ok')
+            except (ReturnError, OperationalError) as e:
+                outcomes.append(type(e).__name__)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=cashier) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outcomes.count('ok'), 1, outcomes)
+        self.assertEqual(ReturnedProduct.objects.get().quantity, Decimal('2'))
+        self.bread.refresh_from_db()
+        self.assertEqual(self.bread.stock, Decimal('9'))
@@ -3,5 +3,6 @@ from . import views
 
 urlpatterns = [
     path('return/', views.return_product_page, name='return_page'),
+    path('api/', views.return_api, name='return_api'),
     path('list/', views.returned_list, name='returned_list'),
 ]
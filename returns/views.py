@@ -1,66 +1,102 @@
+import json
+
 from django.shortcuts import render, redirect
-from django.utils.dateparse import parse_date
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from django.contrib.auth.decorators import login_required
+from stats.dates import parse_day, day_range
 from .forms import ReturnedProductForm
 from .models import ReturnedProduct
-from products.models import Product
-from sale.models import Receipt, ReceiptItem   # receipt modelingiz qaerda bo'lsa o'shani import qiling
+from .refund import ReturnError, parse_return_lines, return_lines
+from sale.models import MAX_ID
+from sale.pagination import keyset_paginate, page_query
 
 
 def return_product_page(request):
     if request.method == 'POST':
         form = ReturnedProductForm(request.POST, user=request.user)
         if form.is_valid():
-            returned = form.save(commit=False)
-            returned.user = request.user
-            product = returned.product
+            data = form.cleaned_data
+            # Bitta qator ham API bilan bir xil tekshiruv va yo'ldan: F() qoldiq, bitta tranzaksiya
+            try:
+                lines = parse_return_lines([{
+                    'product_id': data['product'].id,
+                    'quantity': data['quantity'],
+                    'reason': data.get('reason') or '',
+                }])
+                return_lines(request.user, lines)
+            except ReturnError as e:
+                form.add_error(None, str(e))
+            else:
+                return redirect('returned_list')  # qaytarilganlar sahifasiga o'tish
+    else:
+        form = ReturnedProductForm(user=request.user)
 
-            # Omborga qaytarish (stock ni oshirish)
-            product.stock += returned.quantity
-            product.save()
+    return render(request, 'returns/return_page.html', {'form': form})
 
-            # Qaytarilgan tovarni saqlash
-            returned.save()
 
-            # Qaytarish uchun yangi Receipt ochamiz (minus yozuv bilan)
-            receipt = Receipt.objects.create(
-                user=request.user,
-                description=f"Qaytarish: {product.name}",
-                ready=True
-            )
-            ReceiptItem.objects.create(
-                receipt=receipt,
-                product_name=product.name,
-                price=product.selling_price,
-                quantity=-returned.quantity   # MINUS yozuv!
-            )
+# ==============================
+# Ko'p qatorli qaytarish API (asl chek bilan yoki chek'siz)
+# ==============================
+@login_required
+@require_POST
+def return_api(request):
+    try:
+        payload = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'error': 'JSON noto‘g‘ri'}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({'success': False, 'error': 'JSON noto‘g‘ri'}, status=400)
 
-            return redirect('returned_list')  # qaytarilganlar sahifasiga o'tish
-    else:
-        form = ReturnedProductForm(user=request.user)
+    receipt_id = payload.get('receipt_id')
+    if receipt_id is not None:
+        try:
+            receipt_id = int(receipt_id)
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'error': 'receipt_id noto‘g‘ri'}, status=400)
+        if not 0 < receipt_id <= MAX_ID:
+            return JsonResponse({'success': False, 'error': 'receipt_id noto‘g‘ri'}, status=400)
 
-    return render(request, 'returns/return_page.html', {'form': form})
+    try:
+        lines = parse_return_lines(payload.get('lines'))
+        refund, returns = return_lines(
+            request.user, lines, receipt_id=receipt_id, reason=str(payload.get('reason') or '').strip()[:255],
+        )
+    except ReturnError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'receipt_id': refund.id,
+        'total': str(refund.total),
+        'returns': [
+            {
+                'id': r.id,
+                'product_id': r.product_id,
+                'receipt_item_id': r.receipt_item_id,
+                'quantity': str(r.quantity),
+            }
+            for r in returns
+        ],
+    })
 
 
 def returned_list(request):
     # Asosiy queryset
-    returns = ReturnedProduct.objects.filter(user=request.user).select_related('product').order_by('-date')
+    returns = ReturnedProduct.objects.filter(user=request.user).select_related('product')
 
     # GET so'rovdan filter sanalarini olish
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
 
-    if start_date:
-        start_date = parse_date(start_date)
-        if start_date:
-            returns = returns.filter(date__date__gte=start_date)
-
-    if end_date:
-        end_date = parse_date(end_date)
-        if end_date:
-            returns = returns.filter(date__date__lte=end_date)
+    returns = returns.filter(day_range('date', parse_day(start_date), parse_day(end_date)))
+    page_obj = keyset_paginate(returns, 'date', request.GET, per_page=50)
 
     context = {
-        'returns': returns,
+        'returns': page_obj,
+        'page_obj': page_obj,
+        'page_query': page_query(request.GET),
+        'show_count': bool(request.GET.get('count')),
         'start_date': request.GET.get('start_date', ''),
         'end_date': request.GET.get('end_date', '')
     }
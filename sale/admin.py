@@ -1,13 +1,15 @@
 from django.contrib import admin
-from django.db.models import Sum, F, DecimalField, ExpressionWrapper
+from stats.rollup import refresh_receipts
+from .export import stream_csv, receipt_rows, RECEIPT_HEADER
 from .models import Receipt, ReceiptItem
 
 
 class ReceiptItemInline(admin.TabularInline):
     model = ReceiptItem
     extra = 0
-    fields = ("product_name", "price", "quantity", "line_total")
+    fields = ("product", "product_name", "price", "cost", "quantity", "line_total")
     readonly_fields = ("line_total",)
+    raw_id_fields = ("product",)
     can_delete = True
     show_change_link = True
 
@@ -22,7 +24,7 @@ class ReceiptItemInline(admin.TabularInline):
 @admin.register(Receipt)
 class ReceiptAdmin(admin.ModelAdmin):
     # Jadval ustunlari
-    list_display = ("id", "user", "created_at", "ready", "total_amount_display")
+    list_display = ("id", "user", "created_at", "ready", "item_count", "total_amount_display")
     list_display_links = ("id", "user")
     list_editable = ("ready",)
 
@@ -42,7 +44,7 @@ class ReceiptAdmin(admin.ModelAdmin):
     list_per_page = 50
 
     # Form xususiyatlari
-    readonly_fields = ("created_at", "total_amount_display")
+    readonly_fields = ("created_at", "item_count", "total_amount_display")
     autocomplete_fields = ("user",)
     inlines = [ReceiptItemInline]
     save_on_top = True
@@ -50,19 +52,25 @@ class ReceiptAdmin(admin.ModelAdmin):
     actions_on_bottom = True
     list_select_related = ("user",)
 
-    # Annotatsiya: umumiy summani bazada hisoblab keltiramiz
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        total_expr = ExpressionWrapper(
-            F("items__price") * F("items__quantity"),
-            output_field=DecimalField(max_digits=12, decimal_places=2),
-        )
-        return qs.annotate(total_amount=Sum(total_expr))
-
-    @admin.display(ordering="total_amount", description="Umumiy summa")
+    # Umumiy summa chekda saqlanadi (Receipt.total), annotatsiya shart emas
+    @admin.display(ordering="total", description="Umumiy summa")
     def total_amount_display(self, obj):
-        from decimal import Decimal
-        return obj.total_amount if obj.total_amount is not None else Decimal("0.00")
+        return obj.total
+
+    # Inline qatorlar o'zgarsa, chek summasi va kunlik statistikani qayta hisoblaymiz
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        form.instance.update_totals()
+        refresh_receipts([form.instance])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        refresh_receipts([obj])
+
+    def delete_queryset(self, request, queryset):
+        receipts = list(queryset.only("id", "user_id", "created_at"))
+        super().delete_queryset(request, queryset)
+        refresh_receipts(receipts)
 
     # Qidiruvda dublikatlarni oldini olish (reverse FK bo‘lgani uchun)
     def get_search_results(self, request, queryset, search_term):
@@ -74,7 +82,7 @@ class ReceiptAdmin(admin.ModelAdmin):
         ("Asosiy ma'lumotlar", {"fields": ("user", "description", "ready")}),
         (
             "Tizim (o'qish uchun)",
-            {"fields": ("created_at", "total_amount_display"), "classes": ("collapse",)},
+            {"fields": ("created_at", "item_count", "total_amount_display"), "classes": ("collapse",)},
         ),
     )
 
@@ -91,34 +99,19 @@ class ReceiptAdmin(admin.ModelAdmin):
 
     @admin.action(description="Tanlangan receiptlarni CSV qilib yuklab olish")
     def export_as_csv(self, request, queryset):
-        import csv
-        from django.http import HttpResponse
-
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = "attachment; filename=receipts.csv"
-        writer = csv.writer(response)
-        writer.writerow(["ID", "User", "Created at", "Ready", "Total", "Description"])
-
-        for r in queryset:
-            total = getattr(r, "total_amount", None)
-            if total is None:
-                total = r.get_total()
-            writer.writerow(
-                [r.id, r.user.username, r.created_at, r.ready, total, r.description or ""]
-            )
-        return response
+        return stream_csv("receipts.csv", RECEIPT_HEADER, receipt_rows(queryset))
 
     actions = ("mark_ready", "mark_not_ready", "export_as_csv")
 
 
 @admin.register(ReceiptItem)
 class ReceiptItemAdmin(admin.ModelAdmin):
-    list_display = ("id", "receipt", "product_name", "price", "quantity", "line_total")
+    list_display = ("id", "receipt", "product", "product_name", "price", "quantity", "line_total")
     list_filter = (("receipt__created_at", admin.DateFieldListFilter), "receipt__user", "receipt__ready")
     search_fields = ("product_name", "receipt__user__username", "receipt__description")
     readonly_fields = ("line_total",)
-    raw_id_fields = ("receipt",)
-    list_select_related = ("receipt", "receipt__user")
+    raw_id_fields = ("receipt", "product")
+    list_select_related = ("receipt", "receipt__user", "product")
     ordering = ("-id",)
     list_per_page = 100
     save_on_top = True
@@ -126,3 +119,27 @@ class ReceiptItemAdmin(admin.ModelAdmin):
     @admin.display(description="Jami")
     def line_total(self, obj):
         return obj.price * obj.quantity
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        receipts = [obj.receipt]
+        # Qator boshqa chekka ko'chirilgan bo'lsa, eskisini ham yangilaymiz
+        if change and "receipt" in form.changed_data:
+            receipts += list(Receipt.objects.filter(id=form.initial.get("receipt")))
+        self._refresh(receipts)
+
+    def delete_model(self, request, obj):
+        receipt = obj.receipt
+        super().delete_model(request, obj)
+        self._refresh([receipt])
+
+    def delete_queryset(self, request, queryset):
+        receipt_ids = set(queryset.values_list("receipt_id", flat=True))
+        super().delete_queryset(request, queryset)
+        self._refresh(Receipt.objects.filter(id__in=receipt_ids))
+
+    def _refresh(self, receipts):
+        receipts = list(receipts)
+        for receipt in receipts:
+            receipt.update_totals()
+        refresh_receipts(receipts)
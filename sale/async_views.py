@@ -0,0 +1,125 @@
+"""Kassa oynasining eng ko'p chaqiriladigan endpointlari - async (ASGI) variantlari.
+
+Javoblar sale.views dagi sinxron viewlar bilan bir xil. ASGI ostida bu viewlar
+workerni band qilmaydi: baza va kesh kutilayotganda event loop boshqa
+so'rovlarni xizmat qiladi.
+"""
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_POST
+
+from accounts.cache import aprofile_info
+from products.models import Product
+from products.search import aget_index
+from .cart import aadd_line, acart_total, aremove_line, serialize_line
+from .views import parse_quantity
+
+
+# ==============================
+# Foydalanuvchi aktiv cartni olish
+# ==============================
+async def aget_active_cart_key(request):
+    active_key = await request.session.aget("active_cart", "cart1")
+    if active_key not in ["cart1", "cart2", "cart3"]:
+        active_key = "cart1"
+    return active_key
+
+
+# ==============================
+# Mahsulot qidiruv API
+# ==============================
+@login_required
+async def product_search_api(request):
+    q = request.GET.get('q', '').strip()
+    if not q:
+        return JsonResponse({'results': []})
+    user = await request.auser()
+    profile = await aprofile_info(user.id)
+
+    index = await aget_index(profile.id)
+    ids = index.search(q, limit=10)
+    products = await Product.objects.ain_bulk(ids)
+
+    data = [
+        {
+            'id': p.id,
+            'name': p.name,
+            'selling_price': str(p.selling_price),
+            'stock': str(p.stock),
+        }
+        for p in (products[pid] for pid in ids if pid in products)
+    ]
+    return JsonResponse({'results': data})
+
+
+# ==============================
+# Korzinkaga mahsulot qo'shish
+# ==============================
+@login_required
+@require_POST
+async def add_to_cart(request, product_id):
+    user = await request.auser()
+    active_key = await aget_active_cart_key(request)
+    product = await (
+        Product.objects.only('id', 'name', 'selling_price')
+        .filter(id=product_id, profile__user=user)
+        .afirst()
+    )
+    if product is None:
+        raise Http404("Mahsulot topilmadi")
+    quantity, error = parse_quantity(request.POST.get('quantity'))
+    if error:
+        return error
+
+    line = await aadd_line(user, active_key, product.id, product.name, product.selling_price, quantity)
+    return JsonResponse({
+        'success': True,
+        'line': serialize_line(line),
+        'cart_total': str(await acart_total(user, active_key)),
+    })
+
+
+# ==============================
+# Shtrix-kod skanerlash: qidiruv + qo'shish bitta so'rovda
+# ==============================
+@login_required
+@require_POST
+async def scan_to_cart(request):
+    code = (request.POST.get('code') or '').strip()
+    if not code:
+        return JsonResponse({'success': False, 'error': 'Kod kiritilmagan'}, status=400)
+    quantity, error = parse_quantity(request.POST.get('quantity'))
+    if error:
+        return error
+    user = await request.auser()
+    active_key = await aget_active_cart_key(request)
+
+    profile = await aprofile_info(user.id)
+    entry = (await aget_index(profile.id)).lookup_qrcode(code)
+    if entry is None:
+        return JsonResponse({'success': False, 'error': 'Mahsulot topilmadi'}, status=404)
+    product_id, name, _, selling_price = entry
+
+    line = await aadd_line(user, active_key, product_id, name, selling_price, quantity)
+    return JsonResponse({
+        'success': True,
+        'line': serialize_line(line),
+        'cart_total': str(await acart_total(user, active_key)),
+    })
+
+
+# ==============================
+# Korzinkadan mahsulot o'chirish
+# ==============================
+@login_required
+@require_POST
+async def remove_from_cart(request, product_id):
+    user = await request.auser()
+    active_key = await aget_active_cart_key(request)
+    if await aremove_line(user, active_key, product_id):
+        return JsonResponse({
+            'success': True,
+            'removed': product_id,
+            'cart_total': str(await acart_total(user, active_key)),
+        })
+    return JsonResponse({'success': False, 'error': 'Mahsulot topilmadi'}, status=404)
@@ -0,0 +1,63 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+
+
+def _round(value):
+    # Receipt.round_total bilan bir xil (migratsiyadagi tarixiy modelda metod yo'q)
+    return Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def receipt_total_chunks(receipt_model, item_model, batch_size=2000):
+    """pk tartibida bo'laklar: har bo'lakda [(receipt, to'g'ri total, to'g'ri item_count)].
+
+    Xotirada bir vaqtda faqat bitta bo'lak cheklari va ularning qatorlari turadi.
+    """
+    last = 0
+    while True:
+        receipts = list(
+            receipt_model.objects.filter(pk__gt=last).order_by('pk').only('id', 'total', 'item_count')[:batch_size]
+        )
+        if not receipts:
+            return
+        first, last = receipts[0].pk, receipts[-1].pk
+        sums = {}
+        items = (
+            item_model.objects
+            .filter(receipt_id__gte=first, receipt_id__lte=last)
+            .order_by()
+            .values_list('receipt_id', 'price', 'quantity')
+        )
+        for receipt_id, price, quantity in items:
+            total, count = sums.get(receipt_id, (Decimal('0'), 0))
+            sums[receipt_id] = (total + price * quantity, count + 1)
+        chunk = []
+        for receipt in receipts:
+            total, count = sums.get(receipt.pk, (Decimal('0'), 0))
+            chunk.append((receipt, _round(total), count))
+        yield chunk
+
+
+def backfill_receipt_totals(receipt_model, item_model, batch_size=2000, verify=False):
+    """Receipt.total va item_count ni qatorlardan to'ldiradi (verify=True - faqat tekshiradi).
+
+    Har bo'lak o'z tranzaksiyasida bulk_update qilinadi. Natija:
+    (tekshirilgan cheklar soni, mos kelmaganlar soni, birinchi 20 ta farq).
+    """
+    checked = 0
+    mismatched = 0
+    samples = []
+    for chunk in receipt_total_chunks(receipt_model, item_model, batch_size):
+        checked += len(chunk)
+        changed = []
+        for receipt, total, count in chunk:
+            if receipt.total != total or receipt.item_count != count:
+                receipt.total = total
+                receipt.item_count = count
+                changed.append(receipt)
+        mismatched += len(changed)
+        samples.extend((r.pk, r.total, r.item_count) for r in changed[:20 - len(samples)])
+        if changed and not verify:
+            with transaction.atomic():
+                receipt_model.objects.bulk_update(changed, ['total', 'item_count'])
+    return checked, mismatched, samples
@@ -0,0 +1,152 @@
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.db import OperationalError, connection, connections
+from django.test.utils import (
+    CaptureQueriesContext, setup_test_environment, teardown_test_environment,
+)
+
+from stats.metrics import percentile
+
+
+@contextmanager
+def benchmark_database(keepdb=False, verbosity=0, test_name=None):
+    """Benchmarklar ishchi bazaga tegmasligi uchun vaqtinchalik test bazasini ochadi.
+
+    test_name - test bazasi fayli (parallel yozuvchilar uchun: SQLite xotiradagi
+    bazasi oqimlar orasida jadval qulfi bilan ishlaydi).
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    if test_name:
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = test_name
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity, keepdb=keepdb)
+        teardown_test_environment()
+
+
+@contextmanager
+def disk_test_name(filename='bench.sqlite3'):
+    """Sozlamadagi TEST NAME yoki vaqtinchalik papkadagi fayl.
+
+    Xotiradagi SQLite bazasi oqimlar orasida ishlamaydi va katta hajmda
+    xotirani to'ldiradi, shuning uchun og'ir benchmarklar faylli bazada.
+    """
+    test_name = connection.settings_dict.get('TEST', {}).get('NAME')
+    if test_name:
+        yield test_name
+        return
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield str(Path(tmpdir) / filename)
+
+
+def measure(fn, repeat, setup=None):
+    """fn ni repeat marta chaqirib, latency (ms) va so'rovlar sonini qaytaradi.
+
+    setup (bo'lsa) har chaqiruvdan oldin ishlaydi va o'lchovga kirmaydi.
+    """
+    timings = []
+    queries = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(ctx.captured_queries))
+    return {
+        'runs': repeat,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': max(queries),
+    }
+
+
+def plan_problems(captured_queries, sorts=False):
+    """SELECT so'rovlari rejasidagi to'liq skan qatorlari (SQLite).
+
+    captured_queries - CaptureQueriesContext natijasi; har SELECT uchun
+    EXPLAIN QUERY PLAN olinadi. sorts=True bo'lsa vaqtinchalik B-tree bilan
+    saralash ham muammo hisoblanadi (sahifalangan ro'yxatlar tartibni indeksdan
+    olishi kerak). Bo'sh ro'yxat - hamma so'rov indeks bilan ishlaydi.
+    """
+    problems = []
+    with connection.cursor() as cursor:
+        for query in captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            for row in cursor.fetchall():
+                detail = row[-1]
+                if detail.startswith('SCAN ') or (sorts and 'TEMP B-TREE' in detail):
+                    problems.append(f'{detail}  <-  {sql}')
+    return problems
+
+
+def stress_checkouts(user, product_ids, workers=8, seconds=10.0, lines=5):
+    """workers ta oqim seconds davomida parallel checkout qiladi.
+
+    Har oqim o'z ulanishida ishlaydi. Natija: cheklar soni, sekundiga cheklar,
+    latency va "database is locked" (OperationalError) xatolari soni.
+    """
+    from .checkout import checkout
+
+    timings = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    start_barrier = threading.Barrier(workers)
+
+    def worker(number):
+        local_timings = []
+        local_errors = []
+        try:
+            start_barrier.wait()
+            i = number
+            while time.perf_counter() < deadline:
+                cart = {}
+                for k in range(lines):
+                    pid = product_ids[(i + k) % len(product_ids)]
+                    cart[pid] = {'name': f'Mahsulot {pid}', 'price': '1250.50', 'quantity': 1}
+                i += workers
+                started = time.perf_counter()
+                try:
+                    checkout(user, cart, description=f'stress {number}')
+                except OperationalError as e:
+                    local_errors.append(str(e))
+                    continue
+                local_timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connections.close_all()
+            with lock:
+                timings.extend(local_timings)
+                errors.extend(local_errors)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'workers': workers,
+        'seconds': round(elapsed, 2),
+        'checkouts': len(timings),
+        'per_second': round(len(timings) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'lock_errors': len(errors),
+        'first_error': errors[0] if errors else '',
+    }
@@ -0,0 +1,73 @@
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum, DecimalField, ExpressionWrapper
+
+from .models import CartItem, Receipt
+
+LINE_TOTAL = ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField(max_digits=20, decimal_places=4))
+
+
+def serialize_line(item):
+    return {
+        'id': item.product_id,
+        'name': item.name,
+        'price': str(item.price),
+        'quantity': str(item.quantity),
+        'total': str(item.total),
+    }
+
+
+def cart_items(user, cart_key):
+    return CartItem.objects.filter(user=user, cart_key=cart_key).order_by('id')
+
+
+def cart_total(user, cart_key):
+    total = cart_items(user, cart_key).aggregate(total=Sum(LINE_TOTAL))['total']
+    return Receipt.round_total(total or 0)
+
+
+async def acart_total(user, cart_key):
+    total = (await cart_items(user, cart_key).aaggregate(total=Sum(LINE_TOTAL)))['total']
+    return Receipt.round_total(total or 0)
+
+
+def add_line(user, cart_key, product_id, name, price, quantity):
+    """Qatorni qo'shadi yoki miqdorini oshiradi (upsert), yangilangan qatorni qaytaradi."""
+    lines = CartItem.objects.filter(user=user, cart_key=cart_key, product_id=product_id)
+    if not lines.update(quantity=F('quantity') + quantity):
+        try:
+            with transaction.atomic():
+                return CartItem.objects.create(
+                    user=user, cart_key=cart_key, product_id=product_id,
+                    name=name, price=price, quantity=quantity,
+                )
+        except IntegrityError:
+            # Parallel so'rov qatorni oldinroq yaratib qo'ygan
+            lines.update(quantity=F('quantity') + quantity)
+    return lines.get()
+
+
+# Async viewlar uchun: upsert bir nechta so'rov va savepoint - bitta oqimda bajariladi
+aadd_line = sync_to_async(add_line)
+
+
+def remove_line(user, cart_key, product_id):
+    deleted, _ = CartItem.objects.filter(user=user, cart_key=cart_key, product_id=product_id).delete()
+    return bool(deleted)
+
+
+async def aremove_line(user, cart_key, product_id):
+    deleted, _ = await CartItem.objects.filter(user=user, cart_key=cart_key, product_id=product_id).adelete()
+    return bool(deleted)
+
+
+def cart_as_dict(user, cart_key):
+    """checkout() kutgan ko'rinish: {product_id: {'name', 'price', 'quantity'}}"""
+    return {
+        str(item.product_id): {'name': item.name, 'price': item.price, 'quantity': item.quantity}
+        for item in cart_items(user, cart_key)
+    }
+
+
+def clear_cart(user, cart_key):
+    cart_items(user, cart_key).delete()
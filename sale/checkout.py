@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, When, Value, DecimalField
+
+from products.models import Product, StockMovement
+from products.stock import invalidate_low_stock, movement_rows, stock_change
+from stats.rollup import record_sales, sale_lines
+from .models import Receipt, ReceiptItem
+
+
+class CheckoutError(Exception):
+    pass
+
+
+def apply_stock_deltas(deltas):
+    """{product_id: delta} bo'yicha barcha qoldiqlarni bitta UPDATE bilan o'zgartiradi.
+
+    F() ishlatilgani uchun ikki kassa bir vaqtda sotsa ham o'zgarishlar yo'qolmaydi.
+    is_low ham shu UPDATE ichida yangilanadi.
+    """
+    if not deltas:
+        return 0
+    delta = Case(
+        *[When(pk=pid, then=Value(value)) for pid, value in deltas.items()],
+        output_field=DecimalField(max_digits=15, decimal_places=2),
+    )
+    return Product.objects.filter(pk__in=list(deltas)).update(**stock_change(delta))
+
+
+def checkout(user, cart, description=''):
+    """Korzinkadan chek yaratadi.
+
+    cart: {product_id: {'name', 'price', 'quantity'}}. Hamma yozuvlar bitta
+    tranzaksiyada: productlar bitta so'rovda, qoldiq bitta UPDATE, qatorlar
+    bitta bulk_create bilan yoziladi.
+    """
+    if not cart:
+        raise CheckoutError('Korzinka bo‘sh')
+    lines = [(int(pid), item) for pid, item in cart.items()]
+    return checkout_many(user, [{'lines': lines, 'description': description}])[0]
+
+
+def checkout_many(user, orders):
+    """Bir nechta chekni bitta tranzaksiyada yozadi (close_cart va offline yuklash).
+
+    orders: [{'lines': [(product_id, {'name', 'price', 'quantity'})], 'description',
+    'created_at'?, 'client_key'?}]. So'rovlar soni cheklar soniga bog'liq emas.
+    """
+    carts = [order['lines'] for order in orders]
+    if not any(carts):
+        return []
+
+    with transaction.atomic():
+        products = (
+            Product.objects
+            .filter(profile__user=user)
+            .only('id', 'price')
+            .in_bulk({pid for lines in carts for pid, _ in lines})
+        )
+        missing = [item['name'] for lines in carts for pid, item in lines if pid not in products]
+        if missing:
+            raise CheckoutError(f"Mahsulot topilmadi: {', '.join(missing)}")
+
+        receipts = []
+        receipt_items = []
+        rollup_lines = []
+        deltas = {}
+        costs = {pid: product.price for pid, product in products.items()}
+        for order, lines in zip(orders, carts):
+            items = []
+            total = Decimal('0')
+            for pid, item in lines:
+                qty = Decimal(str(item['quantity']))
+                price = Decimal(str(item['price']))
+                deltas[pid] = deltas.get(pid, Decimal('0')) - qty
+                total += price * qty
+                items.append(ReceiptItem(
+                    product_id=pid,
+                    product_name=item['name'],
+                    price=price,
+                    quantity=qty,
+                    cost=costs[pid],
+                ))
+            receipt = Receipt(
+                user=user,
+                description=order.get('description', ''),
+                client_key=order.get('client_key'),
+                total=Receipt.round_total(total),
+                item_count=len(items),
+            )
+            if order.get('created_at'):
+                receipt.created_at = order['created_at']
+            receipts.append(receipt)
+            receipt_items.append(items)
+            rollup_lines.extend(sale_lines(receipt, items))
+
+        Receipt.objects.bulk_create(receipts)
+        for receipt, items in zip(receipts, receipt_items):
+            for item in items:
+                item.receipt = receipt
+
+        apply_stock_deltas(deltas)
+        ReceiptItem.objects.bulk_create([item for items in receipt_items for item in items])
+        # Qoldiq jurnali: har chek uchun mahsulot bo'yicha bitta yozuv
+        movements = []
+        for receipt, items in zip(receipts, receipt_items):
+            sold = {}
+            for item in items:
+                sold[item.product_id] = sold.get(item.product_id, Decimal('0')) - item.quantity
+            movements.extend(movement_rows(sold, StockMovement.SALE, receipt))
+        StockMovement.objects.bulk_create(movements)
+        invalidate_low_stock(user.pk)
+        record_sales(user, rollup_lines)
+
+    return list(zip(receipts, receipt_items))
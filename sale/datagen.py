@@ -0,0 +1,156 @@
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from products.models import Product
+from returns.models import ReturnedProduct
+from .models import Receipt, ReceiptItem
+
+WORDS = [
+    'sut', 'non', 'guruch', 'shakar', 'choy', 'qahva', 'yog', 'un', 'makaron', 'tuz',
+    'sovun', 'shampun', 'pasta', 'suv', 'sharbat', 'pechenye', 'shokolad', 'konfet',
+    'kolbasa', 'pishloq', 'qatiq', 'tuxum', 'kartoshka', 'piyoz', 'sabzi', 'olma',
+]
+BRANDS = ['Nestle', 'Lactel', 'Makfa', 'Ariel', 'Tide', 'Coca-Cola', 'Bonaqua', 'Oq tepa', 'Musaffo']
+SIZES = ['0.5L', '1L', '1.5L', '250g', '500g', '1kg', '5kg', '10 dona']
+
+# Soat bo'yicha xaridlar ulushi: tushlik va kechki cho'qqilar
+HOUR_WEIGHTS = {
+    8: 2, 9: 4, 10: 5, 11: 7, 12: 10, 13: 9, 14: 6, 15: 5,
+    16: 6, 17: 8, 18: 11, 19: 10, 20: 7, 21: 4, 22: 2,
+}
+# Chekdagi qatorlar soni: ko'pincha 1-3 ta
+LINE_WEIGHTS = {1: 30, 2: 25, 3: 18, 4: 10, 5: 7, 6: 5, 8: 3, 12: 2}
+
+
+def ean13(body):
+    """12 raqamga EAN-13 nazorat raqamini qo'shadi"""
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def make_products(rnd, profile, count):
+    """Takrorlanmas nomli, ~90% shtrix-kodli mahsulotlar (saqlanmagan)"""
+    products = []
+    names = set()
+    for i in range(count):
+        name = f"{rnd.choice(BRANDS)} {rnd.choice(WORDS)} {rnd.choice(WORDS)} {rnd.choice(SIZES)}"
+        if name.lower() in names:
+            name = f"{name} ({i})"
+        names.add(name.lower())
+        price = Decimal(rnd.randrange(10, 1000) * 100)
+        products.append(Product(
+            profile=profile,
+            name=name,
+            price=price,
+            selling_price=(price * Decimal(rnd.choice(['1.10', '1.15', '1.20', '1.25', '1.40']))).quantize(Decimal('1')),
+            stock=Decimal(rnd.randrange(0, 200)),
+            # Tarozi mahsulotlarida shtrix-kod bo'lmaydi
+            qrcode=ean13(f"478{rnd.randrange(10 ** 9):09d}") if rnd.random() < 0.9 else None,
+        ))
+    # Tasodifan bir xil chiqqan shtrix-kodlar (profile, qrcode) unikalligini buzmasin
+    seen = set()
+    for product in products:
+        # bulk_create save() ni chaqirmaydi
+        product.is_low = Product.stock_is_low(product.stock, product.low_stock_threshold)
+        if product.qrcode in seen:
+            product.qrcode = None
+        elif product.qrcode:
+            seen.add(product.qrcode)
+    return products
+
+
+def _moments(rnd, count, days, now):
+    """count ta vaqt: oxirgi days kun ichida, soat ulushlari bo'yicha, tartiblangan"""
+    hours = list(HOUR_WEIGHTS)
+    weights = list(HOUR_WEIGHTS.values())
+    tz = timezone.get_current_timezone()
+    today = timezone.localdate(now)
+    moments = []
+    for day_offset, hour in zip(
+        (rnd.randrange(days) for _ in range(count)),
+        rnd.choices(hours, weights, k=count),
+    ):
+        day = today - timedelta(days=day_offset)
+        moment = datetime.combine(day, time(hour), tzinfo=tz) + timedelta(seconds=rnd.randrange(3600))
+        moments.append(min(moment, now))
+    moments.sort()
+    return moments
+
+
+def seed_shop(user, products=1000, receipts=10_000, returns=100, days=90, seed=1,
+              batch_size=5000, progress=None):
+    """Bitta do'konni realistik ma'lumot bilan to'ldiradi (faqat bulk_create).
+
+    Mahsulotlar mashhurligi notekis (ozchilik mahsulot ko'p sotiladi), cheklar
+    soat ulushlari bo'yicha days kunga taqsimlanadi. Bir xil seed - bir xil
+    ma'lumot. progress(bosqich, nechta) har partiyadan keyin chaqiriladi.
+    Statistika jadvali (DailySales) bu yerda yozilmaydi: stats.rollup.rebuild.
+    """
+    rnd = random.Random(seed)
+    now = timezone.now()
+    report = progress or (lambda stage, done: None)
+
+    catalog = make_products(rnd, user.profile, products)
+    for start in range(0, len(catalog), batch_size):
+        Product.objects.bulk_create(catalog[start:start + batch_size])
+        report('products', min(start + batch_size, len(catalog)))
+
+    # Mashhurlik: r**3 ro'yxat boshiga yig'iladi, ro'yxat esa aralashtirilgan
+    popular = catalog[:]
+    rnd.shuffle(popular)
+    line_counts = list(LINE_WEIGHTS)
+    line_weights = list(LINE_WEIGHTS.values())
+
+    moments = _moments(rnd, receipts, days, now)
+    for start in range(0, receipts, batch_size):
+        batch = []
+        batch_items = []
+        for created_at in moments[start:start + batch_size]:
+            items = []
+            chosen = set()
+            for _ in range(rnd.choices(line_counts, line_weights)[0]):
+                product = popular[int(len(popular) * rnd.random() ** 3)]
+                if product.id in chosen:
+                    continue
+                chosen.add(product.id)
+                quantity = Decimal(rnd.choices([1, 2, 3, 5], [70, 18, 8, 4])[0])
+                items.append(ReceiptItem(
+                    product_id=product.id,
+                    product_name=product.name,
+                    price=product.selling_price,
+                    quantity=quantity,
+                    cost=product.price,
+                ))
+            batch.append(Receipt(
+                user_id=user.id,
+                created_at=created_at,
+                ready=True,
+                total=Receipt.round_total(sum(i.price * i.quantity for i in items)),
+                item_count=len(items),
+            ))
+            batch_items.append(items)
+
+        with transaction.atomic():
+            Receipt.objects.bulk_create(batch)
+            for receipt, items in zip(batch, batch_items):
+                for item in items:
+                    item.receipt_id = receipt.id
+            ReceiptItem.objects.bulk_create([i for items in batch_items for i in items], batch_size=batch_size)
+        report('receipts', min(start + batch_size, receipts))
+
+    ReturnedProduct.objects.bulk_create([
+        ReturnedProduct(
+            user_id=user.id,
+            product_id=popular[int(len(popular) * rnd.random() ** 3)].id,
+            quantity=Decimal(1),
+            reason=rnd.choice(['', 'Yaroqlilik muddati o‘tgan', 'Qadoq buzilgan', 'Mijoz fikrini o‘zgartirdi']),
+            date=moment,
+        )
+        for moment in _moments(rnd, returns, days, now)
+    ], batch_size=batch_size)
+    report('returns', returns)
+    return catalog
@@ -0,0 +1,62 @@
+import csv
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """csv.writer uchun: yozilgan satrni shunchaki qaytaradi (buferlanmaydi)."""
+
+    def write(self, value):
+        return value
+
+
+def local_time(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+
+def stream_csv(filename, header, rows):
+    """rows generatoridan CSV ni oqim bilan beradi: xotira qatorlar soniga bog'liq emas."""
+    writer = csv.writer(Echo())
+
+    def generate():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+def receipt_rows(queryset):
+    fields = ('id', 'user__username', 'created_at', 'ready', 'item_count', 'total', 'description')
+    for rid, username, created_at, ready, item_count, total, description in (
+        queryset.order_by('-created_at', '-id').values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    ):
+        yield rid, username, local_time(created_at), ready, item_count, total, description or ''
+
+
+def receipt_item_rows(queryset):
+    fields = (
+        'receipt_id', 'receipt__created_at', 'receipt__description',
+        'product_id', 'product__qrcode', 'product_name', 'price', 'quantity',
+    )
+    for rid, created_at, description, pid, qrcode, name, price, quantity in (
+        queryset.order_by('-receipt__created_at', '-receipt_id', 'id')
+        .values_list(*fields)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    ):
+        yield (
+            rid, local_time(created_at), description or '', pid or '', qrcode or '',
+            name, price, quantity, price * quantity,
+        )
+
+
+RECEIPT_HEADER = ["ID", "User", "Created at", "Ready", "Items", "Total", "Description"]
+RECEIPT_ITEM_HEADER = [
+    "Receipt ID", "Created at", "Description", "Product ID", "QR code",
+    "Product", "Price", "Quantity", "Total",
+]
@@ -0,0 +1,47 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Case, When, Value
+
+from products.models import Product
+from sale.models import ReceiptItem
+
+
+class Command(BaseCommand):
+    help = "Eski ReceiptItem qatorlariga product ni (do'kon, nom) bo'yicha bog'laydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        linked = 0
+        for user in User.objects.filter(profile__isnull=False).only('id'):
+            pending = (
+                ReceiptItem.objects
+                .filter(receipt__user=user, product__isnull=True)
+                .values_list('product_name', flat=True)
+                .distinct()
+            )
+            names = set(pending)
+            if not names:
+                continue
+            products = {}
+            for pid, name in (
+                Product.objects
+                .filter(profile__user=user)
+                .order_by('-id')
+                .values_list('id', 'name')
+                .iterator(chunk_size=5000)
+            ):
+                if name in names:
+                    products[name] = pid  # bir xil nomlilardan eng eskisi qoladi
+
+            matched = sorted(products.items())
+            for start in range(0, len(matched), batch_size):
+                chunk = matched[start:start + batch_size]
+                linked += (
+                    ReceiptItem.objects
+                    .filter(receipt__user=user, product__isnull=True, product_name__in=[n for n, _ in chunk])
+                    .update(product=Case(*[When(product_name=n, then=Value(pid)) for n, pid in chunk]))
+                )
+        self.stdout.write(self.style.SUCCESS(f"{linked} ta qator mahsulotga bog'landi"))
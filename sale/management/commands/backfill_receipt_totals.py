@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sale.backfill import backfill_receipt_totals
+from sale.models import Receipt, ReceiptItem
+
+
+class Command(BaseCommand):
+    help = "Receipt.total va Receipt.item_count ni qatorlardan to'ldiradi yoki tekshiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help="Faqat tekshirish: farqlarni chiqaradi, hech narsa yozmaydi")
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        # Cheklar pk tartibida bo'laklab o'qiladi va har bo'lak alohida yoziladi
+        checked, mismatched, samples = backfill_receipt_totals(
+            Receipt, ReceiptItem, batch_size=options['batch_size'], verify=options['verify'],
+        )
+
+        if options['verify']:
+            for pk, total, item_count in samples:
+                self.stdout.write(f"#{pk}: total={total} item_count={item_count} bo‘lishi kerak")
+            self.stdout.write(f"Tekshirildi: {checked}, mos kelmadi: {mismatched}")
+            if mismatched:
+                raise CommandError("Receipt summalari qatorlarga mos emas")
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Tekshirildi: {checked}, yangilandi: {mismatched}"
+        ))
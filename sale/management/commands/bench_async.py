@@ -0,0 +1,235 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from products.models import Product
+from sale.bench import benchmark_database, disk_test_name, percentile
+from sale.datagen import WORDS, make_products
+from sale.models import CartItem
+
+USERNAME = 'bench_async'
+
+# Kassa oynasidagi so'rovlar ulushi: klaviatura qidiruvi ko'p, skaner va qo'shish kamroq
+MIX = [('search', 6), ('scan', 3), ('add', 1)]
+
+ENDPOINTS = {
+    'sync': {'search': 'product_search_api', 'scan': 'scan_to_cart', 'add': 'add_to_cart'},
+    'async': {'search': 'async_product_search_api', 'scan': 'async_scan_to_cart', 'add': 'async_add_to_cart'},
+}
+
+
+def plan_requests(rnd, products, count):
+    """(method, url_name, args, data) ro'yxati - sync va async uchun bir xil"""
+    kinds = [kind for kind, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    scannable = [p for p in products if p[2]]
+    plan = []
+    for kind in rnd.choices(kinds, weights, k=count):
+        if kind == 'search':
+            plan.append(('get', kind, (), {'q': rnd.choice(WORDS)[:rnd.randint(2, 5)]}))
+        elif kind == 'scan':
+            plan.append(('post', kind, (), {'code': rnd.choice(scannable)[2]}))
+        else:
+            plan.append(('post', kind, (rnd.choice(products)[0],), {'quantity': '1'}))
+    return plan
+
+
+def network_delay(seconds):
+    """Har so'rovga tarmoq kechikishini qo'shadigan execute_wrapper (tarmoqdagi
+    PostgreSQL'ga o'xshatish uchun: kutish paytida oqim GIL'ni bo'shatadi)."""
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+def summarize(mode, clients, timings, errors, elapsed):
+    return {
+        'mode': mode,
+        'clients': clients,
+        'requests': len(timings),
+        'seconds': round(elapsed, 2),
+        'per_second': round(len(timings) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else '',
+    }
+
+
+def run_sync(user, plans, workers):
+    """Har mijoz o'z oqimida; bir vaqtda faqat workers ta so'rov bajariladi (WSGI workerlar).
+
+    Latency navbatda kutishni ham o'z ichiga oladi - mijoz shuni his qiladi.
+    """
+    pool = threading.BoundedSemaphore(workers)
+    timings = []
+    errors = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(len(plans) + 1)
+
+    def client_thread(number, plan):
+        local_timings = []
+        local_errors = []
+        try:
+            client = Client()
+            client.force_login(user)
+            start_barrier.wait()
+            for method, kind, args, data in plan:
+                url = reverse(ENDPOINTS['sync'][kind], args=args)
+                started = time.perf_counter()
+                try:
+                    with pool:
+                        response = getattr(client, method)(url, data)
+                except Exception as e:
+                    local_errors.append(f"{type(e).__name__}: {e}")
+                    continue
+                local_timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    local_errors.append(f"{kind}: HTTP {response.status_code}")
+        finally:
+            connections.close_all()
+            with lock:
+                timings.extend(local_timings)
+                errors.extend(local_errors)
+
+    threads = [threading.Thread(target=client_thread, args=(n, plan)) for n, plan in enumerate(plans)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return timings, errors, time.perf_counter() - started
+
+
+def run_async(user, plans):
+    """Barcha mijozlar bitta event loop'da; har so'rov ASGIHandler kabi o'z
+    ThreadSensitiveContext'ida (sinxron ORM chaqiruvlari uchun alohida oqim)."""
+    timings = []
+    errors = []
+
+    async def in_context(coro_fn, *args):
+        async with ThreadSensitiveContext():
+            try:
+                return await coro_fn(*args)
+            finally:
+                # Haqiqiy ASGI serverda request_finished ulanishni yopadi
+                await sync_to_async(connections.close_all)()
+
+    async def run_client(client, plan):
+        for method, kind, args, data in plan:
+            url = reverse(ENDPOINTS['async'][kind], args=args)
+            started = time.perf_counter()
+            try:
+                response = await in_context(getattr(client, method), url, data)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                continue
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors.append(f"{kind}: HTTP {response.status_code}")
+
+    async def main():
+        clients = [AsyncClient() for _ in plans]
+        await asyncio.gather(*(in_context(client.aforce_login, user) for client in clients))
+        started = time.perf_counter()
+        await asyncio.gather(*(run_client(client, plan) for client, plan in zip(clients, plans)))
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(main())
+    return timings, errors, elapsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Sync va async (ASGI) kassa endpointlari: qidiruv, skaner, korzinkaga qo'shish. "
+        "N ta parallel mijoz; sync viewlar --workers ta WSGI worker bilan cheklanadi, "
+        "async viewlar bitta event loop'da. Sekundiga so'rovlar va p50/p95 latency. "
+        "Parallel yozuvlar uchun DB_PROFILE=production bilan ishga tushiring."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', default='50,100,200', help="Vergul bilan: parallel mijozlar soni")
+        parser.add_argument('--requests', type=int, default=10, help="Har mijoz uchun so'rovlar")
+        parser.add_argument('--workers', type=int, default=4, help="Sync uchun WSGI workerlar soni")
+        parser.add_argument('--products', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--db-latency', type=float, default=0.0,
+            help="Har SQL so'rovga qo'shiladigan kechikish, ms (tarmoqdagi baza; SQLite fayli uchun 0)",
+        )
+        parser.add_argument('--json', action='store_true', help="Natijani JSON ko'rinishida chiqarish")
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(n) for n in options['clients'].split(',') if n.strip()]
+        except ValueError:
+            raise CommandError("--clients: butun sonlar vergul bilan, masalan 50,100,200")
+        if not levels or min(levels) < 1:
+            raise CommandError("--clients: kamida bitta musbat son")
+
+        delay = network_delay(options['db_latency'] / 1000)
+
+        def add_delay(sender, connection, **kwargs):
+            connection.execute_wrappers.append(delay)
+
+        results = []
+        with disk_test_name('bench_async.sqlite3') as test_name, benchmark_database(test_name=test_name):
+            rnd = random.Random(options['seed'])
+            user = User.objects.create_user(USERNAME, password='bench')
+            catalog = Product.objects.bulk_create(make_products(rnd, user.profile, options['products']))
+            products = [(p.id, p.name, p.qrcode, p.selling_price) for p in catalog]
+
+            # Yangi ulanishlarga (har oqim / har async so'rov) kechikish qo'shiladi
+            if options['db_latency']:
+                connection_created.connect(add_delay)
+            # 500 javoblar xatolar soniga kiradi, har birining tracebacki shart emas
+            logging.getLogger('django.request').disabled = True
+            for clients in levels:
+                plans = [plan_requests(rnd, products, options['requests']) for _ in range(clients)]
+                for mode in ('sync', 'async'):
+                    CartItem.objects.filter(user=user).delete()
+                    if mode == 'sync':
+                        timings, errors, elapsed = run_sync(user, plans, options['workers'])
+                    else:
+                        timings, errors, elapsed = run_async(user, plans)
+                    result = summarize(mode, clients, timings, errors, elapsed)
+                    results.append(result)
+                    self.stderr.write(f"  {clients} mijoz, {mode}: {result['per_second']} so‘rov/s")
+            connection_created.disconnect(add_delay)
+            logging.getLogger('django.request').disabled = False
+            CartItem.objects.filter(user=user).delete()
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'db_profile': settings.DB_PROFILE,
+                'workers': options['workers'],
+                'db_latency_ms': options['db_latency'],
+                'requests_per_client': options['requests'],
+                'results': results,
+            }, indent=2))
+            return
+        self.stdout.write(
+            f"{'mijozlar':>8} {'rejim':>6} {'so‘rov/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'xatolar':>8}"
+        )
+        for r in results:
+            self.stdout.write(
+                f"{r['clients']:>8} {r['mode']:>6} {r['per_second']:>9} {r['p50_ms']:>9} "
+                f"{r['p95_ms']:>9} {r['errors']:>8}"
+            )
+        first_error = next((r['first_error'] for r in results if r['first_error']), '')
+        if first_error:
+            self.stderr.write(f"Birinchi xato: {first_error}")
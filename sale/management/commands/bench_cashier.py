@@ -0,0 +1,183 @@
+import json
+import random
+import subprocess
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Product
+from sale.bench import benchmark_database, disk_test_name, measure
+from sale.datagen import BRANDS, WORDS, seed_shop
+from sale.models import CartItem, Receipt
+from sale.pagination import encode_cursor
+from stats.cache import dashboard_cache
+from stats.rollup import rebuild
+
+USERNAME = 'bench_cashier'
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+class Command(BaseCommand):
+    help = (
+        "Kassir ish jarayoni benchmarki: realistik do'kon (100k mahsulot, 1M chek, qaytarishlar) "
+        "ustida haqiqiy viewlar test client orqali. Har endpoint uchun p50/p95 va so'rovlar soni, "
+        "natija JSON faylga (commitlar orasida solishtirish uchun)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--receipts', type=int, default=1_000_000)
+        parser.add_argument('--returns', type=int, default=10_000)
+        parser.add_argument('--days', type=int, default=90)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--output', help="Natija JSON fayli")
+        parser.add_argument('--compare', help="Oldingi natija JSON fayli bilan solishtirish")
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help="Test bazasini saqlab qolish (TEST NAME kerak, masalan DB_PROFILE=production); "
+                 "keyingi ishga tushirishda ma'lumot qayta yaratilmaydi",
+        )
+
+    def log(self, message):
+        self.stderr.write(message)
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)['results']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Solishtirish fayli o‘qilmadi: {e}")
+
+        with disk_test_name('bench_cashier.sqlite3') as test_name, \
+                benchmark_database(keepdb=options['keepdb'], test_name=test_name):
+            user = User.objects.filter(username=USERNAME).first()
+            if user is None:
+                user = self.seed(options)
+            else:
+                self.log("Mavjud test bazasidagi ma'lumot ishlatiladi")
+            results = self.run_suite(user, options['repeat'], random.Random(options['seed']))
+            data = {
+                'commit': git_commit(),
+                'created_at': timezone.now().isoformat(),
+                'db_profile': settings.DB_PROFILE,
+                'dataset': {
+                    'products': Product.objects.filter(profile__user=user).count(),
+                    'receipts': Receipt.objects.filter(user=user).count(),
+                    'seed': options['seed'],
+                },
+                'repeat': options['repeat'],
+                'results': results,
+            }
+
+        self.print_table(results, baseline)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(data, f, indent=2)
+            self.log(f"Natija yozildi: {options['output']}")
+
+    def seed(self, options):
+        user = User.objects.create_user(USERNAME, password='bench')
+        started = time.perf_counter()
+        last = {}
+
+        def progress(stage, done):
+            if stage == 'products' and done < options['products']:
+                return
+            if stage != 'receipts' or done - last.get(stage, 0) >= 100_000 or done == options['receipts']:
+                last[stage] = done
+                self.log(f"  {stage}: {done} ({time.perf_counter() - started:.0f} s)")
+
+        seed_shop(
+            user, products=options['products'], receipts=options['receipts'],
+            returns=options['returns'], days=options['days'], seed=options['seed'], progress=progress,
+        )
+        rebuild(users=[user])
+        self.log(f"Ma'lumot tayyor: {time.perf_counter() - started:.0f} s")
+        return user
+
+    def run_suite(self, user, repeat, rnd):
+        client = Client()
+        client.force_login(user)
+        products = list(
+            Product.objects.filter(profile__user=user).values_list('id', 'name', 'qrcode', 'selling_price')
+        )
+        scannable = [p for p in products if p[2]]
+        terms = [rnd.choice(WORDS) for _ in range(repeat)] + [rnd.choice(BRANDS)[:3] for _ in range(repeat)]
+        today = timezone.localdate()
+        month = {'start_date': (today - timedelta(days=30)).isoformat(), 'end_date': today.isoformat()}
+        deep = Receipt.objects.filter(user=user).order_by('-created_at', '-id')[10_000:10_001].first()
+        deep_cursor = encode_cursor(deep.created_at, deep.id) if deep else ''
+
+        def ok(response):
+            assert response.status_code in (200, 302), response.status_code
+            return response
+
+        def clear_cart():
+            CartItem.objects.filter(user=user).delete()
+
+        def fill_cart():
+            clear_cart()
+            CartItem.objects.bulk_create([
+                CartItem(user=user, cart_key='cart1', product_id=pid, name=name, price=price, quantity=Decimal('1'))
+                for pid, name, _, price in rnd.sample(products, 5)
+            ])
+
+        term_iter = iter(terms * 2)
+        cases = [
+            ('search', None, lambda: ok(client.get(reverse('product_search_api'), {'q': next(term_iter)}))),
+            ('scan', clear_cart, lambda: ok(client.post(reverse('scan_to_cart'), {'code': rnd.choice(scannable)[2]}))),
+            ('add_to_cart', clear_cart, lambda: ok(client.post(
+                reverse('add_to_cart', args=[rnd.choice(products)[0]]), {'quantity': '1'},
+            ))),
+            ('close_cart', fill_cart, lambda: ok(client.post(reverse('close_cart'), {'description': 'bench'}))),
+            ('receipt_list', None, lambda: ok(client.get(reverse('receipt_list')))),
+            ('receipt_list_deep', None, lambda: ok(client.get(reverse('receipt_list'), {'after': deep_cursor}))),
+            ('dashboard', dashboard_cache.clear, lambda: ok(client.get(reverse('dashboard'), month))),
+            ('dashboard_cached', None, lambda: ok(client.get(reverse('dashboard'), month))),
+            ('return', None, lambda: ok(client.post(
+                reverse('return_page'), {'product': rnd.choice(products)[0], 'quantity': '1'},
+            ))),
+            ('returned_list', None, lambda: ok(client.get(reverse('returned_list'), month))),
+        ]
+
+        results = {}
+        for name, setup, fn in cases:
+            # Birinchi chaqiruv: qidiruv indeksi, keshlar va sessiya isitiladi
+            if setup:
+                setup()
+            fn()
+            results[name] = measure(fn, repeat, setup=setup)
+            self.log(f"  {name}: p50 {results[name]['p50_ms']} ms")
+        clear_cart()
+        return results
+
+    def print_table(self, results, baseline=None):
+        header = f"{'endpoint':<18} {'so‘rovlar':>9} {'p50 ms':>9} {'p95 ms':>9}"
+        if baseline:
+            header += f" {'oldingi p50':>12} {'farq':>8}"
+        self.stdout.write(header)
+        for name, result in results.items():
+            line = f"{name:<18} {result['queries']:>9} {result['p50_ms']:>9} {result['p95_ms']:>9}"
+            old = (baseline or {}).get(name)
+            if old:
+                change = (result['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0
+                line += f" {old['p50_ms']:>12} {change:>+7.1f}%"
+            self.stdout.write(line)
@@ -0,0 +1,62 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from products.models import Product
+from sale.bench import benchmark_database, measure
+from sale.models import CartItem
+
+
+class Command(BaseCommand):
+    help = "close_cart uchun chekdagi so'rovlar soni va latency (1, 20, 100 qatorli korzinkalar)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,20,100', help="Korzinka qatorlari soni, vergul bilan")
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--keepdb', action='store_true')
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        with benchmark_database(keepdb=options['keepdb']):
+            user = User.objects.create_user('bench_checkout', password='bench')
+            products = Product.objects.bulk_create([
+                Product(
+                    profile=user.profile,
+                    name=f"Mahsulot {i}",
+                    price=Decimal('1000'),
+                    selling_price=Decimal('1250.50'),
+                    stock=Decimal('1000000'),
+                    qrcode=f"478{i:010d}",
+                )
+                for i in range(max(sizes))
+            ])
+            client = Client()
+            client.force_login(user)
+            url = reverse('close_cart')
+
+            self.stdout.write(f"{'qatorlar':>9} {'so‘rovlar':>10} {'p50 ms':>9} {'p95 ms':>9} {'o‘rtacha':>9}")
+            for size in sizes:
+                def fill_cart():
+                    CartItem.objects.bulk_create([
+                        CartItem(
+                            user=user, cart_key='cart1', product=p,
+                            name=p.name, price=p.selling_price, quantity=Decimal('2'),
+                        )
+                        for p in products[:size]
+                    ])
+
+                def run():
+                    response = client.post(url, {'description': 'bench'})
+                    assert response.json()['success'], response.content
+
+                # Birinchi so'rov keshlar va sessiya uchun
+                fill_cart()
+                run()
+                result = measure(run, options['repeat'], setup=fill_cart)
+                self.stdout.write(
+                    f"{size:>9} {result['queries']:>10} {result['p50_ms']:>9} "
+                    f"{result['p95_ms']:>9} {result['mean_ms']:>9}"
+                )
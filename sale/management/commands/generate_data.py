@@ -0,0 +1,82 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from products.search import invalidate
+from sale.datagen import seed_shop
+from stats.cache import bump_sales_version
+from stats.rollup import rebuild
+
+LOCATIONS = ['Chilonzor', 'Yunusobod', 'Sergeli', 'Mirzo Ulug‘bek', 'Olmazor', 'Yakkasaroy', 'Samarqand', 'Namangan']
+
+
+class Command(BaseCommand):
+    help = (
+        "Masshtab sinovi uchun sintetik ma'lumot: N ta do'kon (user + profil), mahsulotlar, "
+        "bir necha oylik cheklar, qatorlar va qaytarishlar. Hammasi bulk_create bilan; "
+        "bir xil --seed bir xil ma'lumot beradi. Joriy (sozlamadagi) bazaga yozadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shops', type=int, default=1)
+        parser.add_argument('--products', type=int, default=10_000, help="Har do'kon uchun")
+        parser.add_argument('--receipts', type=int, default=100_000, help="Har do'kon uchun")
+        parser.add_argument('--returns', type=int, default=1_000, help="Har do'kon uchun")
+        parser.add_argument('--months', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='shop', help="Foydalanuvchi nomlari: <prefix>1, <prefix>2, ...")
+        parser.add_argument('--password', default='parol123')
+
+    def handle(self, *args, **options):
+        usernames = [f"{options['prefix']}{n}" for n in range(1, options['shops'] + 1)]
+        existing = list(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        if existing:
+            raise CommandError(f"Bu foydalanuvchilar allaqachon bor: {', '.join(existing)} (--prefix ni o‘zgartiring)")
+
+        rnd = random.Random(options['seed'])
+        started = time.perf_counter()
+        for number, username in enumerate(usernames, start=1):
+            user = User.objects.create_user(username, password=options['password'])
+            profile = user.profile
+            profile.name = f"{rnd.choice(['Baraka', 'Oila', 'Korzinka', 'Makro', 'Havas'])} {number}"
+            profile.location = rnd.choice(LOCATIONS)
+            profile.save(update_fields=['name', 'location'])
+
+            shop_started = time.perf_counter()
+            last = {}
+
+            step = max(options['receipts'] // 10, 1)
+
+            def progress(stage, done):
+                # Cheklar uchun har ~10% da bir qator
+                if stage == 'products' and done < options['products']:
+                    return
+                if stage != 'receipts' or done - last.get(stage, 0) >= step or done == options['receipts']:
+                    last[stage] = done
+                    self.stdout.write(f"  {username} {stage}: {done} ({time.perf_counter() - shop_started:.0f} s)")
+
+            seed_shop(
+                user,
+                products=options['products'],
+                receipts=options['receipts'],
+                returns=options['returns'],
+                days=options['months'] * 30,
+                # Har do'kon o'z seed'i bilan: do'konlar bir-birini takrorlamaydi
+                seed=options['seed'] * 1000 + number,
+                batch_size=options['batch_size'],
+                progress=progress,
+            )
+            # bulk_create signal bermaydi: statistika va keshlar qo'lda yangilanadi
+            rebuild(users=[user])
+            invalidate(profile.id)
+            bump_sales_version(user.id)
+            self.stdout.write(self.style.SUCCESS(
+                f"{username}: tayyor ({time.perf_counter() - shop_started:.0f} s)"
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(usernames)} ta do‘kon, jami {time.perf_counter() - started:.0f} s"
+        ))
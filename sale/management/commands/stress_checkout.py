@@ -0,0 +1,52 @@
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from products.models import Product
+from sale.bench import benchmark_database, disk_test_name, stress_checkouts
+
+
+class Command(BaseCommand):
+    help = (
+        "Parallel kassalar: bir nechta oqim bir vaqtda checkout qiladi, sekundiga cheklar "
+        "va \"database is locked\" xatolari soni. DB_PROFILE=production bilan solishtiring."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10.0)
+        parser.add_argument('--lines', type=int, default=5, help="Har chekdagi qatorlar soni")
+        parser.add_argument('--products', type=int, default=200)
+        parser.add_argument('--json', action='store_true', help="Natijani JSON ko'rinishida chiqarish")
+
+    def handle(self, *args, **options):
+        with disk_test_name('stress.sqlite3') as test_name, benchmark_database(test_name=test_name):
+            user = User.objects.create_user('stress_checkout', password='stress')
+            products = Product.objects.bulk_create([
+                Product(
+                    profile=user.profile,
+                    name=f"Mahsulot {i}",
+                    price=Decimal('1000'),
+                    selling_price=Decimal('1250.50'),
+                    stock=Decimal('1000000'),
+                )
+                for i in range(options['products'])
+            ])
+            result = stress_checkouts(
+                user, [p.id for p in products],
+                workers=options['workers'], seconds=options['seconds'], lines=options['lines'],
+            )
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                result['journal_mode'] = cursor.fetchone()[0]
+            result['db_profile'] = settings.DB_PROFILE
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+        for key, value in result.items():
+            self.stdout.write(f"{key:>13}: {value}")
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_alter_product_qrcode_alter_product_unique_together'),
+        ('sale', '0008_receipt_client_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receiptitem',
+            name='product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='receipt_items', to='products.product'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_profile_name_idx'),
+        ('sale', '0009_receiptitem_product'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['user', 'created_at'], name='receipt_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receiptitem',
+            index=models.Index(fields=['receipt', 'product_name'], name='receiptitem_receipt_name_idx'),
+        ),
+    ]
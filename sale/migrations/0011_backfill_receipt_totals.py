@@ -0,0 +1,49 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def backfill(apps, schema_editor):
+    # 0006 dan oldingi cheklar total=0, item_count=0 bilan qolgan. Ilova kodi
+    # (sale.backfill) import qilinmaydi: u keyin o'zgarsa migratsiya o'zgarmasin
+    Receipt = apps.get_model('sale', 'Receipt')
+    ReceiptItem = apps.get_model('sale', 'ReceiptItem')
+    last = 0
+    while True:
+        receipts = list(Receipt.objects.filter(pk__gt=last).order_by('pk').only('id', 'total', 'item_count')[:BATCH_SIZE])
+        if not receipts:
+            break
+        first, last = receipts[0].pk, receipts[-1].pk
+        sums = {}
+        items = (
+            ReceiptItem.objects
+            .filter(receipt_id__gte=first, receipt_id__lte=last)
+            .order_by()
+            .values_list('receipt_id', 'price', 'quantity')
+        )
+        for receipt_id, price, quantity in items:
+            total, count = sums.get(receipt_id, (Decimal('0'), 0))
+            sums[receipt_id] = (total + price * quantity, count + 1)
+
+        changed = []
+        for receipt in receipts:
+            total, count = sums.get(receipt.pk, (Decimal('0'), 0))
+            total = total.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            if receipt.total != total or receipt.item_count != count:
+                receipt.total = total
+                receipt.item_count = count
+                changed.append(receipt)
+        Receipt.objects.bulk_update(changed, ['total', 'item_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sale', '0010_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_cost(apps, schema_editor):
+    # Eski qatorlar uchun sotuvdagi narx saqlanmagan: eng yaqini - hozirgi kelgan narx.
+    # Bir marta yoziladi, keyingi narx o'zgarishlari statistikani o'zgartirmaydi
+    ReceiptItem = apps.get_model('sale', 'ReceiptItem')
+    Product = apps.get_model('products', 'Product')
+    price = Product.objects.filter(pk=OuterRef('product_id')).values('price')[:1]
+    last_pk = 0
+    while True:
+        pks = list(
+            ReceiptItem.objects
+            .filter(pk__gt=last_pk, cost__isnull=True, product__isnull=False)
+            .order_by('pk').values_list('pk', flat=True)[:2000]
+        )
+        if not pks:
+            break
+        ReceiptItem.objects.filter(pk__in=pks).update(cost=Subquery(price))
+        last_pk = pks[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_alter_product_qrcode_alter_product_unique_together'),
+        ('sale', '0011_backfill_receipt_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receiptitem',
+            name='cost',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_cost, migrations.RunPython.noop),
+    ]
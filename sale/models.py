@@ -1,12 +1,29 @@
+from decimal import Decimal, ROUND_HALF_UP
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from products.models import Product
 
+# BigAutoField (DEFAULT_AUTO_FIELD) chegarasi: kattaroq id ORM so'rovida OverflowError beradi
+MAX_ID = 2 ** 63 - 1
+
 class Receipt(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     description = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now)
     ready = models.BooleanField(default=False)
+    # Yozish paytida to'ldiriladi: ro'yxat va eksportlar qatorlarni aylanib chiqmaydi
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    item_count = models.PositiveIntegerField(default=0)
+    # Offline kassa yuborgan idempotentlik kaliti: qayta yuborilsa dublikat bo'lmaydi
+    client_key = models.CharField(max_length=64, blank=True, null=True)
+
+    class Meta:
+        unique_together = (('user', 'client_key'),)
+        indexes = [
+            # Cheklar ro'yxati va eksport: user bo'yicha, sana oralig'i va tartibi
+            models.Index(fields=['user', 'created_at'], name='receipt_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"Receipt #{self.id} - {self.user.username}"
@@ -14,11 +31,33 @@ class Receipt(models.Model):
     def get_total(self):
         return sum(item.price * item.quantity for item in self.items.all())
 
+    @staticmethod
+    def round_total(value):
+        return Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+    def update_totals(self, save=True):
+        """total va item_count ni qatorlardan qayta hisoblaydi."""
+        items = list(self.items.values_list('price', 'quantity'))
+        self.total = self.round_total(sum((price * qty for price, qty in items), Decimal('0')))
+        self.item_count = len(items)
+        if save:
+            self.save(update_fields=['total', 'item_count'])
+
 class ReceiptItem(models.Model):
     receipt = models.ForeignKey(Receipt, on_delete=models.CASCADE, related_name='items')
+    # Statistika nom bo'yicha emas, id bo'yicha bog'lanadi (nom o'zgarsa ham)
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='receipt_items')
     product_name = models.CharField(max_length=150)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    # Sotuv paytidagi kelgan narx: foyda keyin mahsulot narxi o'zgarsa ham shu bilan hisoblanadi
+    cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Chek qatorlari (prefetch, eksport) va statistikani qayta qurish
+            models.Index(fields=['receipt', 'product_name'], name='receiptitem_receipt_name_idx'),
+        ]
 
     def __str__(self):
         return f"{self.product_name} x {self.quantity}"
@@ -26,3 +65,23 @@ class ReceiptItem(models.Model):
     @property
     def total(self):
         return self.price * self.quantity
+
+
+class CartItem(models.Model):
+    """Ochiq korzinka qatori. Har skanerlashda faqat bitta qator yoziladi."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cart_items')
+    cart_key = models.CharField(max_length=10)  # cart1, cart2, cart3
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    name = models.CharField(max_length=150)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        unique_together = (('user', 'cart_key', 'product'),)
+
+    def __str__(self):
+        return f"{self.cart_key}: {self.name} x {self.quantity}"
+
+    @property
+    def total(self):
+        return self.price * self.quantity
@@ -0,0 +1,149 @@
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from products.models import Product
+from .checkout import checkout_many
+from .models import MAX_ID, Receipt, ReceiptItem
+
+MAX_BATCH = 500
+# Kassa soati serverdan biroz oldinda bo'lishi mumkin
+CLOCK_SKEW = timedelta(minutes=5)
+
+
+class OfflineBatchError(Exception):
+    pass
+
+
+def _fits(model, field, value):
+    """Qiymat ustunning max_digits/decimal_places chegarasiga sig'adimi (DecimalValidator)"""
+    try:
+        model._meta.get_field(field).run_validators(value)
+    except ValidationError:
+        return False
+    return True
+
+
+def _parse_receipt(data):
+    """Bitta offline chekni tekshiradi: (order, None) yoki (None, xato matni)"""
+    lines = data.get('lines')
+    if not isinstance(lines, list) or not lines:
+        return None, 'Chekda qatorlar yo‘q'
+
+    created_at = None
+    if data.get('created_at'):
+        try:
+            # Format to'g'ri, lekin sana yo'q (2024-13-45) bo'lsa ValueError
+            created_at = parse_datetime(str(data['created_at']))
+        except ValueError:
+            created_at = None
+        if created_at is None:
+            return None, 'created_at noto‘g‘ri'
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at)
+        if created_at > timezone.now() + CLOCK_SKEW:
+            return None, 'created_at kelajakda'
+
+    parsed = []
+    for line in lines:
+        try:
+            pid = int(line['product_id'])
+            qty = Decimal(str(line.get('quantity', '1')).replace(',', '.'))
+            price = Decimal(str(line['price'])) if line.get('price') is not None else None
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+            return None, 'Qator noto‘g‘ri'
+        if not 0 < pid <= MAX_ID:
+            return None, f"Mahsulot topilmadi: {pid}"
+        if not qty.is_finite() or qty <= 0 or (price is not None and (not price.is_finite() or price < 0)):
+            return None, 'Qator noto‘g‘ri'
+        # Bazaga sig'maydigan son butun paketni emas, faqat shu chekni rad etadi
+        if not _fits(ReceiptItem, 'quantity', qty) or (price is not None and not _fits(ReceiptItem, 'price', price)):
+            return None, 'Miqdor yoki narx juda katta yoki kasr qismi uzun'
+        parsed.append((pid, {'quantity': qty, 'price': price}))
+
+    return {
+        'lines': parsed,
+        'description': str(data.get('description') or '').strip(),
+        'created_at': created_at,
+        'client_key': data['key'],
+    }, None
+
+
+def sync_offline_receipts(user, receipts):
+    """Offline kassada yig'ilgan cheklarni bitta tranzaksiyada yozadi.
+
+    Har chek 'key' (kassa yaratgan idempotentlik kaliti) bilan keladi: shu kalit
+    bilan chek allaqachon bo'lsa, u qayta yozilmaydi. Natija kirish tartibida:
+    [{'key', 'status': 'created' | 'duplicate' | 'error', 'receipt_id'?, 'error'?}]
+    """
+    if not isinstance(receipts, list):
+        raise OfflineBatchError('receipts ro‘yxat bo‘lishi kerak')
+    if len(receipts) > MAX_BATCH:
+        raise OfflineBatchError(f"Bir so‘rovda {MAX_BATCH} tadan ko‘p chek yuborib bo‘lmaydi")
+
+    results = []
+    orders = []
+    seen = set()
+    for data in receipts:
+        key = data.get('key') if isinstance(data, dict) else None
+        if not isinstance(key, str) or not key or len(key) > 64:
+            results.append({'key': key, 'status': 'error', 'error': 'key noto‘g‘ri'})
+            continue
+        if key in seen:
+            results.append({'key': key, 'status': 'duplicate'})
+            continue
+        seen.add(key)
+        order, error = _parse_receipt(data)
+        if error:
+            results.append({'key': key, 'status': 'error', 'error': error})
+            continue
+        result = {'key': key, 'status': 'created'}
+        results.append(result)
+        orders.append((order, result))
+
+    # Oldin yuklangan kalitlar bitta so'rov bilan
+    existing = dict(
+        Receipt.objects
+        .filter(user=user, client_key__in=[order['client_key'] for order, _ in orders])
+        .values_list('client_key', 'id')
+    )
+    products = (
+        Product.objects
+        .filter(profile__user=user)
+        .only('id', 'name', 'selling_price')
+        .in_bulk({pid for order, _ in orders for pid, _ in order['lines']})
+    )
+
+    pending = []
+    for order, result in orders:
+        if order['client_key'] in existing:
+            result.update(status='duplicate', receipt_id=existing[order['client_key']])
+            continue
+        missing = [str(pid) for pid, _ in order['lines'] if pid not in products]
+        if missing:
+            result.update(status='error', error=f"Mahsulot topilmadi: {', '.join(missing)}")
+            continue
+        for pid, item in order['lines']:
+            product = products[pid]
+            item['name'] = product.name
+            if item['price'] is None:
+                item['price'] = product.selling_price
+        total = Receipt.round_total(sum(item['price'] * item['quantity'] for _, item in order['lines']))
+        if not _fits(Receipt, 'total', total):
+            result.update(status='error', error='Chek summasi juda katta')
+            continue
+        pending.append((order, result))
+
+    try:
+        created = checkout_many(user, [order for order, _ in pending])
+    except IntegrityError:
+        # Xuddi shu kalitlar bilan parallel yuklash: hech narsa yozilmadi, qayta yuborish kifoya
+        raise OfflineBatchError('Cheklar parallel yuklanmoqda, qayta urinib ko‘ring')
+    for (_, result), (receipt, _) in zip(pending, created):
+        result['receipt_id'] = receipt.id
+
+    return results
@@ -0,0 +1,107 @@
+import base64
+import binascii
+
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+def encode_cursor(value, pk):
+    raw = f"{value.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Kursordan (datetime, pk); noto'g'ri yoki bo'sh bo'lsa None (birinchi sahifa)."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        value, pk = raw.rsplit('|', 1)
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if value is None:
+        return None
+    return value, pk
+
+
+class KeysetPage:
+    """Bitta sahifa. Jami soni (total) faqat so'ralganda hisoblanadi."""
+
+    def __init__(self, queryset, object_list, field, has_next, has_previous):
+        self._queryset = queryset
+        self.object_list = object_list
+        self.field = field
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def _cursor(self, obj):
+        return encode_cursor(getattr(obj, self.field), obj.pk)
+
+    @property
+    def next_cursor(self):
+        return self._cursor(self.object_list[-1]) if self.has_next else ''
+
+    @property
+    def previous_cursor(self):
+        return self._cursor(self.object_list[0]) if self.has_previous else ''
+
+    @cached_property
+    def total(self):
+        return self._queryset.count()
+
+
+def keyset_paginate(queryset, field, params, per_page=20):
+    """(field, id) bo'yicha kamayish tartibida kursorli sahifalash.
+
+    OFFSET va har sahifada COUNT(*) yo'q: sahifa indeksdagi kursor o'rnidan
+    boshlab per_page + 1 qator o'qiydi, shuning uchun 500-sahifa ham 1-sahifa
+    kabi tez. params dagi 'after' keyingi, 'before' oldingi sahifaga olib boradi.
+    """
+    before = decode_cursor(params.get('before'))
+    after = None if before else decode_cursor(params.get('after'))
+
+    if before:
+        value, pk = before
+        rows = list(
+            queryset
+            .filter(**{f'{field}__gte': value})
+            .exclude(**{field: value, 'pk__lte': pk})
+            .order_by(field, 'pk')[:per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        rows = queryset.order_by(f'-{field}', '-pk')
+        if after:
+            value, pk = after
+            rows = rows.filter(**{f'{field}__lte': value}).exclude(**{field: value, 'pk__gte': pk})
+        rows = list(rows[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = after is not None
+
+    return KeysetPage(queryset, rows, field, has_next, has_previous)
+
+
+def page_query(params):
+    """Sahifa havolalari uchun filter parametrlari (kursorlarsiz).
+
+    count ham tushiriladi: u faqat so'ralgan sahifada jami sonni ko'rsatadi,
+    keyingi/oldingi sahifalarda har safar COUNT(*) bajarilmasin.
+    """
+    params = params.copy()
+    for key in ('after', 'before', 'page', 'count'):
+        params.pop(key, None)
+    return params.urlencode()
@@ -1,3 +1,365 @@
-from django.test import TestCase
+import html
+import io
+import json
+import re
+import unittest
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Product
+from .bench import plan_problems, stress_checkouts
+from stats.metrics import request_metrics
+from .checkout import checkout
+from .models import CartItem, Receipt, ReceiptItem
+from .offline import sync_offline_receipts
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN faqat SQLite uchun')
+class ReceiptQueryPlanTests(TestCase):
+    """Cheklar ro'yxati va eksport so'rovlari to'liq skanga tushmasligi kerak."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('kassir', password='parol')
+        product = Product.objects.create(
+            profile=self.user.profile, name='Non', price=Decimal('3000'),
+            selling_price=Decimal('4000'), stock=Decimal('100'),
+        )
+        for _ in range(3):
+            checkout(self.user, {product.id: {'name': 'Non', 'price': '4000', 'quantity': 1}})
+        self.client.force_login(self.user)
+        today = timezone.localdate()
+        self.params = {
+            'start_date': (today - timedelta(days=7)).isoformat(),
+            'end_date': today.isoformat(),
+            'ready': 'false',
+        }
+
+    def assertIndexed(self, url, params, sorts=False):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+            if hasattr(response, 'streaming_content'):
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(plan_problems(ctx.captured_queries, sorts), [])
+
+    def test_receipt_list(self):
+        # Sahifalash tartibi ham indeksdan olinadi
+        self.assertIndexed(reverse('receipt_list'), {}, sorts=True)
+        self.assertIndexed(reverse('receipt_list'), self.params, sorts=True)
+        page = self.client.get(reverse('receipt_list')).context['page_obj']
+        self.assertIndexed(reverse('receipt_list'), {'after': page._cursor(page.object_list[0])}, sorts=True)
+        self.assertIndexed(reverse('receipt_list'), {'before': page._cursor(page.object_list[-1])}, sorts=True)
+
+    def test_receipt_exports(self):
+        self.assertIndexed(reverse('export_receipts'), self.params)
+        self.assertIndexed(reverse('export_receipt_items'), self.params)
+
+    def test_date_filter_matches_local_days(self):
+        response = self.client.get(reverse('receipt_list'), self.params)
+        self.assertEqual(len(response.context['receipts']), 3)
+        tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+        response = self.client.get(reverse('receipt_list'), {'start_date': tomorrow})
+        self.assertEqual(len(response.context['receipts']), 0)
+
+
+class ReceiptKeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.client.force_login(self.user)
+        now = timezone.now()
+        # Bir xil vaqtdagi cheklar ham tartib (created_at, id) bilan aniq ajraladi
+        Receipt.objects.bulk_create([
+            Receipt(user=self.user, created_at=now - timedelta(minutes=i // 3), total=Decimal(i))
+            for i in range(47)
+        ])
+        self.expected = list(
+            Receipt.objects.filter(user=self.user).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def page(self, **params):
+        response = self.client.get(reverse('receipt_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context['page_obj']
+
+    def test_walks_all_pages_forward_and_back(self):
+        pages = [self.page()]
+        while pages[-1].has_next:
+            pages.append(self.page(after=pages[-1].next_cursor))
+        self.assertEqual([r.id for p in pages for r in p], self.expected)
+        self.assertEqual([len(p) for p in pages], [20, 20, 7])
+        self.assertFalse(pages[0].has_previous)
+
+        back = self.page(before=pages[-1].previous_cursor)
+        self.assertEqual([r.id for r in back], [r.id for r in pages[1]])
+        back = self.page(before=back.previous_cursor)
+        self.assertEqual([r.id for r in back], [r.id for r in pages[0]])
+        self.assertFalse(back.has_previous)
+
+    def test_deep_page_costs_the_same_queries(self):
+        second = self.page(after=self.page().next_cursor)
+        with CaptureQueriesContext(connection) as first_ctx:
+            self.page()
+        with CaptureQueriesContext(connection) as deep_ctx:
+            deep = self.page(after=second.next_cursor)
+        self.assertEqual(len(deep), 7)
+        self.assertEqual(len(deep_ctx.captured_queries), len(first_ctx.captured_queries))
+        sql = ' '.join(q['sql'] for q in first_ctx.captured_queries + deep_ctx.captured_queries)
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_total_count_is_optional(self):
+        self.assertEqual(self.page(count=1).total, 47)
+
+    def test_page_links_drop_count(self):
+        response = self.client.get(reverse('receipt_list'), {'count': 1, 'description': 'x'})
+        self.assertEqual(response.context['page_query'], 'description=x')
+
+    def test_export_links_encode_filters(self):
+        Receipt.objects.filter(pk=self.expected[0]).update(description='Non & sut #2 +1')
+        Receipt.objects.filter(pk=self.expected[1]).update(description='Non 2')  # "Non " gacha kesilsa mos keladi
+        response = self.client.get(reverse('receipt_list'), {'description': 'Non & sut #2 +1'})
+        href = re.search(r'href="(%s[^"]*)"' % reverse('export_receipts'), response.content.decode()).group(1)
+        export = self.client.get(html.unescape(href))
+        self.assertEqual(len(b''.join(export.streaming_content).decode().splitlines()), 2)  # sarlavha + 1 chek
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        self.assertEqual([r.id for r in self.page(after='buzuq')], self.expected[:20])
+
+
+class BackfillReceiptTotalsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.receipts = Receipt.objects.bulk_create([Receipt(user=self.user, ready=True) for _ in range(7)])
+        ReceiptItem.objects.bulk_create([
+            ReceiptItem(receipt=receipt, product_name=f'Mahsulot {n}', price=Decimal('1000.50'), quantity=Decimal(n))
+            for i, receipt in enumerate(self.receipts) for n in range(1, i + 1)
+        ])
+
+    def test_backfill_in_chunks(self):
+        with self.assertRaises(CommandError):
+            call_command('backfill_receipt_totals', '--verify', stdout=io.StringIO())
+
+        call_command('backfill_receipt_totals', '--batch-size', '3', stdout=io.StringIO())
+        for i, receipt in enumerate(Receipt.objects.order_by('pk')):
+            self.assertEqual(receipt.item_count, i)
+            self.assertEqual(receipt.total, Receipt.round_total(Decimal('1000.50') * sum(range(1, i + 1))))
+        call_command('backfill_receipt_totals', '--verify', stdout=io.StringIO())
+
+    def test_only_mismatched_receipts_are_written(self):
+        call_command('backfill_receipt_totals', stdout=io.StringIO())
+        Receipt.objects.filter(pk=self.receipts[3].pk).update(total=Decimal('1'))
+        out = io.StringIO()
+        call_command('backfill_receipt_totals', '--batch-size', '2', stdout=out)
+        self.assertIn('yangilandi: 1', out.getvalue())
+
+
+class BackfillReceiptProductsTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(name, password='parol') for name in ('kassir', 'boshqa')]
+
+    def product(self, user, name):
+        return Product.objects.create(
+            profile=user.profile, name=name, price=Decimal('1'), selling_price=Decimal('2'), stock=Decimal('5'),
+        )
+
+    def item(self, user, name, product=None):
+        receipt = Receipt.objects.create(user=user, ready=True)
+        return ReceiptItem.objects.create(receipt=receipt, product=product, product_name=name, price=Decimal('2'), quantity=Decimal('1'))
+
+    def test_links_by_name_within_each_shop(self):
+        mine, other = self.users
+        bread, other_bread = self.product(mine, 'Non'), self.product(other, 'Non')
+        old_milk, _ = self.product(mine, 'Sut'), self.product(mine, 'Sut')
+        self.product(mine, 'Tuz')
+        items = {
+            'bread': self.item(mine, 'Non'),
+            'other_bread': self.item(other, 'Non'),
+            'milk': self.item(mine, 'Sut'),
+            'linked': self.item(mine, 'Tuz', product=bread),   # bog'langan qatorga tegilmaydi
+            'unknown': self.item(mine, 'Qatiq'),               # bunday mahsulot yo'q
+            'foreign': self.item(other, 'Tuz'),                # Tuz faqat birinchi do'konda
+        }
+
+        out = io.StringIO()
+        call_command('backfill_receipt_products', '--batch-size', '1', stdout=out)
+        self.assertIn('3 ta qator', out.getvalue())
+        linked = {key: ReceiptItem.objects.get(pk=item.pk).product_id for key, item in items.items()}
+        self.assertEqual(linked, {
+            'bread': bread.pk,
+            'other_bread': other_bread.pk,
+            'milk': old_milk.pk,  # bir xil nomlilardan eng eskisi
+            'linked': bread.pk,
+            'unknown': None,
+            'foreign': None,
+        })
+
+
+class OfflineSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.bread = Product.objects.create(
+            profile=self.user.profile, name='Non', price=Decimal('3000'),
+            selling_price=Decimal('4000'), stock=Decimal('100'),
+        )
+
+    def receipt(self, key, quantity='1', price=None):
+        line = {'product_id': self.bread.pk, 'quantity': quantity}
+        if price is not None:
+            line['price'] = price
+        return {'key': key, 'lines': [line]}
+
+    def test_resubmitted_batch_is_not_written_twice(self):
+        batch = [self.receipt('a1'), self.receipt('a2', '2')]
+        first = sync_offline_receipts(self.user, batch)
+        self.assertEqual([r['status'] for r in first], ['created', 'created'])
+
+        again = sync_offline_receipts(self.user, batch + [self.receipt('a3')])
+        self.assertEqual([r['status'] for r in again], ['duplicate', 'duplicate', 'created'])
+        self.assertEqual([r['receipt_id'] for r in again[:2]], [r['receipt_id'] for r in first])
+        self.assertEqual(Receipt.objects.filter(user=self.user).count(), 3)
+        self.bread.refresh_from_db()
+        self.assertEqual(self.bread.stock, Decimal('96'))
+
+    def test_duplicate_key_within_batch(self):
+        results = sync_offline_receipts(self.user, [self.receipt('b1'), self.receipt('b1', '5')])
+        self.assertEqual([r['status'] for r in results], ['created', 'duplicate'])
+        self.assertEqual(ReceiptItem.objects.get().quantity, Decimal('1'))
+
+    def test_partial_failure_keeps_good_receipts(self):
+        results = sync_offline_receipts(self.user, [
+            self.receipt('c1'),
+            {'key': 'c2', 'lines': [{'product_id': 999999, 'quantity': '1'}]},
+            self.receipt('c3', quantity='123456789012'),
+            self.receipt('c4', price='1.001'),
+            self.receipt('c5', quantity='99999999', price='99999999'),
+            {'key': '', 'lines': []},
+            self.receipt('c6', '3'),
+        ])
+        self.assertEqual(
+            [r['status'] for r in results],
+            ['created', 'error', 'error', 'error', 'error', 'error', 'created'],
+        )
+        self.assertEqual(
+            sorted(Receipt.objects.filter(user=self.user).values_list('client_key', flat=True)), ['c1', 'c6'],
+        )
+
+        # Xato chek tuzatilib qayta yuborilsa yoziladi
+        results = sync_offline_receipts(self.user, [self.receipt('c1'), self.receipt('c3', '2')])
+        self.assertEqual([r['status'] for r in results], ['duplicate', 'created'])
+
+    def test_bad_dates_and_ids_fail_only_their_receipt(self):
+        self.client.force_login(self.user)
+        future = (timezone.now() + timedelta(days=1)).isoformat()
+        response = self.client.post(
+            reverse('sync_offline_receipts'),
+            json.dumps({'receipts': [
+                dict(self.receipt('d1'), created_at='2024-13-45T10:00:00'),
+                dict(self.receipt('d2'), created_at=future),
+                {'key': 'd3', 'lines': [{'product_id': 10 ** 30, 'quantity': '1'}]},
+                self.receipt('d4'),
+            ]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([r['status'] for r in results], ['error', 'error', 'error', 'created'])
+        self.assertEqual(
+            [r['error'] for r in results[:3]],
+            ['created_at noto‘g‘ri', 'created_at kelajakda', f'Mahsulot topilmadi: {10 ** 30}'],
+        )
+
+
+class AsyncCartEndpointTests(TestCase):
+    """Async endpointlar sinxron viewlar bilan bir xil javob qaytaradi."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.product = Product.objects.create(
+            profile=self.user.profile, name='Non oq', price=Decimal('3000'),
+            selling_price=Decimal('4000'), stock=Decimal('100'), qrcode='4780000000017',
+        )
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    async def test_search_matches_sync_view(self):
+        request_metrics.clear()
+        params = {'q': 'non'}
+        sync_response = await self.async_client.get(reverse('product_search_api'), params)
+        response = await self.async_client.get(reverse('async_product_search_api'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), sync_response.json())
+        self.assertEqual(response.json()['results'][0]['id'], self.product.id)
+        # Sovuq kesh bilan ham (profil, indeks qurish) byudjetdan oshmaydi
+        views = request_metrics.summary()['views']
+        self.assertEqual(views['product_search_api']['over_budget'], 0)
+        self.assertEqual(views['async_product_search_api']['over_budget'], 0)
+
+    async def test_add_scan_remove(self):
+        response = await self.async_client.post(
+            reverse('async_add_to_cart', args=[self.product.id]), {'quantity': '2'},
+        )
+        self.assertEqual(response.json()['line']['quantity'], '2')
+        response = await self.async_client.post(reverse('async_scan_to_cart'), {'code': '4780000000017'})
+        self.assertEqual(Decimal(response.json()['line']['quantity']), 3)
+        self.assertEqual(response.json()['cart_total'], '12000.00')
+
+        response = await self.async_client.post(reverse('async_remove_from_cart', args=[self.product.id]))
+        self.assertTrue(response.json()['success'])
+        self.assertFalse(await CartItem.objects.filter(user=self.user).aexists())
+
+    async def test_errors(self):
+        response = await self.async_client.post(reverse('async_scan_to_cart'), {'code': '0000'})
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.post(reverse('async_add_to_cart', args=[self.product.id + 1]))
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.post(
+            reverse('async_add_to_cart', args=[self.product.id]), {'quantity': '-1'},
+        )
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.get(reverse('async_add_to_cart', args=[self.product.id]))
+        self.assertEqual(response.status_code, 405)
+
+    async def test_login_required(self):
+        await self.async_client.alogout()
+        response = await self.async_client.get(reverse('async_product_search_api'), {'q': 'non'})
+        self.assertEqual(response.status_code, 302)
+
+    async def test_queries_are_counted(self):
+        request_metrics.clear()
+        await self.async_client.post(reverse('async_add_to_cart', args=[self.product.id]))
+        entry = request_metrics.summary()['views']['async_add_to_cart']
+        self.assertGreater(entry['queries_max'], 0)
+        self.assertLessEqual(entry['queries_max'], entry['budget'])
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """Parallel kassalar. Faqat faylli bazada (DB_PROFILE=production) ishlaydi."""
+
+    def setUp(self):
+        if connection.is_in_memory_db():
+            self.skipTest('Parallel yozuvchilar uchun faylli SQLite kerak (DB_PROFILE=production)')
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.products = Product.objects.bulk_create([
+            Product(profile=self.user.profile, name=f'Mahsulot {i}', price=Decimal('1000'),
+                    selling_price=Decimal('1250.50'), stock=Decimal('100000'))
+            for i in range(20)
+        ])
+
+    def test_concurrent_checkouts_without_lock_errors(self):
+        result = stress_checkouts(self.user, [p.id for p in self.products], workers=4, seconds=2, lines=3)
+        self.assertEqual(result['lock_errors'], 0, result['first_error'])
+        self.assertGreater(result['checkouts'], 0)
+
+        # F() bilan yozilgan qoldiqlar birorta sotuvni ham yo'qotmagan
+        remaining = sum(Product.objects.values_list('stock', flat=True).iterator(), Decimal('0'))
+        self.assertEqual(Decimal('100000') * 20 - remaining, result['checkouts'] * 3)
+        self.assertEqual(Receipt.objects.filter(user=self.user).count(), result['checkouts'])
@@ -1,13 +1,24 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('', views.sales_page, name='sales_page'),
     path('api/search/', views.product_search_api, name='product_search_api'),
     path('add/<int:product_id>/', views.add_to_cart, name='add_to_cart'),
+    path('scan/', views.scan_to_cart, name='scan_to_cart'),
     path('remove/<int:product_id>/', views.remove_from_cart, name='remove_from_cart'),
     path('cart/close/', views.close_cart, name='close_cart'),
+    path('api/receipts/sync/', views.sync_offline_receipts_api, name='sync_offline_receipts'),
     path('receipts/', views.receipt_list, name='receipt_list'),
+    path('receipts/export/', views.export_receipts, name='export_receipts'),
+    path('receipts/export/items/', views.export_receipt_items, name='export_receipt_items'),
+
+    # ASGI ostida: kassa oynasining eng ko'p chaqiriladigan endpointlari async
+    path('async/api/search/', async_views.product_search_api, name='async_product_search_api'),
+    path('async/add/<int:product_id>/', async_views.add_to_cart, name='async_add_to_cart'),
+    path('async/scan/', async_views.scan_to_cart, name='async_scan_to_cart'),
+    path('async/remove/<int:product_id>/', async_views.remove_from_cart, name='async_remove_from_cart'),
+
     path('toggle_ready/<int:receipt_id>/', views.toggle_ready, name='toggle_ready'),
 
     # 🔥 MUHIM: bu yo‘nalish yo‘q edi
@@ -1,12 +1,22 @@
+import json
 from decimal import Decimal, InvalidOperation
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.db.models import Q
 from products.models import Product
+from products.search import get_index
 from .models import Receipt, ReceiptItem
-from accounts.models import Profile
+from .checkout import checkout, CheckoutError
+from .offline import sync_offline_receipts, OfflineBatchError
+from .export import stream_csv, receipt_rows, receipt_item_rows, RECEIPT_HEADER, RECEIPT_ITEM_HEADER
+from .cart import (
+    add_line, remove_line, cart_items, cart_total, cart_as_dict, clear_cart, serialize_line,
+)
+from accounts.cache import profile_info
+from stats.dates import parse_day, day_range
 
 
 # ==============================
@@ -19,25 +29,37 @@ def get_active_cart_key(request):
     return active_key
 
 
+def parse_quantity(raw):
+    """(miqdor, None) yoki (None, xato javobi)"""
+    raw_qty = (raw or '1').strip()
+    raw_qty = raw_qty.replace(',', '.')
+    try:
+        quantity = Decimal(raw_qty)
+    except (InvalidOperation, TypeError):
+        return None, JsonResponse({'success': False, 'error': 'Noto‘g‘ri miqdor'}, status=400)
+    if not quantity.is_finite() or quantity <= 0:
+        return None, JsonResponse({'success': False, 'error': 'Miqdor > 0 bo‘lishi kerak'}, status=400)
+    return quantity, None
+
+
 # ==============================
 # Savdo sahifasi
 # ==============================
 @login_required
 def sales_page(request):
     active_key = get_active_cart_key(request)
-    cart = request.session.get(active_key, {})
     rows = []
-    for pid, item in cart.items():
-        price = float(item['price'])
-        qty = float(item['quantity'])
+    total = Decimal('0')
+    for item in cart_items(request.user, active_key):
+        total += item.total
         rows.append({
-            'id': pid,
-            'name': item['name'],
-            'price': price,
-            'quantity': qty,
-            'total': round(price * qty, 2),
+            'id': item.product_id,
+            'name': item.name,
+            'price': item.price,
+            'quantity': item.quantity,
+            'total': item.total,
         })
-    return render(request, 'sale/sales.html', {'cart': cart, 'rows': rows, 'active_cart': active_key})
+    return render(request, 'sale/sales.html', {'rows': rows, 'cart_total': total, 'active_cart': active_key})
 
 
 # ==============================
@@ -46,15 +68,13 @@ def sales_page(request):
 @login_required
 def product_search_api(request):
     q = request.GET.get('q', '').strip()
-    profile = request.user.profile
+    profile = profile_info(request.user.id)
     if not q:
         return JsonResponse({'results': []})
 
-    products = Product.objects.filter(
-        profile=profile
-    ).filter(
-        Q(name__icontains=q) | Q(qrcode=q)
-    )[:10]
+    # Qidiruv xotiradagi indeksda, bazadan faqat topilgan 10 ta id (yangi qoldiq uchun)
+    ids = get_index(profile.id).search(q, limit=10)
+    products = Product.objects.in_bulk(ids)
 
     data = [
         {
@@ -63,7 +83,7 @@ def product_search_api(request):
             'selling_price': str(p.selling_price),
             'stock': str(p.stock),
         }
-        for p in products
+        for p in (products[pid] for pid in ids if pid in products)
     ]
     return JsonResponse({'results': data})
 
@@ -75,28 +95,49 @@ def product_search_api(request):
 @require_POST
 def add_to_cart(request, product_id):
     active_key = get_active_cart_key(request)
-    product = get_object_or_404(Product, id=product_id)
-    raw_qty = (request.POST.get('quantity') or '1').strip()
-    raw_qty = raw_qty.replace(',', '.')
-    try:
-        quantity = Decimal(raw_qty)
-    except (InvalidOperation, TypeError):
-        return JsonResponse({'success': False, 'error': 'Noto‘g‘ri miqdor'}, status=400)
-    if quantity <= 0:
-        return JsonResponse({'success': False, 'error': 'Miqdor > 0 bo‘lishi kerak'}, status=400)
-
-    cart = request.session.get(active_key, {})
-    pid = str(product.id)
-    if pid in cart:
-        cart[pid]['quantity'] = float(cart[pid]['quantity']) + float(quantity)
-    else:
-        cart[pid] = {
-            'name': product.name,
-            'price': float(product.selling_price),
-            'quantity': float(quantity),
-        }
-    request.session[active_key] = cart
-    return JsonResponse({'success': True, 'cart': cart})
+    product = get_object_or_404(
+        Product.objects.only('id', 'name', 'selling_price'),
+        id=product_id, profile__user=request.user,
+    )
+    quantity, error = parse_quantity(request.POST.get('quantity'))
+    if error:
+        return error
+
+    # Faqat o'zgargan qator va yangi jami qaytariladi
+    line = add_line(request.user, active_key, product.id, product.name, product.selling_price, quantity)
+    return JsonResponse({
+        'success': True,
+        'line': serialize_line(line),
+        'cart_total': str(cart_total(request.user, active_key)),
+    })
+
+
+# ==============================
+# Shtrix-kod skanerlash: qidiruv + qo'shish bitta so'rovda
+# ==============================
+@login_required
+@require_POST
+def scan_to_cart(request):
+    active_key = get_active_cart_key(request)
+    code = (request.POST.get('code') or '').strip()
+    if not code:
+        return JsonResponse({'success': False, 'error': 'Kod kiritilmagan'}, status=400)
+    quantity, error = parse_quantity(request.POST.get('quantity'))
+    if error:
+        return error
+
+    # qrcode -> mahsulot xaritasi xotiradagi indeksda, bazaga so'rov yo'q
+    entry = get_index(profile_info(request.user.id).id).lookup_qrcode(code)
+    if entry is None:
+        return JsonResponse({'success': False, 'error': 'Mahsulot topilmadi'}, status=404)
+    product_id, name, _, selling_price = entry
+
+    line = add_line(request.user, active_key, product_id, name, selling_price, quantity)
+    return JsonResponse({
+        'success': True,
+        'line': serialize_line(line),
+        'cart_total': str(cart_total(request.user, active_key)),
+    })
 
 
 # ==============================
@@ -106,12 +147,12 @@ def add_to_cart(request, product_id):
 @require_POST
 def remove_from_cart(request, product_id):
     active_key = get_active_cart_key(request)
-    cart = request.session.get(active_key, {})
-    pid = str(product_id)
-    if pid in cart:
-        del cart[pid]
-        request.session[active_key] = cart
-        return JsonResponse({'success': True, 'cart': cart})
+    if remove_line(request.user, active_key, product_id):
+        return JsonResponse({
+            'success': True,
+            'removed': product_id,
+            'cart_total': str(cart_total(request.user, active_key)),
+        })
     return JsonResponse({'success': False, 'error': 'Mahsulot topilmadi'}, status=404)
 
 
@@ -122,48 +163,73 @@ def remove_from_cart(request, product_id):
 @require_POST
 def close_cart(request):
     active_key = get_active_cart_key(request)
-    cart = request.session.get(active_key, {})
-    if not cart:
-        return JsonResponse({'success': False, 'error': 'Korzinka bo‘sh'})
-
     description = request.POST.get('description', '').strip()
-    receipt = Receipt.objects.create(user=request.user, description=description)
-    items_data = []
-    total = Decimal('0.00')
+    with transaction.atomic():
+        cart = cart_as_dict(request.user, active_key)
+        if not cart:
+            return JsonResponse({'success': False, 'error': 'Korzinka bo‘sh'})
+        try:
+            receipt, items = checkout(request.user, cart, description)
+        except CheckoutError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        clear_cart(request.user, active_key)
 
-    for pid, item in cart.items():
-        product = Product.objects.get(id=int(pid))
-        qty = Decimal(str(item['quantity']))
-        price = Decimal(str(item['price']))
-        product.stock -= qty
-        product.save()
-
-        ReceiptItem.objects.create(
-            receipt=receipt,
-            product_name=item['name'],
-            price=price,
-            quantity=qty,
-        )
-        total += price * qty
+    total = Decimal('0.00')
+    items_data = []
+    for item in items:
+        total += item.total
         items_data.append({
-            'name': item['name'],
-            'price': str(price),
-            'quantity': str(qty),
-            'total': str(price * qty)
+            'name': item.product_name,
+            'price': str(item.price),
+            'quantity': str(item.quantity),
+            'total': str(item.total)
         })
 
-    request.session[active_key] = {}
-
-    profile = Profile.objects.filter(user=request.user).first()
+    profile = profile_info(request.user.id)
     profile_name = profile.name if profile and profile.name else "Do‘kon nomi belgilanmagan"
     profile_location = profile.location if profile and profile.location else "Manzil belgilanmagan"
     return JsonResponse({'success': True, 'items': items_data, 'total': str(total), 'name':profile_name, 'location':profile_location})
 
 
+# ==============================
+# Offline cheklarni paket bilan yuklash
+# ==============================
+@login_required
+@require_POST
+def sync_offline_receipts_api(request):
+    try:
+        payload = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'error': 'JSON noto‘g‘ri'}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({'success': False, 'error': 'JSON noto‘g‘ri'}, status=400)
+
+    try:
+        results = sync_offline_receipts(request.user, payload.get('receipts'))
+    except OfflineBatchError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, 'results': results})
+
+
 # ==============================
 # Cheklar ro'yxati
 # ==============================
-from django.core.paginator import Paginator
+from .pagination import keyset_paginate, page_query
+
+
+def receipt_filter(params, prefix=''):
+    """receipt_list va eksportlar uchun umumiy filter (prefix: 'receipt__' qatorlar uchun)"""
+    start_date = parse_day(params.get('start_date'))
+    end_date = parse_day(params.get('end_date'))
+    description = params.get('description')
+    ready_filter = params.get('ready')
+
+    condition = day_range('created_at', start_date, end_date, prefix)
+    if description:
+        condition &= Q(**{f'{prefix}description__icontains': description})
+    if ready_filter in ['true', 'false']:
+        condition &= Q(**{f'{prefix}ready': ready_filter == 'true'})
+    return condition
 
 
 @login_required
@@ -171,8 +237,8 @@ def receipt_list(request):
     receipts = (
         Receipt.objects
         .filter(user=request.user)
+        .filter(receipt_filter(request.GET))
         .prefetch_related('items')
-        .order_by('-created_at')
     )
 
     start_date = request.GET.get('start_date')
@@ -180,20 +246,10 @@ def receipt_list(request):
     description = request.GET.get('description')
     ready_filter = request.GET.get('ready')
 
-    if start_date:
-        receipts = receipts.filter(created_at__date__gte=start_date)
-    if end_date:
-        receipts = receipts.filter(created_at__date__lte=end_date)
-    if description:
-        receipts = receipts.filter(description__icontains=description)
-    if ready_filter in ['true', 'false']:
-        receipts = receipts.filter(ready=(ready_filter == 'true'))
+    # Kursorli sahifalash: OFFSET ham, har sahifada COUNT(*) ham yo'q
+    page_obj = keyset_paginate(receipts, 'created_at', request.GET, per_page=20)
 
-    page_number = request.GET.get('page', 1)
-    paginator = Paginator(receipts, 20)
-    page_obj = paginator.get_page(page_number)
-
-    profile = Profile.objects.filter(user=request.user).first()
+    profile = profile_info(request.user.id)
     profile_name = profile.name if profile and profile.name else "Do‘kon nomi belgilanmagan"
     profile_location = profile.location if profile and profile.location else "Manzil belgilanmagan"
 
@@ -203,14 +259,30 @@ def receipt_list(request):
         'end_date': end_date or '',
         'description': description or '',
         'ready_filter': ready_filter or '',
-        'paginator': paginator,
         'page_obj': page_obj,
+        'page_query': page_query(request.GET),
+        'show_count': bool(request.GET.get('count')),
         'name': profile_name,
         'location': profile_location
     }
     return render(request, 'sale/receipts.html', context)
 
 
+# ==============================
+# Cheklar eksporti (CSV, oqim bilan)
+# ==============================
+@login_required
+def export_receipts(request):
+    receipts = Receipt.objects.filter(user=request.user).filter(receipt_filter(request.GET))
+    return stream_csv('receipts.csv', RECEIPT_HEADER, receipt_rows(receipts))
+
+
+@login_required
+def export_receipt_items(request):
+    items = ReceiptItem.objects.filter(receipt__user=request.user).filter(receipt_filter(request.GET, 'receipt__'))
+    return stream_csv('receipt_items.csv', RECEIPT_ITEM_HEADER, receipt_item_rows(items))
+
+
 @login_required
 @require_POST
 def toggle_ready(request, receipt_id):
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(user_id):
+    return f"sales-version:{user_id}"
+
+
+def sales_version(user_id):
+    """Foydalanuvchi savdo ma'lumotlari versiyasi: o'zgarganda oshiriladi."""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Kesh tozalanib ketsa ham eski versiya bilan to'qnashmasligi uchun vaqt
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_sales_version(user_id):
+    """Commitdan keyin versiyani yangilaydi, shunda eski natija yangi versiya bilan keshlanmaydi.
+
+    Versiya umumiy keshda (settings.CACHES): boshqa workerlarning LRU yozuvlari
+    ham eskiradi. incr o'rniga vaqt yoziladi - fayl keshida incr atomar emas.
+    """
+    transaction.on_commit(lambda: cache.set(_version_key(user_id), time.time_ns(), None))
+
+
+class LRUCache:
+    """Jarayon ichidagi kichik LRU kesh, hit/miss hisoblagichlari bilan."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_set(self, key, compute):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def info(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else None,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+dashboard_cache = LRUCache(getattr(settings, 'STATS_CACHE_SIZE', 512))
+
+
+def cached_sales_summary(user_id, start_date, end_date, today, compute):
+    """(user, versiya, sanalar) bo'yicha keshlangan natija.
+
+    today ham kalitda: sana tanlanmasa oyna bugungi kun, yarim tunda o'zgaradi.
+    """
+    key = (user_id, sales_version(user_id), start_date, end_date, today)
+    return dashboard_cache.get_or_set(key, compute)
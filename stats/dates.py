@@ -0,0 +1,27 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def parse_day(value):
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def day_start(day):
+    """Kun boshi (joriy vaqt zonasida) - `__date` o'rniga indeksdan foydalanadigan oraliq uchun"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def day_range(field, start=None, end=None, prefix=''):
+    """field__date__gte/lte bilan bir xil, lekin ustunni funksiyaga o'ramaydi."""
+    condition = Q()
+    if start:
+        condition &= Q(**{f'{prefix}{field}__gte': day_start(start)})
+    if end:
+        condition &= Q(**{f'{prefix}{field}__lt': day_start(end + timedelta(days=1))})
+    return condition
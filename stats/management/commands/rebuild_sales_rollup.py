@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from stats.rollup import rebuild
+
+
+class Command(BaseCommand):
+    help = "Kunlik savdo rollupini (DailySales) cheklar tarixidan qaytadan quradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Faqat shu foydalanuvchi (username) uchun")
+
+    def handle(self, *args, **options):
+        users = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"Foydalanuvchi topilmadi: {options['user']}")
+            users = [user]
+        count = rebuild(users=users)
+        self.stdout.write(self.style.SUCCESS(f"{count} ta rollup qatori yozildi"))
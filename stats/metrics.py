@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger('stats.metrics')
+
+SQL_PREVIEW = 500
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class QueryCollector:
+    """connection.execute_wrapper uchun: so'rovlar soni, umumiy vaqti va eng sekini."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql = ''
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.total_ms += elapsed
+            if elapsed > self.slowest_ms:
+                self.slowest_ms = elapsed
+                self.slowest_sql = sql[:SQL_PREVIEW]
+
+
+class RequestMetrics:
+    """Oxirgi so'rovlar uchun chegaralangan halqa bufer (jarayon ichida)."""
+
+    def __init__(self, size):
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def summary(self):
+        """URL nomi bo'yicha: soni, latency p50/p95, so'rovlar, so'rov vaqti, eng sekin so'rov"""
+        with self._lock:
+            entries = list(self._entries)
+        groups = {}
+        for entry in entries:
+            groups.setdefault(entry['view'], []).append(entry)
+
+        views = {}
+        for view, rows in groups.items():
+            slowest = max(rows, key=lambda row: row['slowest_ms'])
+            views[view] = {
+                'requests': len(rows),
+                'p50_ms': round(percentile([r['ms'] for r in rows], 50), 3),
+                'p95_ms': round(percentile([r['ms'] for r in rows], 95), 3),
+                'queries_avg': round(sum(r['queries'] for r in rows) / len(rows), 2),
+                'queries_max': max(r['queries'] for r in rows),
+                'query_ms_avg': round(sum(r['query_ms'] for r in rows) / len(rows), 3),
+                'budget': query_budget(view),
+                'over_budget': sum(1 for r in rows if r['over_budget']),
+                'slowest_query': {'ms': round(slowest['slowest_ms'], 3), 'sql': slowest['slowest_sql']},
+            }
+        return {'size': len(entries), 'capacity': self._entries.maxlen, 'views': views}
+
+
+def query_budget(view):
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(view)
+
+
+request_metrics = RequestMetrics(getattr(settings, 'QUERY_METRICS_SIZE', 2000))
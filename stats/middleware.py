@@ -0,0 +1,74 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connection
+from django.utils.decorators import sync_and_async_middleware
+
+from .metrics import QueryCollector, logger, query_budget, request_metrics
+
+
+def _install(collector):
+    wrapper = connection.execute_wrapper(collector)
+    wrapper.__enter__()
+    return wrapper
+
+
+@sync_and_async_middleware
+class QueryMetricsMiddleware:
+    """Har so'rov uchun latency, so'rovlar soni va vaqti, eng sekin so'rovni yozadi.
+
+    DEBUG shart emas: so'rovlar connection.execute_wrapper orqali sanaladi.
+    Ro'yxatda birinchi turishi kerak, shunda sessiya va auth so'rovlari ham kiradi.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        collector = QueryCollector()
+        start = time.perf_counter()
+        with connection.execute_wrapper(collector):
+            response = self.get_response(request)
+        self._record(request, response, collector, (time.perf_counter() - start) * 1000)
+        return response
+
+    async def __acall__(self, request):
+        # Ulanish oqimga bog'liq: async ORM so'rovning thread-sensitive oqimida
+        # ishlaydi, wrapper ham o'sha oqimdagi ulanishga o'rnatiladi
+        collector = QueryCollector()
+        start = time.perf_counter()
+        wrapper = await sync_to_async(_install)(collector)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrapper.__exit__)(None, None, None)
+        self._record(request, response, collector, (time.perf_counter() - start) * 1000)
+        return response
+
+    def _record(self, request, response, collector, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        budget = query_budget(view)
+        over_budget = budget is not None and collector.count > budget
+        if over_budget:
+            logger.warning(
+                "%s: %d ta so'rov (byudjet %d), %.1f ms; eng sekini %.1f ms: %s",
+                view, collector.count, budget, elapsed, collector.slowest_ms, collector.slowest_sql,
+            )
+
+        request_metrics.record({
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+            'ms': elapsed,
+            'queries': collector.count,
+            'query_ms': collector.total_ms,
+            'slowest_ms': collector.slowest_ms,
+            'slowest_sql': collector.slowest_sql,
+            'over_budget': over_budget,
+        })
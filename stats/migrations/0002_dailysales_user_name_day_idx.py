@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_profile_name_idx'),
+        ('stats', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailysales',
+            index=models.Index(fields=['user', 'product_name', 'day'], name='dailysales_user_name_day_idx'),
+        ),
+    ]
@@ -1,3 +1,23 @@
 from django.db import models
+from django.contrib.auth.models import User
 
-# Create your models here.
+
+class DailySales(models.Model):
+    """Kunlik savdo yig'indisi (user, kun, mahsulot). Chek yozilganda yangilanadi."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_sales')
+    day = models.DateField()
+    product = models.ForeignKey('products.Product', on_delete=models.SET_NULL, null=True, blank=True)
+    product_name = models.CharField(max_length=150)
+    quantity = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    revenue = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    profit = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+
+    class Meta:
+        unique_together = (('user', 'day', 'product_name'),)
+        indexes = [
+            # Dashboard: user bo'yicha, mahsulot nomi tartibida guruhlash (vaqtinchalik B-tree'siz)
+            models.Index(fields=['user', 'product_name', 'day'], name='dailysales_user_name_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.product_name}: {self.quantity}"
@@ -0,0 +1,150 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, When, Value, F, Max, Sum, DecimalField, ExpressionWrapper
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from sale.models import ReceiptItem
+from .cache import bump_sales_version
+from .models import DailySales
+
+AMOUNT = DecimalField(max_digits=18, decimal_places=4)
+
+
+def _merge(lines):
+    """[(day, product_id, name, quantity, revenue, profit)] -> {(day, name): [...]}"""
+    merged = {}
+    for day, product_id, name, quantity, revenue, profit in lines:
+        row = merged.get((day, name))
+        if row is None:
+            merged[(day, name)] = [product_id, quantity, revenue, profit]
+        else:
+            row[1] += quantity
+            row[2] += revenue
+            row[3] += profit
+    return merged
+
+
+def _apply(user, merged):
+    existing = {
+        (day, name): pk
+        for day, name, pk in DailySales.objects
+        .filter(user=user, day__in={day for day, _ in merged}, product_name__in={name for _, name in merged})
+        .values_list('day', 'product_name', 'id')
+    }
+
+    updates = {existing[key]: row for key, row in merged.items() if key in existing}
+    if updates:
+        def delta(index):
+            return Case(
+                *[When(pk=pk, then=Value(row[index])) for pk, row in updates.items()],
+                output_field=AMOUNT,
+            )
+        DailySales.objects.filter(pk__in=list(updates)).update(
+            quantity=F('quantity') + delta(1),
+            revenue=F('revenue') + delta(2),
+            profit=F('profit') + delta(3),
+        )
+
+    DailySales.objects.bulk_create([
+        DailySales(
+            user=user, day=day, product_id=row[0], product_name=name,
+            quantity=row[1], revenue=row[2], profit=row[3],
+        )
+        for (day, name), row in merged.items() if (day, name) not in existing
+    ])
+
+
+def record_sales(user, lines):
+    """Yangi chek qatorlarini rollupga qo'shadi (chek bilan bir tranzaksiyada chaqiriladi).
+
+    lines: [(day, product_id, product_name, quantity, revenue, profit)].
+    So'rovlar soni qatorlar soniga bog'liq emas: 1 SELECT, 1 UPDATE, 1 INSERT.
+    """
+    merged = _merge(lines)
+    if not merged:
+        return
+    bump_sales_version(user.pk)
+    try:
+        with transaction.atomic():
+            _apply(user, merged)
+    except IntegrityError:
+        # Parallel chek aynan shu kalitni yaratib qo'ydi: endi u UPDATE bo'ladi
+        with transaction.atomic():
+            _apply(user, merged)
+
+
+def sale_lines(receipt, items):
+    """Chek qatorlaridan rollup qatorlari (kelgan narx qatorning o'zidagi cost)."""
+    day = timezone.localdate(receipt.created_at)
+    for item in items:
+        cost = item.cost if item.cost is not None else Decimal('0')
+        yield (
+            day, item.product_id, item.product_name, item.quantity,
+            item.price * item.quantity, (item.price - cost) * item.quantity,
+        )
+
+
+LINE_TOTAL = ExpressionWrapper(F('price') * F('quantity'), output_field=AMOUNT)
+# Chekdagi kelgan narx (record_sales ham shuni ishlatadi); admin qo'shgan,
+# cost yozilmagan qatorlar uchun hozirgi narx
+LINE_COST = ExpressionWrapper(Coalesce('cost', 'product__price') * F('quantity'), output_field=AMOUNT)
+
+
+def rebuild(users=None, days=None):
+    """Rollupni ReceiptItem tarixidan qaytadan quradi.
+
+    Kelgan narx chek qatoridagi cost (sotuv paytidagi narx), shuning uchun
+    qayta qurish yangi qo'shilgan qatorlar bilan bir xil foyda beradi.
+    Kelgan narxi ham, mahsuloti ham yo'q qatorlar uchun foyda = tushum.
+    """
+    rollups = DailySales.objects.all()
+    items = ReceiptItem.objects.annotate(day=TruncDate('receipt__created_at'))
+    if users is not None:
+        rollups = rollups.filter(user__in=users)
+        items = items.filter(receipt__user__in=users)
+    if days is not None:
+        rollups = rollups.filter(day__in=days)
+        items = items.filter(day__in=days)
+
+    groups = (
+        items
+        .values('receipt__user_id', 'day', 'product_name')
+        .annotate(
+            total_quantity=Sum('quantity'),
+            revenue=Sum(LINE_TOTAL),
+            cost=Sum(LINE_COST),
+            product_ref=Max('product_id'),
+        )
+        .order_by()
+    )
+
+    rows = [
+        DailySales(
+            user_id=g['receipt__user_id'],
+            day=g['day'],
+            product_id=g['product_ref'],
+            product_name=g['product_name'],
+            quantity=g['total_quantity'],
+            revenue=g['revenue'],
+            profit=g['revenue'] - (g['cost'] or 0),
+        )
+        for g in groups
+    ]
+
+    with transaction.atomic():
+        rollups.delete()
+        DailySales.objects.bulk_create(rows, batch_size=2000)
+        for user_id in ({r.user_id for r in rows} if users is None else {getattr(u, 'pk', u) for u in users}):
+            bump_sales_version(user_id)
+    return len(rows)
+
+
+def refresh_receipts(receipts):
+    """Admin orqali o'zgargan/o'chirilgan cheklar kunlarini qayta hisoblaydi."""
+    days = {}
+    for receipt in receipts:
+        days.setdefault(receipt.user_id, set()).add(timezone.localdate(receipt.created_at))
+    for user_id, user_days in days.items():
+        rebuild(users=[user_id], days=user_days)
@@ -0,0 +1,29 @@
+# stats/signals.py
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+from products.models import Product
+from .cache import bump_sales_version
+
+PRICE_FIELDS = ('price', 'selling_price')
+
+
+def _prices(instance):
+    # __dict__ orqali: .only() bilan kechiktirilgan maydonlar bazadan yuklanmaydi
+    return tuple(instance.__dict__.get(field) for field in PRICE_FIELDS)
+
+
+@receiver(post_init, sender=Product)
+def remember_prices(sender, instance, **kwargs):
+    instance._saved_prices = _prices(instance)
+
+
+@receiver(post_save, sender=Product)
+def product_price_changed(sender, instance, created, update_fields=None, **kwargs):
+    prices = _prices(instance)
+    changed = prices != instance._saved_prices
+    instance._saved_prices = prices
+    if created or not changed:
+        return
+    if update_fields is not None and not set(PRICE_FIELDS) & set(update_fields):
+        return
+    bump_sales_version(instance.profile.user_id)
@@ -1,3 +1,202 @@
-from django.test import TestCase
+import json
+import unittest
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from unittest import mock
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Product
+from sale.bench import plan_problems
+from sale.models import ReceiptItem
+from .cache import bump_sales_version, cached_sales_summary, dashboard_cache
+from .metrics import request_metrics
+from .models import DailySales
+from .rollup import rebuild, refresh_receipts
+from .views import sales_summary
+
+
+def snapshot(user):
+    return {
+        (r.day, r.product_name): (r.quantity, r.revenue, r.profit)
+        for r in DailySales.objects.filter(user=user)
+    }
+
+
+class DailySalesRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        dashboard_cache.clear()
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.client.force_login(self.user)
+        self.milk = Product.objects.create(
+            profile=self.user.profile, name='Sut', price=Decimal('8000'),
+            selling_price=Decimal('10000'), stock=Decimal('100'), qrcode='111',
+        )
+        self.bread = Product.objects.create(
+            profile=self.user.profile, name='Non', price=Decimal('2500'),
+            selling_price=Decimal('3500.50'), stock=Decimal('100'), qrcode='222',
+        )
+
+    def sell(self, *lines):
+        for product, qty in lines:
+            self.client.post(reverse('add_to_cart', args=[product.id]), {'quantity': qty})
+        response = self.client.post(reverse('close_cart'))
+        self.assertTrue(response.json()['success'])
+
+    def test_incremental_rollup_matches_rebuild(self):
+        self.sell((self.milk, '2'), (self.bread, '1.5'))
+        self.sell((self.milk, '1'))
+        self.client.post(reverse('return_page'), {'product': self.bread.id, 'quantity': '0.5'})
+        yesterday = (timezone.now() - timedelta(days=1)).isoformat()
+        self.client.post(
+            reverse('sync_offline_receipts'),
+            json.dumps({'receipts': [{
+                'key': 'offline-1', 'created_at': yesterday,
+                'lines': [{'product_id': self.milk.id, 'quantity': '3', 'price': '9500'}],
+            }]}),
+            content_type='application/json',
+        )
+
+        incremental = snapshot(self.user)
+        today = timezone.localdate()
+        self.assertEqual(incremental[(today, 'Sut')], (Decimal('3'), Decimal('30000'), Decimal('6000')))
+        self.assertEqual(
+            incremental[(today, 'Non')],
+            (Decimal('1'), Decimal('3500.50'), Decimal('1000.50')),
+        )
+        self.assertEqual(len(incremental), 3)
+
+        rebuild(users=[self.user])
+        self.assertEqual(snapshot(self.user), incremental)
+
+    def test_rebuild_keeps_cost_at_sale_time(self):
+        self.sell((self.milk, '1'))                           # kelgan narx 8000
+        Product.objects.filter(pk=self.milk.pk).update(price=Decimal('9500'))
+        self.sell((self.milk, '1'))                           # kelgan narx 9500
+        today = timezone.localdate()
+        self.assertEqual(snapshot(self.user)[(today, 'Sut')][2], Decimal('2500'))
+
+        # Admin bitta chekni o'zgartirdi: kun qayta hisoblanadi, lekin foyda o'zgarmaydi
+        last = ReceiptItem.objects.latest('id').receipt
+        refresh_receipts([last])
+        self.assertEqual(snapshot(self.user)[(today, 'Sut')][2], Decimal('2500'))
+        rebuild(users=[self.user])
+        self.assertEqual(snapshot(self.user)[(today, 'Sut')][2], Decimal('2500'))
+
+    def test_dashboard_matches_full_recomputation(self):
+        self.sell((self.milk, '2'), (self.bread, '3'))
+        self.client.post(reverse('return_page'), {'product': self.milk.id, 'quantity': '1'})
+
+        expected_total = sum(
+            (i.price * i.quantity for i in ReceiptItem.objects.filter(receipt__user=self.user)),
+            Decimal('0'),
+        )
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['today_total'], expected_total)
+        self.assertEqual(
+            {p['product_name']: p['quantity'] for p in response.context['today_products']},
+            {'Sut': Decimal('1'), 'Non': Decimal('3')},
+        )
+
+    def test_summary_is_one_query_for_both_windows(self):
+        self.sell((self.milk, '2'))
+        yesterday = (timezone.now() - timedelta(days=1)).isoformat()
+        self.client.post(
+            reverse('sync_offline_receipts'),
+            json.dumps({'receipts': [{
+                'key': 'offline-2', 'created_at': yesterday,
+                'lines': [{'product_id': self.bread.id, 'quantity': '1'}],
+            }]}),
+            content_type='application/json',
+        )
+        today = timezone.localdate()
+        with self.assertNumQueries(1):
+            summary = sales_summary(self.user, today - timedelta(days=7), today)
+        self.assertEqual([p['product_name'] for p in summary['today_products']], ['Sut'])
+        self.assertEqual([p['product_name'] for p in summary['filtered_products']], ['Non', 'Sut'])
+        self.assertEqual(summary['filtered_total'], Decimal('23500.50'))
+        self.assertEqual(summary['today_profit'], Decimal('4000'))
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN faqat SQLite uchun')
+    def test_dashboard_query_uses_index(self):
+        self.sell((self.milk, '2'), (self.bread, '1'))
+        today = timezone.localdate()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('dashboard'), {
+                'start_date': (today - timedelta(days=30)).isoformat(),
+                'end_date': today.isoformat(),
+            })
+        self.assertEqual(plan_problems(ctx.captured_queries), [])
+
+    def test_dashboard_cache_is_invalidated_by_writes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sell((self.milk, '1'))
+        self.assertEqual(self.client.get(reverse('dashboard')).context['today_total'], Decimal('10000'))
+        self.client.get(reverse('dashboard'))
+        self.assertEqual(dashboard_cache.info()['hits'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sell((self.bread, '2'))
+        self.assertEqual(self.client.get(reverse('dashboard')).context['today_total'], Decimal('17001'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.milk.price = Decimal('7000')
+            self.milk.save()
+        self.client.get(reverse('dashboard'))
+        self.assertEqual(dashboard_cache.info()['misses'], 3)
+
+    def test_bump_from_another_worker_invalidates_local_entries(self):
+        self.assertNotIn('LocMemCache', settings.CACHES['default']['BACKEND'])
+        today = timezone.localdate()
+        compute = mock.Mock(side_effect=[1, 2])
+        self.assertEqual(cached_sales_summary(self.user.pk, None, None, today, compute), 1)
+        self.assertEqual(cached_sales_summary(self.user.pk, None, None, today, compute), 1)
+
+        # Boshqa worker: xuddi shu sozlamalardan alohida kesh nusxasi
+        other = caches.create_connection('default')
+        with mock.patch('stats.cache.cache', other), self.captureOnCommitCallbacks(execute=True):
+            bump_sales_version(self.user.pk)
+        self.assertEqual(cached_sales_summary(self.user.pk, None, None, today, compute), 2)
+
+
+class QueryMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        request_metrics.clear()
+        self.user = User.objects.create_user('kassir', password='parol')
+        self.staff = User.objects.create_user('admin', password='parol', is_staff=True)
+
+    def test_records_queries_per_view(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('receipt_list'))
+        expected = len(ctx.captured_queries)
+        self.client.get(reverse('receipt_list'))
+
+        self.client.force_login(self.staff)
+        data = self.client.get(reverse('stats_query_metrics')).json()
+        receipts = data['views']['receipt_list']
+        self.assertEqual(receipts['requests'], 2)
+        self.assertEqual(receipts['queries_max'], expected)
+        self.assertTrue(receipts['slowest_query']['sql'].startswith('SELECT'))
+
+    @override_settings(QUERY_BUDGETS={'receipt_list': 1})
+    def test_budget_overrun_logs_warning(self):
+        self.client.force_login(self.user)
+        with self.assertLogs('stats.metrics', level='WARNING') as logs:
+            self.client.get(reverse('receipt_list'))
+        self.assertIn('receipt_list', logs.output[0])
+        self.assertEqual(request_metrics.summary()['views']['receipt_list']['over_budget'], 1)
+
+    def test_endpoint_is_staff_only(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('stats_query_metrics'))
+        self.assertEqual(response.status_code, 302)
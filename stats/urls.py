@@ -3,4 +3,6 @@ from . import views
 
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
+    path('cache/', views.cache_info, name='stats_cache_info'),
+    path('metrics/', views.query_metrics, name='stats_query_metrics'),
 ]
@@ -1,100 +1,109 @@
+from decimal import Decimal
 from django.shortcuts import render
+from django.http import JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.db.models import Q, Sum
 from django.utils import timezone
-from sale.models import Receipt, ReceiptItem
-from products.models import Product
+from .cache import cached_sales_summary, dashboard_cache
+from .dates import parse_day
+from .metrics import request_metrics
+from .models import DailySales
+
+
+def summarize(rows, prefix):
+    """Bitta so'rov natijasidan bitta oyna uchun ro'yxat va jami summalar."""
+    product_list = [
+        {
+            'product_name': row['product_name'],
+            'quantity': row[f'{prefix}_quantity'],
+            'total_sales': row[f'{prefix}_sales'],
+            'total_profit': row[f'{prefix}_profit'],
+        }
+        for row in rows if row[f'{prefix}_quantity'] is not None
+    ]
+    total_sum = sum((p['total_sales'] for p in product_list), Decimal('0'))
+    total_profit = sum((p['total_profit'] for p in product_list), Decimal('0'))
+    return product_list, total_sum, total_profit
+
+
+def sales_summary(user, start_date=None, end_date=None):
+    """Bugungi va tanlangan oraliq statistikasi bitta GROUP BY so'rovida.
+
+    Ikkala oyna shartli agregatsiya (Sum(..., filter=...)) bilan hisoblanadi,
+    summalar Decimal bo'lib qoladi.
+    """
+    today = timezone.localdate()
+    today_window = Q(day=today)
+    # Sana tanlanmasa — faqat bugungi kun
+    window = Q()
+    if start_date:
+        window &= Q(day__gte=start_date)
+    if end_date:
+        window &= Q(day__lte=end_date)
+    if not (start_date or end_date):
+        window = today_window
+
+    annotations = {
+        'today_quantity': Sum('quantity', filter=today_window),
+        'today_sales': Sum('revenue', filter=today_window),
+        'today_profit': Sum('profit', filter=today_window),
+    }
+    if window is not today_window:
+        annotations.update({
+            'filtered_quantity': Sum('quantity', filter=window),
+            'filtered_sales': Sum('revenue', filter=window),
+            'filtered_profit': Sum('profit', filter=window),
+        })
+
+    rows = list(
+        DailySales.objects
+        .filter(user=user)
+        .filter(window | today_window)
+        .values('product_name')
+        .annotate(**annotations)
+        .order_by('product_name')
+    )
+
+    today_products, today_total, today_profit = summarize(rows, 'today')
+    if window is today_window:
+        filtered = (today_products, today_total, today_profit)
+    else:
+        filtered = summarize(rows, 'filtered')
+    return {
+        'today_products': today_products,
+        'today_total': today_total,
+        'today_profit': today_profit,
+        'filtered_products': filtered[0],
+        'filtered_total': filtered[1],
+        'filtered_profit': filtered[2],
+    }
 
 
 @login_required
 def dashboard(request):
-    user = request.user
-
     # Sana bo‘yicha filter
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
 
-    # Foydalanuvchiga tegishli barcha receipts
-    all_receipts = (
-        Receipt.objects.filter(user=user)
-        .prefetch_related('items')  # oldindan ReceiptItem larni olib keladi
-        .order_by('-created_at')
-    )
-    today = timezone.localdate()
-    # Filterlangan receipts
-    if start_date or end_date:
-        filtered_receipts = all_receipts
-        if start_date:
-            filtered_receipts = filtered_receipts.filter(created_at__date__gte=start_date)
-        if end_date:
-            filtered_receipts = filtered_receipts.filter(created_at__date__lte=end_date)
-    else:
-        # Sana tanlanmasa — faqat bugungi kun
-        filtered_receipts = all_receipts.filter(created_at__date=today)
-
-    # Bugungi receipts
-
-    today_receipts = all_receipts.filter(created_at__date=today)
-
-    # --- OPTIMALLASH UCHUN: Barcha productlarni oldindan olish ---
-    # Bitta query bilan barcha productlar (name -> obj)
-    products_map = {
-        p.name: p for p in Product.objects.filter(profile=user.profile).only('name', 'price', 'selling_price')
-    }
-
-    # Aggregatsiya funksiyasi
-    def aggregate_receipts(qs):
-        product_stats = {}
-        total_sum = 0
-        total_profit = 0
-
-        # faqat kerakli receipt_item larni oldindan olish
-        receipt_items = ReceiptItem.objects.filter(receipt__in=qs).select_related(None)
-
-        for item in receipt_items:
-            product = products_map.get(item.product_name)
-            selling_price = float(product.selling_price) if product else float(item.price)
-            cost_price = float(getattr(product, 'price', 0)) if product else 0.0
-
-            item_total = selling_price * float(item.quantity)
-            profit = (selling_price - cost_price) * float(item.quantity)
-
-            total_sum += item_total
-            total_profit += profit
-
-            stats = product_stats.setdefault(item.product_name, {
-                'quantity': 0,
-                'total_sales': 0,
-                'total_profit': 0
-            })
-            stats['quantity'] += float(item.quantity)
-            stats['total_sales'] += item_total
-            stats['total_profit'] += profit
+    start, end = parse_day(start_date), parse_day(end_date)
+    context = dict(cached_sales_summary(
+        request.user.id, start, end, timezone.localdate(),
+        lambda: sales_summary(request.user, start, end),
+    ))
+    context.update({
+        'start_date': start_date or '',
+        'end_date': end_date or '',
+    })
+    return render(request, 'stats/dashboard.html', context)
 
-        # Dict → List
-        product_list = [
-            {
-                'product_name': name,
-                'quantity': stats['quantity'],
-                'total_sales': stats['total_sales'],
-                'total_profit': stats['total_profit']
-            }
-            for name, stats in product_stats.items()
-        ]
 
-        return product_list, total_sum, total_profit
+@staff_member_required
+def cache_info(request):
+    return JsonResponse({'dashboard': dashboard_cache.info()})
 
-    # Bugungi va filterlangan aggregate
-    today_products, today_total, today_profit = aggregate_receipts(today_receipts)
-    filtered_products, filtered_total, filtered_profit = aggregate_receipts(filtered_receipts)
 
-    context = {
-        'today_products': today_products,
-        'today_total': today_total,
-        'today_profit': today_profit,
-        'filtered_products': filtered_products,
-        'filtered_total': filtered_total,
-        'filtered_profit': filtered_profit,
-        'start_date': start_date or '',
-        'end_date': end_date or '',
-    }
-    return render(request, 'stats/dashboard.html', context)
+@staff_member_required
+def query_metrics(request):
+    """Oxirgi so'rovlar bo'yicha view'lar statistikasi (faqat shu jarayon)"""
+    return JsonResponse(request_metrics.summary())